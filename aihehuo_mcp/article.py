@@ -0,0 +1,198 @@
+# article.py
+"""
+Renders WeChat articles from structured content (render_wechat_article).
+
+WECHAT_ARTICLE_TEMPLATE is compiled once into fragments: the page, optional
+blocks, and the repeated pieces (stat rows, founder and partner cards,
+observation items). Each fragment is minified and split into literal text
+and named slots. Rendering joins literals with escaped values, so the model
+only writes the content and the template stays the one place the markup
+is defined. A fragment's 【...】 placeholders must all map to a slot, which
+keeps the template and this module in step.
+"""
+import html
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .preflight import minify_html
+
+# Slots are marked with private-use characters, which survive minification as text
+_SLOT_RE = re.compile("\ue000([a-z_]+)\ue001")
+_PLACEHOLDER_RE = re.compile(r"【[^【】\n]{1,60}】")
+
+Part = Union[str, Tuple[str]]
+
+
+def _slot(name: str) -> str:
+    return f"\ue000{name}\ue001"
+
+
+def _element_end(text: str, start: int) -> int:
+    """从 start 处的开始标签起，返回与之配对的结束标签之后的位置（按同名标签计数嵌套）"""
+    tag = re.match(r"<([a-z0-9]+)", text[start:]).group(1)
+    tags = re.compile(rf"<{tag}[\s>]|</{tag}>")
+    depth = 0
+    for match in tags.finditer(text, start):
+        depth += -1 if match.group(0).startswith("</") else 1
+        if depth == 0:
+            return match.end()
+    raise ValueError(f"unbalanced <{tag}> in article template")
+
+
+def _cut(text: str, start: int, slot: str) -> Tuple[str, str]:
+    """把 start 处的元素替换为槽位，返回 (剩余文本, 元素文本)"""
+    end = _element_end(text, start)
+    return text[:start] + _slot(slot) + text[end:], text[start:end]
+
+
+def _after_marker(text: str, marker: str, slot: str) -> Tuple[str, str]:
+    return _cut(text, text.index("<", text.index(marker) + len(marker)), slot)
+
+
+def _around(text: str, needle: str, tag: str, slot: str) -> Tuple[str, str]:
+    """截取包含 needle 的最内层 tag 元素"""
+    return _cut(text, text.rindex(f"<{tag}", 0, text.index(needle)), slot)
+
+
+def _repeated(text: str, needle: str, tag: str, slot: str) -> Tuple[str, str]:
+    """截取包含 needle 的第一个元素作为片段，删除模板中其余的示例副本"""
+    text, fragment = _around(text, needle, tag, slot)
+    while needle in text:
+        start = text.rindex(f"<{tag}", 0, text.index(needle))
+        text = text[:start] + text[_element_end(text, start):]
+    return text, fragment
+
+
+def _compile(text: str, placeholders: Dict[str, str]) -> List[Part]:
+    """压缩片段并拆分为字面文本和槽位名（以单元素元组表示）"""
+    text = minify_html(text)
+    # Slots present before the placeholders are filled stand for whole elements; whitespace next to them is noise
+    text = re.sub(r" ?(\ue000[a-z_]+\ue001) ?", r"\1", text)
+    for placeholder, name in placeholders.items():
+        text = text.replace(placeholder, _slot(name))
+    leftover = _PLACEHOLDER_RE.search(text)
+    if leftover:
+        raise ValueError(f"article template placeholder {leftover.group(0)} has no slot")
+    parts: List[Part] = []
+    for i, piece in enumerate(_SLOT_RE.split(text)):
+        if i % 2:
+            parts.append((piece,))
+        elif piece:
+            parts.append(piece)
+    return parts
+
+
+@lru_cache(maxsize=1)
+def compiled_fragments() -> Dict[str, List[Part]]:
+    """编译 WECHAT_ARTICLE_TEMPLATE（首次渲染时执行一次）"""
+    from .templates import WECHAT_ARTICLE_TEMPLATE
+    text = WECHAT_ARTICLE_TEMPLATE
+    raw: Dict[str, str] = {}
+    # Innermost pieces first, so the sections that contain them are cut with slots in place
+    text, raw["stat"] = _repeated(text, "【数据维度", "p", "stats")
+    text, raw["intro"] = _around(text, "【开场介绍段落】", "p", "intro_block")
+    text, raw["stats_title"] = _around(text, "【小标题】", "h3", "stats_title_block")
+    text, raw["founder"] = _after_marker(text, "创始人卡片模板 - 开始", "cards")
+    text, raw["partner"] = _after_marker(text, "合伙人卡片模板 - 开始", "cards")
+    text, raw["observation"] = _repeated(text, "【观察点标题】", "li", "items")
+    text, raw["observation_list"] = _around(text, _slot("items"), "ul", "items_block")
+    text, raw["tip"] = _after_marker(text, "温馨提示框", "tip_block")
+    text, raw["subtitle"] = _around(text, "【副标题", "div", "subtitle_block")
+    text, raw["overview"] = _after_marker(text, "数据概览区域", "overview")
+    text, raw["founders"] = _after_marker(text, "带项目创始人部分", "founders")
+    text, raw["partners"] = _after_marker(text, "找项目合伙人部分", "partners")
+    text, raw["observations"] = _after_marker(text, "数据观察/总结区域", "observations")
+    raw["page"] = text
+
+    placeholders = {
+        "page": {"【文章主标题】": "title"},
+        "subtitle": {"【副标题，如：10月10日新增创业者精选】": "subtitle"},
+        "overview": {"【章节标题，如：10月10日新增创业者画像】": "overview_title"},
+        "intro": {"【开场介绍段落】": "intro"},
+        "stats_title": {"【小标题】": "stats_title"},
+        "stat": {"【数据维度1】": "label", "【数据描述内容】": "text"},
+        "founders": {"【章节标题，如：带项目的典型创始人】": "founders_title"},
+        "founder": {
+            "【用户姓名】": "name", "【创业号8位数字】": "number", "【emoji】 ": "emoji",
+            "【项目名称/方向描述】": "project", "【工作经历、教育背景、行业经验等】": "background",
+            "【项目的核心优势、商业模式、市场机会等】": "highlights", "【需要什么类型的合伙人或资源】": "seeking",
+            "【适合什么样的合伙人、市场分析、合作建议等】": "insight",
+        },
+        "partners": {"【章节标题，如：寻找项目的优质合伙人】": "partners_title"},
+        "partner": {
+            "【用户姓名】": "name", "【创业号8位数字】": "number", "【emoji】 ": "emoji",
+            "【合伙人定位描述】": "positioning", "【教育背景、工作经历、创业经历等】": "background",
+            "【核心技能、资源、经验等】": "strengths", "【想找什么类型的项目或创始人】": "seeking",
+            "【适合加入哪些类型的项目】": "fit_projects", "【这位合伙人的特殊价值、适合的创始人类型等】": "insight",
+        },
+        "observations": {"【观察标题，如：数据观察】": "observations_title"},
+        "observation": {"【观察点标题】": "title", "【观察内容描述】": "text"},
+        "observation_list": {},
+        "tip": {"【提示标题】": "tip_title", "【提示内容描述】": "tip"},
+    }
+    return {name: _compile(fragment, placeholders[name]) for name, fragment in raw.items()}
+
+
+def escape_text(value: Any) -> str:
+    """转义为 HTML 文本，换行转为 <br/>"""
+    return html.escape(str(value), quote=False).replace("\n", "<br/>")
+
+
+def _fill(parts: List[Part], values: Dict[str, str]) -> str:
+    """values 中为已生成的 HTML；缺少的槽位渲染为空"""
+    return "".join(part if isinstance(part, str) else values.get(part[0], "") for part in parts)
+
+
+def _texts(data: Dict[str, Any], *names: str) -> Dict[str, str]:
+    return {name: escape_text(data[name]) for name in names if data.get(name) is not None}
+
+
+def render_wechat_article(article: Dict[str, Any]) -> str:
+    """按结构化内容渲染微信文章 HTML；空的可选区块（副标题、概览、卡片分区、观察、提示）整块省略"""
+    fragments = compiled_fragments()
+
+    def block(name: str, data: Dict[str, Any], *fields: str) -> str:
+        return _fill(fragments[name], _texts(data, *fields))
+
+    def section(name: str, title_field: str, title: Optional[str], inner: Dict[str, str]) -> str:
+        values = dict(inner)
+        if title is not None:
+            values[title_field] = escape_text(title)
+        return _fill(fragments[name], values)
+
+    page: Dict[str, str] = _texts(article, "title")
+    if article.get("subtitle"):
+        page["subtitle_block"] = block("subtitle", article, "subtitle")
+
+    stats = "".join(block("stat", stat, "label", "text") for stat in article.get("stats") or [])
+    if stats or article.get("intro"):
+        page["overview"] = section("overview", "overview_title", article.get("overview_title"), {
+            "intro_block": block("intro", article, "intro") if article.get("intro") else "",
+            "stats_title_block": block("stats_title", article, "stats_title") if article.get("stats_title") else "",
+            "stats": stats,
+        })
+
+    def card(kind: str, data: Dict[str, Any], slots: List[str]) -> str:
+        values = _texts(data, *slots)
+        # The emoji slot owns the space after it, so cards without an emoji do not start with one
+        if values.get("emoji"):
+            values["emoji"] += " "
+        return _fill(fragments[kind], values)
+
+    for kind, field, title_field in (("founder", "founders", "founders_title"), ("partner", "partners", "partners_title")):
+        cards = article.get(field) or []
+        if cards:
+            slots = [part[0] for part in fragments[kind] if not isinstance(part, str)]
+            page[field] = section(field, title_field, article.get(title_field), {
+                "cards": "".join(card(kind, data, slots) for data in cards),
+            })
+
+    observations = "".join(block("observation", item, "title", "text") for item in article.get("observations") or [])
+    tip = block("tip", article, "tip_title", "tip") if article.get("tip") else ""
+    if observations or tip:
+        page["observations"] = section("observations", "observations_title", article.get("observations_title"), {
+            "items_block": _fill(fragments["observation_list"], {"items": observations}) if observations else "",
+            "tip_block": tip,
+        })
+    return _fill(fragments["page"], page)
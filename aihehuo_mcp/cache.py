@@ -0,0 +1,127 @@
+# cache.py
+"""
+In-process response cache for the aihehuo-mcp server.
+Entries expire after a per-entry TTL and the cache is bounded both in
+entry count and in (approximate) bytes, evicting least recently used first.
+An optional backing store (storage.DiskCache) adds a second tier shared by
+all server processes on the host.
+"""
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+
+def cache_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """由 URL 和查询参数生成缓存键（参数排序，保证键稳定）"""
+    if not params:
+        return url
+    return f"{url}?{urlencode(sorted((k, str(v)) for k, v in params.items()))}"
+
+
+def normalize_query(query: str) -> str:
+    """归一化搜索语句：全角转半角、小写、去标点、合并空白，使近似重复的查询共用缓存"""
+    text = unicodedata.normalize("NFKC", query).lower()
+    chars = [" " if unicodedata.category(ch)[0] in ("P", "S", "Z", "C") else ch for ch in text]
+    return " ".join("".join(chars).split())
+
+
+class ResponseCache:
+    """TTL + LRU 缓存，按条目数和字节数双重限制"""
+
+    def __init__(self, max_entries: int, max_bytes: int, backing: Any = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # Second tier consulted on a memory miss (get/set/invalidate/invalidate_prefix/clear/stats)
+        self.backing = backing
+        # key -> (expires_at, size, value)
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return self._get_backing(key)
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def _get_backing(self, key: str) -> Optional[Any]:
+        if self.backing is None:
+            return None
+        found = self.backing.get(key)
+        if found is None:
+            return None
+        value, remaining, size = found
+        # Keep the remaining lifetime so both tiers expire together
+        self._store(key, value, remaining, size)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float, size: int) -> None:
+        if self.backing is not None and ttl > 0:
+            self.backing.set(key, value, ttl)
+        self._store(key, value, ttl, size)
+
+    def _store(self, key: str, value: Any, ttl: float, size: int) -> None:
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, size, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, key: str) -> bool:
+        """删除指定键，返回内存中是否存在"""
+        if self.backing is not None:
+            self.backing.invalidate(key)
+        if key in self._entries:
+            self._remove(key)
+            return True
+        return False
+
+    def invalidate_prefix(self, prefix: str) -> int:
+        """删除所有以 prefix 开头的键，返回内存中删除的数量"""
+        if self.backing is not None:
+            self.backing.invalidate_prefix(prefix)
+        keys = [k for k in self._entries if k.startswith(prefix)]
+        for k in keys:
+            self._remove(k)
+        return len(keys)
+
+    def clear(self) -> None:
+        if self.backing is not None:
+            self.backing.clear()
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        stats = {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+        if self.backing is not None:
+            stats["disk"] = self.backing.stats()
+        return stats
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
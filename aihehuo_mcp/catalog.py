@@ -0,0 +1,89 @@
+# catalog.py
+"""
+Pre-encoded responses for the static MCP list methods (tools/list and
+prompts/list). Each result is encoded once per process and answering a
+request only splices in its id. The etag of a list is a hash of its encoded
+content; initialize reports the etags so clients can skip re-listing. They
+are remembered per source fingerprint under AIHEHUO_CACHE_DIR and
+initialize only reads that record: it never imports the tool table. On a
+cold record initialize leaves the etags out, and the warm-up that runs after
+it computes and saves them for the next start.
+"""
+import hashlib
+import importlib.util
+import json
+import os
+from typing import Any, Dict, Optional
+
+from .config import CACHE_DIR
+from .serialize import dump_message
+
+LIST_METHODS = ("tools/list", "prompts/list")
+
+
+def _hash(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+class StaticResult:
+    """预先编码的 JSON-RPC 结果，result._meta.etag 为内容哈希"""
+
+    def __init__(self, result: Dict[str, Any]):
+        self.etag = _hash(dump_message(result).encode("utf-8"))
+        self.body = dump_message({**result, "_meta": {"etag": self.etag}})
+
+    def message(self, request_id: Any) -> str:
+        """拼接出完整的响应行（不含换行）"""
+        return '{"jsonrpc":"2.0","id":' + dump_message(request_id) + ',"result":' + self.body + "}"
+
+
+def source_fingerprint() -> str:
+    """列表内容的来源指纹：包内源码、AIHEHUO_* 环境变量和已安装的 pydantic（生成 schema）
+    
+    源码按文件名、大小和修改时间计入（只 stat 不读取），initialize 时计算也不费时。
+    """
+    parts = []
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in sorted(os.listdir(package_dir)):
+        if name.endswith(".py"):
+            stat = os.stat(os.path.join(package_dir, name))
+            parts.append(f"{name}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+    for key in sorted(os.environ):
+        if key.startswith("AIHEHUO_"):
+            parts.append(f"{key}={os.environ[key]}".encode("utf-8"))
+    # find_spec locates the package without importing it
+    spec = importlib.util.find_spec("pydantic")
+    if spec is not None and spec.origin:
+        parts.append(f"{spec.origin}:{os.stat(spec.origin).st_mtime_ns}".encode("utf-8"))
+    return _hash(b"\0\0".join(parts))
+
+
+# === etag 记录 ===
+def _etags_path() -> str:
+    return os.path.join(CACHE_DIR, "list_etags.json")
+
+
+def load_list_etags(fingerprint: str) -> Optional[Dict[str, str]]:
+    """读取与 fingerprint 对应的 etag，没有记录或指纹不同时返回 None"""
+    try:
+        with open(_etags_path(), "r", encoding="utf-8") as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(stored, dict) or stored.get("fingerprint") != fingerprint:
+        return None
+    return stored.get("etags")
+
+
+def save_list_etags(fingerprint: str, etags: Dict[str, str]) -> None:
+    path = _etags_path()
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # Unique temp name: several server processes may start at once
+        tmp_name = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_name, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, "etags": etags}, f)
+        os.replace(tmp_name, path)
+    except OSError:
+        # Not persisted; initialize leaves the etags out again next time
+        pass
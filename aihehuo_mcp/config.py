@@ -0,0 +1,133 @@
+# config.py
+"""
+Environment-driven configuration for the aihehuo-mcp server.
+"""
+import os
+
+# === 配置 ===
+AIHEHUO_API_BASE = os.getenv("AIHEHUO_API_BASE", "https://new-api.aihehuo.com")
+AIHEHUO_API_KEY  = os.getenv("AIHEHUO_API_KEY",  "REPLACE_ME")
+CURRENT_USER_ID  = os.getenv("CURRENT_USER_ID",  "REPLACE_ME")
+
+# 客户端限速：按端点族（/users、/ideas、/micro、/ai_reports 及 /micro/ai_reports、其余为 other）的令牌桶，
+# 每秒请求数可用 AIHEHUO_RATE_LIMIT_<族名大写> 覆盖（0 表示不限速），突发上限用 AIHEHUO_RATE_BURST_<族名大写>
+_DEFAULT_RATE_LIMITS = {"users": 20, "ideas": 20, "micro": 10, "ai_reports": 5, "other": 10}
+RATE_LIMITS = {
+    family: float(os.getenv(f"AIHEHUO_RATE_LIMIT_{family.upper()}", str(rate)))
+    for family, rate in _DEFAULT_RATE_LIMITS.items()
+}
+RATE_BURSTS = {
+    family: float(os.getenv(f"AIHEHUO_RATE_BURST_{family.upper()}", str(rate * 2)))
+    for family, rate in RATE_LIMITS.items()
+}
+# 并发的相同 GET 请求（URL、参数和请求体都相同）共用一个进行中的请求
+COALESCE_REQUESTS = os.getenv("AIHEHUO_COALESCE_REQUESTS", "1") not in ("0", "false", "False")
+
+# 本地持久化数据目录（群组快照等）
+CACHE_DIR = os.path.expanduser(os.getenv("AIHEHUO_CACHE_DIR", os.path.join("~", ".cache", "aihehuo-mcp")))
+
+# 工具结果的 JSON 格式：compact（默认，无缩进）或 pretty（2 空格缩进）
+OUTPUT_FORMAT = os.getenv("AIHEHUO_OUTPUT_FORMAT", "compact").lower()
+# 安装了 orjson 时用它编码 JSON（pip install orjson），设为 0 则始终使用标准库 json
+USE_ORJSON    = os.getenv("AIHEHUO_USE_ORJSON", "1") not in ("0", "false", "False")
+
+# 同时执行的 tools/call 数量上限
+MAX_INFLIGHT_TOOL_CALLS = int(os.getenv("AIHEHUO_MAX_INFLIGHT", "8"))
+
+# 批量查询工具：单次最多 ID 数量和同时请求数
+BATCH_MAX_ITEMS   = int(os.getenv("AIHEHUO_BATCH_MAX_ITEMS", "100"))
+BATCH_CONCURRENCY = int(os.getenv("AIHEHUO_BATCH_CONCURRENCY", "8"))
+
+# fetch_new_users 同时请求的页数上限
+NEW_USERS_MAX_FANOUT = int(os.getenv("AIHEHUO_NEW_USERS_MAX_FANOUT", "4"))
+
+# 分块断点续传（需要后端支持 /micro/uploads 协议，见 uploads.py，默认关闭）：
+# 不小于阈值的文件按块上传，中断后再次上传同一文件时从已确认的分块继续；后端不支持时回退为一次性上传
+CHUNKED_UPLOADS          = os.getenv("AIHEHUO_CHUNKED_UPLOADS", "0") in ("1", "true", "True")
+CHUNKED_UPLOAD_THRESHOLD = int(os.getenv("AIHEHUO_CHUNKED_UPLOAD_THRESHOLD", str(8 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE        = int(os.getenv("AIHEHUO_UPLOAD_CHUNK_SIZE", str(5 * 1024 * 1024)))
+# 后端允许并行上传分块时同时上传的分块数
+UPLOAD_CONCURRENCY       = int(os.getenv("AIHEHUO_UPLOAD_CONCURRENCY", "4"))
+UPLOAD_PART_TIMEOUT      = float(os.getenv("AIHEHUO_UPLOAD_PART_TIMEOUT", "120"))
+
+# 超过该长度（字符数）的内联 HTML 正文（submit_wechat_article_draft 的 body）改为以 multipart 文件流式发送
+INLINE_BODY_MULTIPART_THRESHOLD = int(os.getenv("AIHEHUO_INLINE_BODY_MULTIPART_THRESHOLD", str(256 * 1024)))
+
+# 发布前 HTML 检查（见 preflight.py）：微信文章中的 <a>/<script>、未替换的模板【占位符】和超出大小上限的文档在上传前直接报错
+HTML_PREFLIGHT           = os.getenv("AIHEHUO_HTML_PREFLIGHT", "1") not in ("0", "false", "False")
+# 上传前压缩 HTML（去注释、折叠空白、压缩内联样式）
+HTML_MINIFY              = os.getenv("AIHEHUO_HTML_MINIFY", "1") not in ("0", "false", "False")
+# 微信公众号正文上限 1MB
+WECHAT_ARTICLE_MAX_BYTES = int(os.getenv("AIHEHUO_WECHAT_ARTICLE_MAX_BYTES", str(1024 * 1024)))
+AI_REPORT_MAX_BYTES      = int(os.getenv("AIHEHUO_AI_REPORT_MAX_BYTES", str(20 * 1024 * 1024)))
+
+# 上传去重：按文件内容的 SHA-256 记录上传结果，同一账号再次上传相同内容时直接返回记录的结果
+UPLOAD_DEDUP        = os.getenv("AIHEHUO_UPLOAD_DEDUP", "1") in ("1", "true", "True")
+# 记录的有效期（秒），0 表示不过期
+UPLOAD_DEDUP_TTL    = float(os.getenv("AIHEHUO_UPLOAD_DEDUP_TTL", str(30 * 24 * 3600)))
+# 命中时先用 HEAD 请求确认记录结果中的 url 仍可访问，不可访问则重新上传
+UPLOAD_DEDUP_VERIFY = os.getenv("AIHEHUO_UPLOAD_DEDUP_VERIFY", "0") in ("1", "true", "True")
+
+# === HTTP 连接池 ===
+# 所有后端请求共用一个连接池，保持 keep-alive 以复用 TCP/TLS 连接
+HTTP_MAX_CONNECTIONS          = int(os.getenv("AIHEHUO_HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("AIHEHUO_HTTP_MAX_CONNECTIONS_PER_HOST", "10"))
+HTTP_MAX_KEEPALIVE            = int(os.getenv("AIHEHUO_HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY         = float(os.getenv("AIHEHUO_HTTP_KEEPALIVE_EXPIRY", "60"))
+# HTTP/2 需要安装 h2（pip install "httpx[http2]"），未安装时自动回退到 HTTP/1.1
+HTTP2_ENABLED                 = os.getenv("AIHEHUO_HTTP2", "1") not in ("0", "false", "False")
+
+# === 重试与熔断 ===
+# GET 等幂等请求遇到连接错误、超时或 429/502/503/504 时最多重试的次数（指数退避 + 随机抖动）
+HTTP_RETRIES           = int(os.getenv("AIHEHUO_HTTP_RETRIES", "2"))
+HTTP_RETRY_BACKOFF     = float(os.getenv("AIHEHUO_HTTP_RETRY_BACKOFF", "0.25"))
+HTTP_RETRY_BACKOFF_MAX = float(os.getenv("AIHEHUO_HTTP_RETRY_BACKOFF_MAX", "4"))
+# 后端返回的 Retry-After 超过该秒数时不再等待，直接返回该响应
+HTTP_RETRY_AFTER_MAX   = float(os.getenv("AIHEHUO_HTTP_RETRY_AFTER_MAX", "10"))
+# 单个端点连续失败这么多次后熔断，冷却期内直接失败，之后放行一个探测请求
+BREAKER_FAILURES       = int(os.getenv("AIHEHUO_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN       = float(os.getenv("AIHEHUO_BREAKER_COOLDOWN", "30"))
+
+# === 响应缓存 ===
+# 只读工具的读穿缓存，按条目数和字节数限制（LRU 淘汰）
+CACHE_MAX_ENTRIES = int(os.getenv("AIHEHUO_CACHE_MAX_ENTRIES", "512"))
+CACHE_MAX_BYTES   = int(os.getenv("AIHEHUO_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# 各工具缓存有效期（秒），可用 AIHEHUO_CACHE_TTL_<工具名大写> 覆盖，0 表示不缓存
+_DEFAULT_CACHE_TTLS = {
+    "get_user_details": 300,
+    "get_idea_details": 300,
+    "get_wechat_data": 120,
+    "get_current_user_profile": 60,
+    "get_bot_impressions": 120,
+    "current_user_profile_resource": 60,
+}
+CACHE_TTLS = {
+    name: float(os.getenv(f"AIHEHUO_CACHE_TTL_{name.upper()}", str(ttl)))
+    for name, ttl in _DEFAULT_CACHE_TTLS.items()
+}
+
+# 磁盘缓存层（默认关闭）：同一主机上的所有服务进程共享 CACHE_DIR/responses.sqlite3，
+# 内存未命中时先查磁盘，多个 Agent 进程只需预热一次
+DISK_CACHE_ENABLED     = os.getenv("AIHEHUO_DISK_CACHE", "0") in ("1", "true", "True")
+DISK_CACHE_MAX_ENTRIES = int(os.getenv("AIHEHUO_DISK_CACHE_MAX_ENTRIES", "20000"))
+DISK_CACHE_MAX_BYTES   = int(os.getenv("AIHEHUO_DISK_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# === 语义搜索结果缓存 ===
+# 按归一化查询+过滤条件缓存完整排序结果，后续翻页和近似重复查询在本地切片返回
+SEARCH_CACHE_TTL         = float(os.getenv("AIHEHUO_SEARCH_CACHE_TTL", "600"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("AIHEHUO_SEARCH_CACHE_MAX_ENTRIES", "128"))
+SEARCH_CACHE_MAX_BYTES   = int(os.getenv("AIHEHUO_SEARCH_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+# 每次向后端请求的结果窗口（按该大小取整），超过上限的翻页直接透传给后端
+SEARCH_WINDOW            = int(os.getenv("AIHEHUO_SEARCH_WINDOW", "50"))
+SEARCH_MAX_WINDOW        = int(os.getenv("AIHEHUO_SEARCH_MAX_WINDOW", "200"))
+# max_results 自动翻页：单次最多返回的结果数，以及预取（并发请求）的页数，每页 SEARCH_WINDOW 条
+SEARCH_MAX_RESULTS       = int(os.getenv("AIHEHUO_SEARCH_MAX_RESULTS", "500"))
+SEARCH_PREFETCH_PAGES    = int(os.getenv("AIHEHUO_SEARCH_PREFETCH_PAGES", "3"))
+# multi_search_members 单次最多并发的查询数
+MULTI_SEARCH_MAX_QUERIES = int(os.getenv("AIHEHUO_MULTI_SEARCH_MAX_QUERIES", "10"))
+
+# === 运行指标 ===
+# 设置后定期把指标以 Prometheus 文本格式写入该文件（如 node_exporter textfile collector 目录），退出前再写一次
+METRICS_FILE     = os.path.expanduser(os.getenv("AIHEHUO_METRICS_FILE", ""))
+METRICS_INTERVAL = float(os.getenv("AIHEHUO_METRICS_INTERVAL", "15"))
@@ -0,0 +1,52 @@
+# fusion.py
+"""
+Rank fusion for merging several ranked hit lists (multi_search_members).
+Hits are matched by id; every fused hit records which input lists it came
+from, at what rank and with what backend score.
+"""
+from typing import Any, Dict, List, Optional
+
+# Standard RRF smoothing constant (Cormack et al.)
+RRF_K = 60
+
+
+def _score_of(hit: Any) -> Optional[float]:
+    score = hit.get("score") if isinstance(hit, dict) else None
+    return float(score) if isinstance(score, (int, float)) else None
+
+
+def _normalized_scores(hits: List[Any]) -> List[float]:
+    """将单个列表的 score 线性归一化到 [0, 1]；缺少 score 时按排名递减"""
+    scores = [_score_of(hit) for hit in hits]
+    if not hits:
+        return []
+    if any(score is None for score in scores):
+        return [1 - rank / len(hits) for rank in range(len(hits))]
+    low, high = min(scores), max(scores)
+    if high == low:
+        return [1.0] * len(hits)
+    return [(score - low) / (high - low) for score in scores]
+
+
+def fuse(ranked_lists: List[List[Any]], method: str = "rrf", k: int = RRF_K) -> List[Dict[str, Any]]:
+    """融合多个排序列表，返回按融合分数降序排列的 {"hit", "fused_score", "matched_queries"} 列表
+
+    rrf: 每个列表贡献 1 / (k + rank)；score: 各列表 score 归一化后求和（CombSUM）。
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    for list_index, hits in enumerate(ranked_lists):
+        contributions = _normalized_scores(hits) if method == "score" else None
+        for position, hit in enumerate(hits):
+            if not isinstance(hit, dict) or hit.get("id") is None:
+                continue
+            hit_id = str(hit["id"])
+            item = fused.get(hit_id)
+            if item is None:
+                item = fused[hit_id] = {"hit": hit, "fused_score": 0.0, "matched_queries": []}
+            elif any(m["query_index"] == list_index for m in item["matched_queries"]):
+                continue  # the same id twice in one list only counts once
+            rank = position + 1
+            item["fused_score"] += contributions[position] if contributions is not None else 1 / (k + rank)
+            item["matched_queries"].append({"query_index": list_index, "rank": rank, "score": _score_of(hit)})
+    # Ties keep first-seen order, which favours earlier queries
+    return sorted(fused.values(), key=lambda item: -item["fused_score"])
@@ -0,0 +1,191 @@
+# group_export.py
+"""
+Markdown export of group members for the get_group_info tool.
+When ijson is installed the API response is parsed incrementally and each
+member section is written to disk as it arrives, so peak memory stays flat
+regardless of group size. Without ijson the response is parsed in one piece.
+
+A per-group snapshot (member ids plus content hashes of user_text, and the
+response ETag/Last-Modified) is kept under the cache directory so repeated
+runs can report joined/left/changed members and skip rewriting an
+unchanged file.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from .config import CACHE_DIR
+
+try:
+    import ijson
+except ImportError:  # optional dependency: pip install "aihehuo-mcp[streaming]"
+    ijson = None
+
+STREAMING_AVAILABLE = ijson is not None
+
+# JSON paths inside the /users/e{group_id}?all_users=1 response
+GROUP_PREFIX = "data.group"
+USER_PREFIX = "data.group.users.item"
+HEADER_FIELDS = ("id", "title", "intro", "description")
+
+ProgressCallback = Callable[[int], Awaitable[None]]
+
+
+class _AsyncChunkReader:
+    """把 httpx 的异步字节流适配为 ijson 需要的 async read(size) 接口"""
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks
+        self._pending = b""
+
+    async def read(self, size: int = -1) -> bytes:
+        if not self._pending:
+            async for chunk in self._chunks:
+                if chunk:
+                    self._pending = chunk
+                    break
+        # ijson's C backend copies into a fixed-size buffer, so never hand back more than asked
+        if size < 0 or size >= len(self._pending):
+            data, self._pending = self._pending, b""
+        else:
+            data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+class GroupMarkdownWriter:
+    """按原有格式逐段写出群组 Markdown
+    
+    群友段落一到达就写入临时文件，同时记录每位群友 user_text 的内容哈希；
+    finish() 时写出群组头部并拼接临时文件，最后原子替换目标文件，
+    因此内存占用只与群友 ID 数量有关。传入 previous（上次快照的成员哈希）
+    且 collect_changes=True 时，会顺带收集新加入和内容变化的群友。
+    """
+
+    def __init__(self, filename: str, previous: Optional[Dict[str, str]] = None,
+                 collect_changes: bool = False):
+        self.filename = filename
+        self.count = 0
+        self.members: Dict[str, str] = {}
+        self.joined: List[Dict[str, Any]] = []
+        self.changed: List[Dict[str, Any]] = []
+        self._previous = previous or {}
+        self._collect_changes = collect_changes
+        self._body = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+        self._body_hash = hashlib.sha256()
+
+    def add_user(self, user: Dict[str, Any]) -> None:
+        self.count += 1
+        user_text = user.get("user_text", "")
+        section = f"\n\n### {self.count}. 群友信息\n\n{user_text}\n"
+        self._body.write(section)
+        self._body_hash.update(section.encode("utf-8"))
+        
+        # Members without an id are tracked by position
+        member_id = str(user.get("id", f"#{self.count}"))
+        member_hash = _content_hash(user_text)
+        self.members[member_id] = member_hash
+        if self._collect_changes:
+            old_hash = self._previous.get(member_id)
+            if old_hash is None:
+                self.joined.append({"id": member_id, "user_text": user_text})
+            elif old_hash != member_hash:
+                self.changed.append({"id": member_id, "user_text": user_text})
+
+    def left(self) -> List[str]:
+        """上次快照中存在、本次已不在群内的群友 ID"""
+        return [member_id for member_id in self._previous if member_id not in self.members]
+
+    def _header(self, group: Dict[str, Any]) -> str:
+        return "\n".join([
+            f"# {group.get('title', '群组信息')}\n",
+            f"**群组ID**: {group.get('id', 'N/A')}\n",
+            f"\n## 群组介绍\n",
+            f"{group.get('intro', 'N/A')}\n",
+            f"\n## 群组描述\n",
+            f"{group.get('description', 'N/A')}\n",
+            f"\n## 群友列表\n",
+        ])
+
+    def digest(self, group: Dict[str, Any]) -> str:
+        """整个 Markdown 文件内容的摘要，用于判断是否需要重写文件"""
+        h = hashlib.sha256(self._header(group).encode("utf-8"))
+        h.update(self._body_hash.digest())
+        return h.hexdigest()
+
+    def finish(self, group: Dict[str, Any]) -> None:
+        tmp_name = f"{self.filename}.tmp"
+        with open(tmp_name, "w", encoding="utf-8") as f:
+            f.write(self._header(group))
+            if self.count:
+                self._body.seek(0)
+                shutil.copyfileobj(self._body, f)
+            else:
+                f.write("\n\n暂无群友数据\n")
+        os.replace(tmp_name, self.filename)
+
+    def close(self) -> None:
+        self._body.close()
+
+
+async def stream_group_markdown(chunks: AsyncIterator[bytes], writer: GroupMarkdownWriter,
+                                on_progress: Optional[ProgressCallback] = None,
+                                progress_every: int = 100) -> Dict[str, Any]:
+    """增量解析群组响应，群友逐个交给 writer，返回群组基本信息"""
+    group: Dict[str, Any] = {}
+    builder = None
+    async for prefix, event, value in ijson.parse_async(_AsyncChunkReader(chunks)):
+        if builder is not None:
+            if prefix == USER_PREFIX and event == "end_map":
+                writer.add_user(builder.value)
+                builder = None
+                if on_progress is not None and writer.count % progress_every == 0:
+                    await on_progress(writer.count)
+            else:
+                builder.event(event, value)
+        elif prefix == USER_PREFIX and event == "start_map":
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+        elif event in ("string", "number", "boolean", "null") and prefix.startswith(GROUP_PREFIX + "."):
+            field = prefix[len(GROUP_PREFIX) + 1:]
+            if field in HEADER_FIELDS:
+                group[field] = value
+    if on_progress is not None and writer.count % progress_every:
+        await on_progress(writer.count)
+    return group
+
+
+def collect_group_users(group_data: Dict[str, Any], writer: GroupMarkdownWriter) -> Dict[str, Any]:
+    """将已解析的群组数据交给 writer（未安装 ijson 时使用），返回群组基本信息"""
+    for user in group_data.get("users") or []:
+        writer.add_user(user)
+    return {field: group_data[field] for field in HEADER_FIELDS if field in group_data}
+
+
+# === 群组快照 ===
+def _snapshot_path(group_id: str) -> str:
+    return os.path.join(CACHE_DIR, "groups", f"group_{group_id}.json")
+
+
+def load_group_snapshot(group_id: str) -> Dict[str, Any]:
+    """读取群组快照，不存在或损坏时返回空字典"""
+    try:
+        with open(_snapshot_path(group_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_group_snapshot(group_id: str, snapshot: Dict[str, Any]) -> None:
+    path = _snapshot_path(group_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_name = f"{path}.tmp"
+    with open(tmp_name, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False, default=str)
+    os.replace(tmp_name, path)
@@ -0,0 +1,213 @@
+# http_client.py
+"""
+Shared async HTTP client for the aihehuo-mcp server.
+All backend calls go through one pooled httpx.AsyncClient so that
+TCP/TLS connections to AIHEHUO_API_BASE are reused across tool calls.
+httpx is imported when the client is first created, keeping it off the
+server's startup path.
+"""
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Optional, Tuple
+
+from .cache import cache_key
+from .config import (
+    AIHEHUO_API_KEY,
+    COALESCE_REQUESTS,
+    HTTP2_ENABLED,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_CONNECTIONS_PER_HOST,
+    HTTP_MAX_KEEPALIVE,
+)
+from .metrics import METRICS, endpoint_key, record_decode, record_request, record_retry
+from .ratelimit import throttle
+from .resilience import BREAKER_STATUSES, IDEMPOTENT_METHODS, RETRYABLE_STATUSES, breaker_for, retry_delay
+
+if TYPE_CHECKING:
+    import httpx
+
+_client: Optional["httpx.AsyncClient"] = None
+_host_slots: Dict[str, asyncio.Semaphore] = {}
+# Coalesced GETs in flight: request key -> shared task
+_in_flight: Dict[str, "asyncio.Future[httpx.Response]"] = {}
+_COALESCE_KWARGS = frozenset({"params", "headers", "json", "timeout"})
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_client() -> "httpx.AsyncClient":
+    """返回共享的 AsyncClient（首次调用时创建）"""
+    global _client
+    if _client is None or _client.is_closed:
+        import httpx
+        _client = httpx.AsyncClient(
+            http2=HTTP2_ENABLED and _http2_available(),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=15,
+            follow_redirects=True,
+        )
+    return _client
+
+
+def _host_slot(url: str) -> asyncio.Semaphore:
+    # httpx only caps the pool as a whole, so per-host limits are enforced here
+    import httpx
+    host = httpx.URL(url).host
+    slot = _host_slots.get(host)
+    if slot is None:
+        slot = _host_slots[host] = asyncio.Semaphore(HTTP_MAX_CONNECTIONS_PER_HOST)
+    return slot
+
+
+def api_headers(json_body: bool = True) -> Dict[str, str]:
+    """后端请求的通用请求头（multipart 上传时不设置 Content-Type，由 httpx 生成 boundary）"""
+    headers = {
+        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
+        "Accept": "application/json",
+        "User-Agent": "LLM_AGENT"
+    }
+    if json_body:
+        headers["Content-Type"] = "application/json"
+    return headers
+
+
+async def api_request(method: str, url: str, idempotent: Optional[bool] = None, **kwargs: Any) -> "httpx.Response":
+    """通过共享连接池发送请求，参数与 httpx.AsyncClient.request 相同
+
+    幂等请求（默认按方法判断，只读的 POST 查询可传 idempotent=True）在连接错误、超时和
+    429/502/503/504 时按 resilience.py 的策略重试；端点熔断时抛出 BackendUnavailable。
+    并发的相同 GET 请求共用一个进行中的请求（返回同一个响应对象，调用方不要修改其内容）。
+    """
+    key = _flight_key(method, url, kwargs)
+    if key is None:
+        return await _request_with_retries(method, url, idempotent, kwargs)
+    flight = _in_flight.get(key)
+    if flight is None:
+        flight = _in_flight[key] = asyncio.ensure_future(_request_with_retries(method, url, idempotent, kwargs))
+        flight.add_done_callback(lambda done: _finish_flight(key, done))
+    else:
+        import httpx
+        METRICS.endpoint(endpoint_key(method, httpx.URL(url).path)).coalesced += 1
+    # Shielded: one caller being cancelled must not cancel the request the others wait for
+    return await asyncio.shield(flight)
+
+
+async def _request_with_retries(method: str, url: str, idempotent: Optional[bool],
+                                kwargs: Dict[str, Any]) -> "httpx.Response":
+    attempt = 0
+    while True:
+        resp, retry_after = await _attempt(method, url, idempotent, attempt, kwargs, stream=False)
+        if retry_after is None:
+            return resp
+        attempt += 1
+        await asyncio.sleep(retry_after)
+
+
+def _flight_key(method: str, url: str, kwargs: Dict[str, Any]) -> Optional[str]:
+    """可合并请求的键（GET 且只带查询参数、请求头、JSON 请求体和超时），不可合并时返回 None"""
+    if not COALESCE_REQUESTS or method.upper() != "GET" or not _COALESCE_KWARGS.issuperset(kwargs):
+        return None
+    headers = sorted((kwargs.get("headers") or {}).items())
+    body = json.dumps(kwargs.get("json"), sort_keys=True, ensure_ascii=False, default=str)
+    return f"{cache_key(url, kwargs.get('params'))}\n{headers}\n{body}"
+
+
+def _finish_flight(key: str, done: "asyncio.Future[Any]") -> None:
+    if _in_flight.get(key) is done:
+        del _in_flight[key]
+    if not done.cancelled():
+        done.exception()  # retrieved here so an error nobody awaited is not reported as unhandled
+
+
+@asynccontextmanager
+async def api_stream(method: str, url: str, idempotent: Optional[bool] = None,
+                     **kwargs: Any) -> AsyncIterator["httpx.Response"]:
+    """以流式方式发送请求，响应体通过 resp.aiter_bytes() 逐块读取（重试只发生在收到响应头之前）"""
+    attempt = 0
+    while True:
+        resp, retry_after = await _attempt(method, url, idempotent, attempt, kwargs, stream=True)
+        if retry_after is None:
+            break
+        attempt += 1
+        await asyncio.sleep(retry_after)
+    try:
+        yield resp
+    finally:
+        await resp.aclose()
+
+
+async def _attempt(method: str, url: str, idempotent: Optional[bool], attempt: int, kwargs: Dict[str, Any],
+                   stream: bool) -> Tuple[Optional["httpx.Response"], Optional[float]]:
+    """发送一次请求，返回 (响应, 重试前的等待秒数)；不再重试时等待秒数为 None，无法重试的异常直接抛出"""
+    import httpx
+    path = httpx.URL(url).path
+    breaker = breaker_for(method, path)
+    retryable = method.upper() in IDEMPOTENT_METHODS if idempotent is None else idempotent
+    breaker.before_request()
+    try:
+        await throttle(path)
+        started = time.perf_counter()
+        async with _host_slot(url):
+            client = get_client()
+            request = client.build_request(method, url, **kwargs)
+            resp = await client.send(request, stream=stream)
+    except httpx.TransportError as e:
+        timed_out = isinstance(e, httpx.TimeoutException)
+        record_request(method, path, time.perf_counter() - started, timed_out=timed_out)
+        breaker.record_failure()
+        # A failed connect never sent the request, so even non-idempotent calls can go again
+        if retryable or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)):
+            delay = retry_delay(attempt + 1)
+            if delay is not None:
+                record_retry(method, path)
+                return None, delay
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+
+    # Streams are timed until the headers; the body is read by the caller
+    record_request(method, path, time.perf_counter() - started, resp.status_code,
+                   None if stream else len(resp.content))
+    if resp.status_code in BREAKER_STATUSES:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    if retryable and resp.status_code in RETRYABLE_STATUSES:
+        delay = retry_delay(attempt + 1, resp.headers.get("Retry-After"))
+        if delay is not None:
+            record_retry(method, path)
+            if stream:
+                await resp.aclose()
+            return None, delay
+    return resp, None
+
+
+def decode_json(resp: "httpx.Response") -> Any:
+    """解析 JSON 响应体，耗时计入当前工具调用的 decode 阶段"""
+    started = time.perf_counter()
+    try:
+        return resp.json()
+    finally:
+        record_decode(time.perf_counter() - started)
+
+
+async def close_client() -> None:
+    """关闭共享连接池（进程退出前调用）"""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
@@ -0,0 +1,378 @@
+# metrics.py
+"""
+In-process instrumentation for the aihehuo-mcp server.
+Every tool call records its wall time split into phases (validate, network,
+decode, serialize, total), the size of its result, backend status codes,
+timeouts and retries; every backend request is also recorded per endpoint.
+Values go into log-linear (HDR-style) histograms: a fixed number of
+sub-buckets per power of two bounds the relative error of every percentile
+while the bucket count stays small from microseconds to minutes.
+"""
+import os
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+PHASES = ("validate", "network", "decode", "serialize", "total")
+
+# Upper bounds (seconds / bytes) of the cumulative buckets in the Prometheus dump
+PROMETHEUS_SECONDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+PROMETHEUS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+# === 直方图 ===
+class Histogram:
+    """对数-线性分桶直方图：每个 2 的幂区间均分为 SUB_BUCKETS 个桶，分位数相对误差不超过 1/SUB_BUCKETS
+
+    记录非负整数（耗时用微秒，大小用字节），小于 SUB_BUCKETS 的值精确记录。
+    """
+
+    SUB_BUCKETS = 16
+    _SUB_BITS = 4  # log2(SUB_BUCKETS)
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0
+        self.min: Optional[int] = None
+        self.max = 0
+
+    @classmethod
+    def bucket_index(cls, value: int) -> int:
+        if value < cls.SUB_BUCKETS:
+            return value
+        # Keep the top SUB_BITS + 1 bits: mantissa in [SUB_BUCKETS, 2 * SUB_BUCKETS)
+        shift = value.bit_length() - cls._SUB_BITS - 1
+        return (shift << cls._SUB_BITS) + (value >> shift)
+
+    @classmethod
+    def bucket_bounds(cls, index: int) -> Tuple[int, int]:
+        """桶的取值范围 [low, high]"""
+        if index < 2 * cls.SUB_BUCKETS:
+            return index, index
+        shift = (index >> cls._SUB_BITS) - 1
+        mantissa = index - (shift << cls._SUB_BITS)
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+    def record(self, value: float) -> None:
+        value = max(0, int(value))
+        index = self.bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+    def percentile(self, q: float) -> int:
+        """第 q 分位（0 < q <= 1）的估计值：所在桶的中点，不超出实际最大/最小值"""
+        if not self.count:
+            return 0
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                low, high = self.bucket_bounds(index)
+                return min(max((low + high) // 2, self.min), self.max)
+        return self.max
+
+    def summary(self, scale: float = 1.0, digits: int = 3) -> Dict[str, Any]:
+        """count / mean / 分位数 / max，数值乘以 scale（如微秒 -> 毫秒为 0.001）"""
+        def scaled(value: float) -> float:
+            return round(value * scale, digits)
+        return {
+            "count": self.count,
+            "mean": scaled(self.sum / self.count) if self.count else 0,
+            "p50": scaled(self.percentile(0.5)),
+            "p90": scaled(self.percentile(0.9)),
+            "p99": scaled(self.percentile(0.99)),
+            "p999": scaled(self.percentile(0.999)),
+            "max": scaled(self.max),
+        }
+
+    def cumulative(self, bounds: Iterator[int]) -> List[int]:
+        """每个上界以内的累计计数（按桶上界归类，桶跨越边界时计入更大的一侧）"""
+        items = sorted(self.counts.items())
+        result = []
+        for bound in bounds:
+            result.append(sum(n for index, n in items if self.bucket_bounds(index)[1] <= bound))
+        return result
+
+
+# === 统计对象 ===
+class ToolStats:
+    """单个工具的累计指标"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.status_codes: Dict[int, int] = {}
+        self.phases = {phase: Histogram() for phase in PHASES}  # microseconds
+        self.result_bytes = Histogram()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "retries": self.retries,
+            "status_codes": {str(code): n for code, n in sorted(self.status_codes.items())},
+            "latency_ms": {phase: hist.summary(0.001) for phase, hist in self.phases.items()},
+            "result_bytes": self.result_bytes.summary(digits=0),
+        }
+
+
+class EndpointStats:
+    """单个后端端点（方法 + 路径模板）的累计指标"""
+
+    def __init__(self):
+        self.requests = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.status_codes: Dict[int, int] = {}
+        self.latency = Histogram()  # microseconds, until the response headers (or body for buffered requests)
+        self.response_bytes = Histogram()
+        # Circuit breaker (updated by resilience.CircuitBreaker)
+        self.circuit_state = "closed"
+        self.circuit_opened = 0
+        self.circuit_rejections = 0
+        # Callers that shared another caller's in-flight request
+        self.coalesced = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "timeouts": self.timeouts,
+            "retries": self.retries,
+            "status_codes": {str(code): n for code, n in sorted(self.status_codes.items())},
+            "latency_ms": self.latency.summary(0.001),
+            "response_bytes": self.response_bytes.summary(digits=0),
+            "coalesced": self.coalesced,
+            "circuit": {
+                "state": self.circuit_state,
+                "opened": self.circuit_opened,
+                "rejected": self.circuit_rejections,
+            },
+        }
+
+
+class CallRecord:
+    """一次工具调用进行中的计时，结束时计入对应 ToolStats
+
+    network / decode 为本次调用内所有后端请求的耗时之和（并发请求时可能大于 total）。
+    """
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.started = time.perf_counter()
+        self.phases = {phase: 0.0 for phase in PHASES}
+        self.status_codes: Dict[int, int] = {}
+        self.error = False
+        self.timeouts = 0
+        self.retries = 0
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - started
+
+
+def endpoint_key(method: str, path: str) -> str:
+    """端点分组键：路径中含数字的段（ID、创业号等）替换为 {id}"""
+    segments = ["{id}" if re.search(r"\d", segment) else segment for segment in path.split("/")]
+    return f"{method.upper()} {'/'.join(segments)}"
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """全部工具和端点的指标（进程内，单个事件循环中更新）"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.tools: Dict[str, ToolStats] = {}
+        self.endpoints: Dict[str, EndpointStats] = {}
+        # Rate limiter waits per endpoint family (see ratelimit.py)
+        self.families: Dict[str, Dict[str, float]] = {}
+
+    def tool(self, name: str) -> ToolStats:
+        stats = self.tools.get(name)
+        if stats is None:
+            stats = self.tools[name] = ToolStats()
+        return stats
+
+    def endpoint(self, key: str) -> EndpointStats:
+        stats = self.endpoints.get(key)
+        if stats is None:
+            stats = self.endpoints[key] = EndpointStats()
+        return stats
+
+    def family(self, name: str) -> Dict[str, float]:
+        stats = self.families.get(name)
+        if stats is None:
+            stats = self.families[name] = {"throttled": 0, "throttled_seconds": 0.0}
+        return stats
+
+    def finish_call(self, record: CallRecord, result_bytes: int) -> None:
+        record.phases["total"] = time.perf_counter() - record.started
+        stats = self.tool(record.tool)
+        stats.calls += 1
+        stats.errors += record.error
+        stats.timeouts += record.timeouts
+        stats.retries += record.retries
+        for code, n in record.status_codes.items():
+            stats.status_codes[code] = stats.status_codes.get(code, 0) + n
+        for phase, seconds in record.phases.items():
+            stats.phases[phase].record(seconds * 1e6)
+        stats.result_bytes.record(result_bytes)
+
+    def snapshot(self, tool: Optional[str] = None) -> Dict[str, Any]:
+        """server_metrics 的返回内容，tool 不为空时只返回该工具"""
+        tools = {name: stats.snapshot() for name, stats in sorted(self.tools.items()) if tool in (None, name)}
+        result: Dict[str, Any] = {
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "tools": tools,
+        }
+        if tool is None:
+            result["endpoints"] = {key: stats.snapshot() for key, stats in sorted(self.endpoints.items())}
+            result["rate_limits"] = {
+                family: {"throttled": stats["throttled"], "throttled_seconds": round(stats["throttled_seconds"], 3)}
+                for family, stats in sorted(self.families.items())
+            }
+        return result
+
+    def prometheus(self) -> str:
+        """Prometheus 文本格式（0.0.4）"""
+        lines: List[str] = []
+
+        def histogram(name: str, help_text: str, series: List[Tuple[str, Histogram]], bounds: Tuple[float, ...],
+                      scale: float) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, hist in series:
+                counts = hist.cumulative(int(bound / scale) for bound in bounds)
+                for bound, n in zip(bounds, counts):
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {n}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+                lines.append(f"{name}_sum{{{labels}}} {hist.sum * scale}")
+                lines.append(f"{name}_count{{{labels}}} {hist.count}")
+
+        def counter(name: str, help_text: str, series: List[Tuple[str, int]]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in series:
+                lines.append(f"{name}{{{labels}}} {value}")
+
+        tools = sorted(self.tools.items())
+        endpoints = sorted(self.endpoints.items())
+        counter("aihehuo_tool_calls_total", "Tool calls.",
+                [(f'tool="{_label(name)}"', s.calls) for name, s in tools])
+        counter("aihehuo_tool_errors_total", "Tool calls that raised an error.",
+                [(f'tool="{_label(name)}"', s.errors) for name, s in tools])
+        counter("aihehuo_tool_timeouts_total", "Backend timeouts during tool calls.",
+                [(f'tool="{_label(name)}"', s.timeouts) for name, s in tools])
+        counter("aihehuo_tool_retries_total", "Backend retries during tool calls.",
+                [(f'tool="{_label(name)}"', s.retries) for name, s in tools])
+        histogram("aihehuo_tool_phase_seconds", "Tool call wall time by phase.",
+                  [(f'tool="{_label(name)}",phase="{phase}"', s.phases[phase]) for name, s in tools for phase in PHASES],
+                  PROMETHEUS_SECONDS, 1e-6)
+        histogram("aihehuo_tool_result_bytes", "Size of the tool result text.",
+                  [(f'tool="{_label(name)}"', s.result_bytes) for name, s in tools], PROMETHEUS_BYTES, 1)
+        counter("aihehuo_http_responses_total", "Backend responses by status code.",
+                [(f'endpoint="{_label(key)}",code="{code}"', n)
+                 for key, s in endpoints for code, n in sorted(s.status_codes.items())])
+        counter("aihehuo_http_timeouts_total", "Backend request timeouts.",
+                [(f'endpoint="{_label(key)}"', s.timeouts) for key, s in endpoints])
+        counter("aihehuo_http_retries_total", "Backend request retries.",
+                [(f'endpoint="{_label(key)}"', s.retries) for key, s in endpoints])
+        lines.append("# HELP aihehuo_http_circuit_state Circuit breaker state (0 closed, 1 half-open, 2 open).")
+        lines.append("# TYPE aihehuo_http_circuit_state gauge")
+        for key, s in endpoints:
+            lines.append(f'aihehuo_http_circuit_state{{endpoint="{_label(key)}"}} {CIRCUIT_STATES[s.circuit_state]}')
+        counter("aihehuo_http_circuit_opened_total", "Times the circuit breaker opened.",
+                [(f'endpoint="{_label(key)}"', s.circuit_opened) for key, s in endpoints])
+        counter("aihehuo_http_circuit_rejections_total", "Requests failed fast by an open circuit breaker.",
+                [(f'endpoint="{_label(key)}"', s.circuit_rejections) for key, s in endpoints])
+        counter("aihehuo_http_coalesced_total", "Requests served by an identical in-flight request.",
+                [(f'endpoint="{_label(key)}"', s.coalesced) for key, s in endpoints])
+        families = sorted(self.families.items())
+        counter("aihehuo_rate_limit_waits_total", "Requests delayed by the client-side rate limiter.",
+                [(f'family="{family}"', int(s["throttled"])) for family, s in families])
+        counter("aihehuo_rate_limit_wait_seconds_total", "Time spent waiting for the client-side rate limiter.",
+                [(f'family="{family}"', s["throttled_seconds"]) for family, s in families])
+        histogram("aihehuo_http_request_seconds", "Backend request latency.",
+                  [(f'endpoint="{_label(key)}"', s.latency) for key, s in endpoints], PROMETHEUS_SECONDS, 1e-6)
+        histogram("aihehuo_http_response_bytes", "Backend response body size.",
+                  [(f'endpoint="{_label(key)}"', s.response_bytes) for key, s in endpoints], PROMETHEUS_BYTES, 1)
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """原子写入 Prometheus 文本文件（供 node_exporter textfile collector 等读取）"""
+        tmp_name = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_name, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(tmp_name, path)
+
+
+METRICS = Metrics()
+
+# The tool call the current task works for; child tasks inherit it
+_current_call: ContextVar[Optional[CallRecord]] = ContextVar("aihehuo_current_call", default=None)
+
+
+def start_call(tool: str) -> Tuple[CallRecord, Any]:
+    """开始记录一次工具调用，返回 (record, token)，结束时调用 finish_call"""
+    record = CallRecord(tool)
+    return record, _current_call.set(record)
+
+
+def finish_call(record: CallRecord, token: Any, result_bytes: int) -> None:
+    _current_call.reset(token)
+    METRICS.finish_call(record, result_bytes)
+
+
+def current_call() -> Optional[CallRecord]:
+    return _current_call.get()
+
+
+def record_request(method: str, path: str, seconds: float, status: Optional[int] = None,
+                   size: Optional[int] = None, timed_out: bool = False) -> None:
+    """记录一次后端请求（status 为 None 表示未收到响应）"""
+    stats = METRICS.endpoint(endpoint_key(method, path))
+    stats.requests += 1
+    stats.latency.record(seconds * 1e6)
+    if size is not None:
+        stats.response_bytes.record(size)
+    if status is not None:
+        stats.status_codes[status] = stats.status_codes.get(status, 0) + 1
+    if timed_out:
+        stats.timeouts += 1
+    record = _current_call.get()
+    if record is not None:
+        record.phases["network"] += seconds
+        if status is not None:
+            record.status_codes[status] = record.status_codes.get(status, 0) + 1
+        record.timeouts += timed_out
+
+
+def record_retry(method: str, path: str) -> None:
+    METRICS.endpoint(endpoint_key(method, path)).retries += 1
+    record = _current_call.get()
+    if record is not None:
+        record.retries += 1
+
+
+def record_decode(seconds: float) -> None:
+    record = _current_call.get()
+    if record is not None:
+        record.phases["decode"] += seconds
@@ -0,0 +1,259 @@
+# models.py
+"""
+Parameter models for the aihehuo-mcp tools. Each model is also the source
+of the tool's inputSchema (see registry.schema_from_model), so the field
+descriptions here are what MCP clients see.
+"""
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from .config import BATCH_MAX_ITEMS, MULTI_SEARCH_MAX_QUERIES, SEARCH_MAX_RESULTS, SEARCH_MAX_WINDOW
+
+
+def _paginate_schema(schema: Dict[str, Any]) -> None:
+    # Advertise page/per explicitly instead of a free-form Dict[str, int]
+    schema.clear()
+    schema.update({
+        "type": "object",
+        "properties": {
+            "page": {"type": "integer", "default": 1},
+            "per": {"type": "integer", "default": 10}
+        },
+        "default": {"page": 1, "per": 10}
+    })
+
+
+def paginate_field() -> Any:
+    return Field(default_factory=lambda: {"page": 1, "per": 10}, description="分页参数",
+                 json_schema_extra=_paginate_schema)
+
+
+# 字段裁剪参数（见 projection.py），用于返回用户/项目记录的工具
+def preset_field() -> Any:
+    return Field(default=None, description="字段预设：brief（核心字段）、card（卡片展示字段）、full（完整数据，默认）")
+
+def fields_field() -> Any:
+    return Field(default=None, description="只返回这些字段（可选，优先于preset）。路径从每条用户/项目记录内部算起，"
+                                           "如 name、user.name（项目的创建者姓名），不要加 data. 或 hits. 前缀")
+
+def exclude_fields_field() -> Any:
+    return Field(default=None, description="不返回这些字段（可选，路径写法同 fields，从每条记录内部算起）")
+
+Preset = Literal["brief", "card", "full"]
+
+# 搜索工具的自动翻页参数
+def max_results_field() -> Any:
+    return Field(default=None, ge=1, le=SEARCH_MAX_RESULTS,
+                 description=f"自动翻页获取最多这么多条结果（可选，最大{SEARCH_MAX_RESULTS}），设置后忽略paginate，结果按id去重")
+
+def min_score_field() -> Any:
+    return Field(default=None, description="与max_results一起使用：遇到相似度score低于该值的结果时停止（可选）")
+
+
+# === 定义请求/响应模型 ===
+class ServerInfoParams(BaseModel):
+    pass
+
+class ServerMetricsParams(BaseModel):
+    tool: Optional[str] = Field(default=None, description="只返回该工具的指标（可选，默认返回全部工具和后端端点）")
+
+class SearchMembersParams(BaseModel):
+    query: str = Field(..., description="语义搜索查询（长度必须大于5个字符，建议使用完整句子描述需求）",
+                       json_schema_extra={"minLength": 6})
+    paginate: Dict[str, int] = paginate_field()
+    wechat_reachable_only: bool = Field(default=False, description="是否只返回微信上能直接触达的用户（默认false）")
+    investor: Optional[bool] = Field(default=None, description="只搜索投资人（可选，默认false）")
+    excluded_ids: Optional[List[str]] = Field(default=None, description="要排除的用户ID数组（可选）")
+    max_results: Optional[int] = max_results_field()
+    min_score: Optional[float] = min_score_field()
+    preset: Optional[Preset] = preset_field()
+    fields: Optional[List[str]] = fields_field()
+    exclude_fields: Optional[List[str]] = exclude_fields_field()
+
+class MultiSearchMembersParams(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=MULTI_SEARCH_MAX_QUERIES,
+                               description=f"多个语义搜索查询（每个长度必须大于5个字符，最多{MULTI_SEARCH_MAX_QUERIES}个），例如分别描述技术合伙人、增长负责人、投资人")
+    per_query: int = Field(default=20, ge=1, le=SEARCH_MAX_WINDOW, description=f"每个查询取前多少条结果参与融合（默认20，最大{SEARCH_MAX_WINDOW}）")
+    max_results: int = Field(default=20, ge=1, le=SEARCH_MAX_RESULTS, description="融合后返回的结果数（默认20）")
+    fusion: Literal["rrf", "score"] = Field(default="rrf", description="融合方式：rrf（倒数排名融合，默认）或 score（各查询分数归一化后求和）")
+    wechat_reachable_only: bool = Field(default=False, description="是否只返回微信上能直接触达的用户（默认false）")
+    investor: Optional[bool] = Field(default=None, description="只搜索投资人（可选，默认false）")
+    excluded_ids: Optional[List[str]] = Field(default=None, description="要从所有查询结果中排除的用户ID数组（可选）")
+    preset: Optional[Preset] = preset_field()
+    fields: Optional[List[str]] = fields_field()
+    exclude_fields: Optional[List[str]] = exclude_fields_field()
+
+class SearchIdeasParams(BaseModel):
+    query: str = Field(..., description="语义搜索查询（建议使用完整句子描述需求）")
+    paginate: Dict[str, int] = paginate_field()
+    max_results: Optional[int] = max_results_field()
+    min_score: Optional[float] = min_score_field()
+    preset: Optional[Preset] = preset_field()
+    fields: Optional[List[str]] = fields_field()
+    exclude_fields: Optional[List[str]] = exclude_fields_field()
+
+class GetGroupInfoParams(BaseModel):
+    group_id: str = Field(..., description="群组ID")
+    diff: bool = Field(default=False, description="是否只关注变化：返回与上次获取相比新加入、离开和资料变化的群友（默认false）")
+
+class UpdateBioParams(BaseModel):
+    bio: str = Field(..., description="用户简介")
+
+class UpdateGoalParams(BaseModel):
+    goal: str = Field(..., description="用户目标")
+
+class GetCurrentUserParams(BaseModel):
+    pass  # No parameters needed, uses CURRENT_USER_ID from environment
+
+class GetCurrentUserIdeasParams(BaseModel):
+    paginate: Dict[str, int] = paginate_field()
+
+class GetIdeaDetailsParams(BaseModel):
+    idea_id: str = Field(..., description="想法/项目ID")
+
+class GetIdeasDetailsBatchParams(BaseModel):
+    idea_ids: List[str] = Field(..., description=f"想法/项目ID数组（最多{BATCH_MAX_ITEMS}个）",
+                                json_schema_extra={"maxItems": BATCH_MAX_ITEMS})
+
+class FetchNewUsersParams(BaseModel):
+    max_pages: int = Field(default=3, ge=1, le=20, description="最多获取的页数（默认3，最大20）")
+    per: int = Field(default=50, ge=1, le=100, description="每页用户数（默认50，最大100）")
+    since: Optional[str] = Field(default=None, description="只获取该时间之后注册的用户（ISO 8601，可选）")
+    preset: Optional[Preset] = preset_field()
+    fields: Optional[List[str]] = fields_field()
+    exclude_fields: Optional[List[str]] = exclude_fields_field()
+
+class GetUserDetailsParams(BaseModel):
+    user_id: str = Field(..., description="用户ID")
+    preset: Optional[Preset] = preset_field()
+    fields: Optional[List[str]] = fields_field()
+    exclude_fields: Optional[List[str]] = exclude_fields_field()
+
+class GetUsersDetailsBatchParams(BaseModel):
+    user_ids: List[str] = Field(..., description=f"用户ID数组（最多{BATCH_MAX_ITEMS}个）",
+                                json_schema_extra={"maxItems": BATCH_MAX_ITEMS})
+
+class GetWechatDataParams(BaseModel):
+    user_id: str = Field(..., description="用户ID")
+
+class UploadFileParams(BaseModel):
+    file_path: str = Field(..., description="要上传的文件的本地绝对路径")
+
+class SubmitWechatArticleDraftParams(BaseModel):
+    title: str = Field(..., description="文章标题")
+    digest: str = Field(..., description="文章摘要")
+    body: Optional[str] = Field(None, description="文章正文HTML内容（仅包含body标签内的内容，不包含<body>标签本身，不能包含超链接<a>标签）。与body_file二选一")
+    body_file: Optional[str] = Field(None, description="HTML文件的绝对路径。当HTML内容太大时使用此参数。与body二选一")
+
+class ArticleStat(BaseModel):
+    label: str = Field(..., description="数据维度，如：行业分布")
+    text: str = Field(..., description="数据描述内容")
+
+class FounderCard(BaseModel):
+    name: str = Field(..., description="用户姓名")
+    number: str = Field(..., description="创业号（8位数字）")
+    emoji: str = Field(default="", description="项目方向对应的emoji")
+    project: str = Field(..., description="项目名称/方向描述")
+    background: str = Field(..., description="个人背景：工作经历、教育背景、行业经验等")
+    highlights: str = Field(..., description="项目亮点：核心优势、商业模式、市场机会等")
+    seeking: str = Field(..., description="寻找：需要什么类型的合伙人或资源")
+    insight: str = Field(..., description="推荐理由：适合什么样的合伙人、市场分析、合作建议等")
+
+class PartnerCard(BaseModel):
+    name: str = Field(..., description="用户姓名")
+    number: str = Field(..., description="创业号（8位数字）")
+    emoji: str = Field(default="", description="合伙人定位对应的emoji")
+    positioning: str = Field(..., description="合伙人定位描述")
+    background: str = Field(..., description="个人背景：教育背景、工作经历、创业经历等")
+    strengths: str = Field(..., description="核心能力：核心技能、资源、经验等")
+    seeking: str = Field(..., description="寻找：想找什么类型的项目或创始人")
+    fit_projects: str = Field(..., description="适合加入哪些类型的项目")
+    insight: str = Field(..., description="推荐理由：这位合伙人的特殊价值、适合的创始人类型等")
+
+class ArticleObservation(BaseModel):
+    title: str = Field(..., description="观察点标题")
+    text: str = Field(..., description="观察内容描述")
+
+class RenderWechatArticleParams(BaseModel):
+    title: str = Field(..., description="文章主标题")
+    subtitle: Optional[str] = Field(default=None, description="副标题，如：10月10日新增创业者精选")
+    overview_title: str = Field(default="新增创业者画像", description="数据概览章节标题，如：10月10日新增创业者画像")
+    intro: Optional[str] = Field(default=None, description="开场介绍段落")
+    stats_title: Optional[str] = Field(default=None, description="数据概览小标题")
+    stats: List[ArticleStat] = Field(default_factory=list, description="数据概览条目", json_schema_extra={"default": []})
+    founders_title: str = Field(default="带项目的典型创始人", description="创始人章节标题")
+    founders: List[FounderCard] = Field(default_factory=list, description="带项目的创始人卡片", json_schema_extra={"default": []})
+    partners_title: str = Field(default="寻找项目的优质合伙人", description="合伙人章节标题")
+    partners: List[PartnerCard] = Field(default_factory=list, description="找项目的合伙人卡片", json_schema_extra={"default": []})
+    observations_title: str = Field(default="数据观察", description="观察章节标题")
+    observations: List[ArticleObservation] = Field(default_factory=list, description="数据观察条目",
+                                                   json_schema_extra={"default": []})
+    tip_title: Optional[str] = Field(default=None, description="温馨提示标题")
+    tip: Optional[str] = Field(default=None, description="温馨提示内容")
+    output_path: Optional[str] = Field(default=None, description="HTML文件的保存路径（绝对路径，可选，默认写入/tmp）")
+    include_html: bool = Field(default=False, description="是否在结果中同时返回HTML内容（默认false，只返回文件路径）")
+
+class CreateAIReportParams(BaseModel):
+    title: str = Field(..., description="报告标题")
+    abstract: str = Field(..., description="报告摘要/简介")
+    html_file_path: str = Field(..., description="HTML文件的绝对路径")
+    mentioned_user_ids: List[str] = Field(default_factory=list, description="报告中提及的用户ID列表（ID字符串，不是number）",
+                                          json_schema_extra={"default": []})
+    mentioned_idea_ids: List[str] = Field(default_factory=list, description="报告中提及的项目/想法ID列表",
+                                          json_schema_extra={"default": []})
+
+class UpdateAIReportParams(BaseModel):
+    report_id: str = Field(..., description="报告ID")
+    title: str = Field(..., description="报告标题")
+    abstract: str = Field(..., description="报告摘要/简介")
+    html_file_path: str = Field(..., description="HTML文件的绝对路径")
+
+class GetAIReportParams(BaseModel):
+    report_id: str = Field(..., description="报告ID")
+
+class NotifyMentionedUsersParams(BaseModel):
+    report_id: str = Field(..., description="报告ID")
+    intro_text: str = Field(..., description="发送给提及用户的介绍文本")
+    force: bool = Field(default=False, description="是否强制重新通知（默认false）")
+    user_id: Optional[int] = Field(default=None, description="可选，指定只通知某个提及的用户ID（不提供则通知所有提及的用户）")
+
+class SubmitConfirmedUsersParams(BaseModel):
+    report_id: str = Field(..., description="报告ID")
+    user_ids: List[str] = Field(..., description="已确认阅读报告的用户ID数组")
+
+class AddMentionedUsersParams(BaseModel):
+    report_id: str = Field(..., description="报告ID")
+    user_ids: List[str] = Field(..., description="要添加到mentioned_user_ids列表的用户ID数组")
+
+class RemoveMentionedUsersParams(BaseModel):
+    report_id: str = Field(..., description="报告ID")
+    user_ids: List[str] = Field(..., description="要从mentioned_user_ids列表中移除的用户ID数组")
+
+class SubmitRejectedUsersParams(BaseModel):
+    report_id: str = Field(..., description="报告ID")
+    user_ids: List[str] = Field(..., description="已拒绝阅读报告的用户ID数组")
+
+class ConvertNumbersToIdsParams(BaseModel):
+    numbers: List[int] = Field(..., description="用户编号数组")
+
+class ConvertIdsToNumbersParams(BaseModel):
+    ids: List[int] = Field(..., description="用户ID数组")
+
+class GetLatest24hIdeasParams(BaseModel):
+    paginate: Dict[str, int] = paginate_field()
+
+class GetBotImpressionsParams(BaseModel):
+    user_id: int = Field(..., description="用户ID")
+
+class GetBotImpressionsBatchParams(BaseModel):
+    user_ids: List[int] = Field(..., description=f"用户ID数组（最多{BATCH_MAX_ITEMS}个）",
+                                json_schema_extra={"maxItems": BATCH_MAX_ITEMS})
+
+class UpdateBotImpressionsParams(BaseModel):
+    user_id: int = Field(..., description="用户ID")
+    summary: Optional[str] = Field(None, description="用户摘要")
+    tags: Optional[List[str]] = Field(None, description="标签列表")
+
+class UploadBusinessPlanParams(BaseModel):
+    file_path: str = Field(..., description="商业计划书 PDF 文件路径（绝对路径）")
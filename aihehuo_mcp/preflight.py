@@ -0,0 +1,373 @@
+# preflight.py
+"""
+Local checks and minification for HTML sent to the article and report
+endpoints (submit_wechat_article_draft, create_ai_report, update_ai_report).
+
+A single streaming HTMLParser pass flags:
+- tags the target does not accept (links and scripts in WeChat articles)
+- unresolved 【...】 placeholders left over from WECHAT_ARTICLE_TEMPLATE
+- documents over the target's size limit
+
+With AIHEHUO_HTML_MINIFY the same pass rewrites the document:
+- comments are dropped
+- whitespace runs collapse (and disappear next to block tags)
+- inline style declarations are compacted
+
+<pre>, <textarea>, <script> and <style> content is kept verbatim. A draft
+that would be rejected fails here, before anything is uploaded.
+
+Files are decoded strictly as UTF-8 (anything else is reported, never
+rewritten), and their minified copy is written to a temporary file, so a
+large report is streamed to the upload rather than held in memory.
+"""
+import codecs
+import os
+import re
+import tempfile
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import Any, Dict, FrozenSet, List, Optional, TextIO, Tuple
+
+from .config import AI_REPORT_MAX_BYTES, HTML_MINIFY, WECHAT_ARTICLE_MAX_BYTES
+
+READ_BLOCK_SIZE = 64 * 1024
+# Documents built from the template repeat the same start tags (and inline styles) over and over
+TAG_CACHE_SIZE = 4096
+# Only the first problems are listed; counts cover all of them
+MAX_PROBLEMS = 20
+
+# target -> (forbidden tags, size limit in bytes)
+HTML_TARGETS: Dict[str, Tuple[FrozenSet[str], int]] = {
+    # WeChat drops links and scripts from article bodies (see the submit_wechat_article_draft description)
+    "wechat_article": (frozenset({"a", "script"}), WECHAT_ARTICLE_MAX_BYTES),
+    # Reports may link to users and ideas
+    "ai_report": (frozenset(), AI_REPORT_MAX_BYTES),
+}
+
+# Whitespace around these tags is not rendered, so it is dropped rather than collapsed to one space
+# (<br> is inline: the text on either side of it keeps its spaces)
+BLOCK_TAGS = frozenset({
+    "address", "article", "aside", "blockquote", "body", "dd", "details", "div", "dl", "dt",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "head", "header",
+    "hr", "html", "li", "link", "main", "meta", "nav", "ol", "p", "pre", "section", "summary", "table",
+    "tbody", "td", "tfoot", "th", "thead", "title", "tr", "ul",
+})
+VERBATIM_TAGS = frozenset({"pre", "textarea", "script", "style"})
+
+PROBLEM_LABELS = {
+    "forbidden_tag": "不允许的标签", "placeholder": "未替换的模板占位符", "too_large": "超出大小上限",
+    "encoding": "不是 UTF-8 编码",
+}
+
+PLACEHOLDER_RE = re.compile(r"【[^【】\n]{1,60}】")
+# HTML whitespace only: non-breaking and ideographic spaces are content
+WHITESPACE_RE = re.compile(r"[ \t\n\r\f]+")
+
+
+@lru_cache(maxsize=1)
+def template_placeholders() -> FrozenSet[str]:
+    from .templates import WECHAT_ARTICLE_TEMPLATE
+    return frozenset(PLACEHOLDER_RE.findall(WECHAT_ARTICLE_TEMPLATE))
+
+
+def is_placeholder(marker: str) -> bool:
+    """模板中的占位符，或带“如：”示例说明的同类标记（正文中正常使用的【】不算）"""
+    return marker in template_placeholders() or "如：" in marker or "如:" in marker
+
+
+def minify_style(value: str) -> str:
+    """压缩内联样式：去掉声明间和冒号两侧的空白；含引号或 url() 的样式只折叠空白"""
+    if '"' in value or "'" in value or "url(" in value.lower():
+        return WHITESPACE_RE.sub(" ", value).strip(" ")
+    declarations = []
+    for declaration in value.split(";"):
+        prop, sep, val = declaration.partition(":")
+        if sep:
+            declarations.append(prop.strip() + ":" + WHITESPACE_RE.sub(" ", val).strip(" "))
+        elif declaration.strip():
+            declarations.append(WHITESPACE_RE.sub(" ", declaration).strip(" "))
+    return ";".join(declarations)
+
+
+def _attr_value(value: str) -> str:
+    return value.replace("&", "&amp;").replace('"', "&quot;")
+
+
+class HtmlPreflight(HTMLParser):
+    """单次遍历完成检查和（可选的）压缩，文档可以分块 feed"""
+
+    def __init__(self, target: str, minify: bool = HTML_MINIFY, sink: Optional[TextIO] = None):
+        super().__init__(convert_charrefs=False)
+        self.forbidden, self.max_bytes = HTML_TARGETS[target]
+        self.minify = minify
+        self.problems: List[Dict[str, Any]] = []
+        self.counts: Dict[str, int] = {}
+        # Minified output goes to sink when given (large files), otherwise it is collected in out
+        self.out: List[str] = []
+        self.sink = sink
+        self._write = sink.write if sink is not None else self.out.append
+        self._verbatim = 0
+        self._tags: Dict[str, str] = {}
+        # Pending whitespace, and whether the last thing written was a block boundary
+        self._space = False
+        self._after_block = True
+
+    # === 检查 ===
+    def _problem(self, kind: str, line: int, column: int, **details: Any) -> None:
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        if len(self.problems) < MAX_PROBLEMS:
+            self.problems.append({"problem": kind, "line": line, "column": column + 1, **details})
+
+    def _check_placeholders(self, text: str) -> None:
+        if "【" not in text:
+            return
+        line, column = self.getpos()
+        for match in PLACEHOLDER_RE.finditer(text):
+            if is_placeholder(match.group(0)):
+                before = text[:match.start()]
+                newlines = before.count("\n")
+                col = match.start() - before.rfind("\n") - 1 if newlines else column + match.start()
+                self._problem("placeholder", line + newlines, col, text=match.group(0))
+
+    def _check_tag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag in self.forbidden:
+            line, column = self.getpos()
+            self._problem("forbidden_tag", line, column, tag=tag)
+        for _, value in attrs:
+            if value:
+                self._check_placeholders(value)
+
+    # === 压缩输出 ===
+    def _emit_tag(self, text: str, block: bool) -> None:
+        if self._space and not block and not self._after_block:
+            self._write(" ")
+        self._space = False
+        self._write(text)
+        self._after_block = block
+
+    def _emit_text(self, text: str) -> None:
+        if self._space and not self._after_block:
+            self._write(" ")
+        self._space = False
+        self._write(text)
+        self._after_block = False
+
+    def _minified_start_tag(self, tag: str, attrs: List[Tuple[str, Optional[str]]], close: str) -> str:
+        raw = self.get_starttag_text()
+        minified = self._tags.get(raw)
+        if minified is None:
+            minified = self._start_tag(tag, attrs, close)
+            if len(self._tags) < TAG_CACHE_SIZE:
+                self._tags[raw] = minified
+        return minified
+
+    @staticmethod
+    def _start_tag(tag: str, attrs: List[Tuple[str, Optional[str]]], close: str) -> str:
+        parts = [f"<{tag}"]
+        for name, value in attrs:
+            if value is None:
+                parts.append(f" {name}")
+            else:
+                if name == "style":
+                    value = minify_style(value)
+                parts.append(f' {name}="{_attr_value(value)}"')
+        parts.append(close)
+        return "".join(parts)
+
+    # === HTMLParser 回调 ===
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._check_tag(tag, attrs)
+        if self.minify:
+            if self._verbatim:
+                self._write(self.get_starttag_text())
+            else:
+                self._emit_tag(self._minified_start_tag(tag, attrs, ">"), tag in BLOCK_TAGS)
+        if tag in VERBATIM_TAGS:
+            self._verbatim += 1
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._check_tag(tag, attrs)
+        if self.minify:
+            if self._verbatim:
+                self._write(self.get_starttag_text())
+            else:
+                self._emit_tag(self._minified_start_tag(tag, attrs, "/>"), tag in BLOCK_TAGS)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in VERBATIM_TAGS and self._verbatim:
+            self._verbatim -= 1
+        if self.minify:
+            if self._verbatim:
+                self._write(f"</{tag}>")
+            else:
+                self._emit_tag(f"</{tag}>", tag in BLOCK_TAGS)
+
+    def handle_data(self, data: str) -> None:
+        if self.cdata_elem is None:
+            self._check_placeholders(data)
+        if not self.minify:
+            return
+        if self._verbatim:
+            self._write(data)
+            return
+        collapsed = WHITESPACE_RE.sub(" ", data)
+        if not collapsed:
+            return
+        if collapsed == " ":
+            self._space = True
+            return
+        if collapsed[0] == " ":
+            self._space = True
+            collapsed = collapsed[1:]
+        trailing = collapsed[-1] == " "
+        self._emit_text(collapsed[:-1] if trailing else collapsed)
+        self._space = trailing
+
+    def _reference(self, text: str) -> None:
+        if not self.minify:
+            return
+        if self._verbatim:
+            self._write(text)
+        else:
+            self._emit_text(text)
+
+    def handle_entityref(self, name: str) -> None:
+        self._reference(f"&{name};")
+
+    def handle_charref(self, name: str) -> None:
+        self._reference(f"&#{name};")
+
+    def handle_comment(self, data: str) -> None:
+        # Conditional comments are markup for old mail/Office clients, not commentary
+        if self.minify and (self._verbatim or data.lstrip().startswith("[if") or data.rstrip().endswith("<![endif]")):
+            self._write(f"<!--{data}-->")
+
+    def handle_decl(self, decl: str) -> None:
+        if self.minify:
+            self._emit_tag(f"<!{decl}>", True)
+
+    def handle_pi(self, data: str) -> None:
+        if self.minify:
+            self._emit_tag(f"<?{data}>", True)
+
+    def unknown_decl(self, data: str) -> None:
+        if self.minify:
+            self._emit_tag(f"<![{data}]>", False)
+
+    def encoding_error(self, offset: int) -> None:
+        """文件不是合法的 UTF-8：记录问题后停止解析（不再输出压缩结果）"""
+        self.counts["encoding"] = 1
+        self.problems.append({"problem": "encoding", "byte": offset})
+
+    def result(self, size: int) -> "PreflightResult":
+        """结束解析；size 为未压缩时的字节数（压缩时按输出计算）"""
+        if "encoding" not in self.counts:
+            self.close()
+        html = path = None
+        if self.minify and self.sink is not None:
+            self.sink.close()
+            path = self.sink.name
+            size = os.path.getsize(path)
+        elif self.minify:
+            html = "".join(self.out)
+            size = len(html.encode("utf-8"))
+        if size > self.max_bytes:
+            self.counts["too_large"] = 1
+            self.problems.append({"problem": "too_large", "bytes": size, "limit": self.max_bytes})
+        return PreflightResult(html, size, self.problems, self.counts, path)
+
+
+class PreflightResult:
+    """检查结果：压缩后的文档在 html（检查字符串时）或临时文件 path（检查文件时）中，未压缩时二者都为 None"""
+
+    def __init__(self, html: Optional[str], size: int, problems: List[Dict[str, Any]], counts: Dict[str, int],
+                 path: Optional[str] = None):
+        self.html = html
+        self.size = size
+        self.problems = problems
+        self.counts = counts
+        self.path = path
+
+    def error(self) -> Optional[Dict[str, Any]]:
+        """有问题时返回工具错误结果，否则返回 None"""
+        if not self.problems:
+            return None
+        summary = "，".join(f"{PROBLEM_LABELS[kind]} {count} 处" for kind, count in self.counts.items())
+        return {
+            "error": "HTML preflight failed",
+            "message": f"HTML 未通过发布前检查（{summary}），请修改后重新提交",
+            "problems": self.problems,
+            "counts": self.counts,
+        }
+
+    def source(self, original: Dict[str, str]) -> Dict[str, str]:
+        """要上传的内容（MultipartBody 的 path= 或 text=）：有压缩结果时用压缩结果，否则用原文"""
+        if self.path is not None:
+            return {"path": self.path}
+        if self.html is not None:
+            return {"text": self.html}
+        return original
+
+    def discard(self) -> None:
+        """删除压缩结果的临时文件"""
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+
+def minify_html(text: str) -> str:
+    """只压缩、不检查（用于编译文章模板）"""
+    parser = HtmlPreflight("ai_report", minify=True)
+    parser.feed(text)
+    parser.close()
+    return "".join(parser.out)
+
+
+def check_html(target: str, text: Optional[str] = None, path: Optional[str] = None) -> PreflightResult:
+    """检查（并按配置压缩）字符串或文件中的 HTML，可在线程中调用
+    
+    文件按块读取并严格按 UTF-8 解码，压缩结果写入临时文件，内存占用与文件大小无关；
+    调用方用完后调用 discard() 删除临时文件。
+    """
+    if path is not None:
+        sink = None
+        if HTML_MINIFY:
+            sink = tempfile.NamedTemporaryFile("w", encoding="utf-8", newline="", prefix="aihehuo-preflight-",
+                                               suffix=".html", delete=False)
+        checker = HtmlPreflight(target, minify=HTML_MINIFY, sink=sink)
+        try:
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            offset = 0
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(READ_BLOCK_SIZE), b""):
+                    try:
+                        checker.feed(decoder.decode(block))
+                    except UnicodeDecodeError as e:
+                        checker.encoding_error(offset + e.start)
+                        break
+                    offset += len(block)
+                else:
+                    try:
+                        checker.feed(decoder.decode(b"", final=True))
+                    except UnicodeDecodeError as e:
+                        checker.encoding_error(offset + e.start)
+            result = checker.result(os.path.getsize(path))
+        except BaseException:
+            if sink is not None:
+                sink.close()
+                os.remove(sink.name)
+            raise
+        if result.problems:
+            # Nothing is uploaded, so the minified copy is not needed
+            result.discard()
+        return result
+    checker = HtmlPreflight(target, minify=HTML_MINIFY)
+    size = 0
+    for start in range(0, len(text), READ_BLOCK_SIZE):
+        block = text[start:start + READ_BLOCK_SIZE]
+        size += len(block.encode("utf-8"))
+        checker.feed(block)
+    return checker.result(size)
@@ -0,0 +1,87 @@
+# projection.py
+"""
+Field projection for user and idea records returned by the aihehuo-mcp tools.
+Callers pick a named preset or list the fields to keep / drop (dotted paths
+reach into nested objects). Paths are relative to each record (a search
+hit, the data of a user detail response), not to the response around it.
+Projection always builds new containers, so records shared with the
+response caches are never modified.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+# 各类记录的字段预设，full 表示不做裁剪
+PRESETS: Dict[str, Dict[str, Optional[List[str]]]] = {
+    "user": {
+        "brief": ["id", "number", "name", "bio", "score"],
+        "card": ["id", "number", "name", "avatar", "gender", "city", "industry", "bio", "goal",
+                 "tags", "wechat_reachable", "investor", "score", "created_at"],
+        "full": None,
+    },
+    "idea": {
+        "brief": ["id", "title", "summary", "score"],
+        "card": ["id", "title", "summary", "description", "industry", "city", "stage",
+                 "user.id", "user.name", "user_id", "score", "created_at"],
+        "full": None,
+    },
+}
+
+# A tree maps a key to None (the whole value) or to a subtree for nested keys
+
+
+def path_tree(paths: Iterable[str]) -> Dict[str, Any]:
+    tree: Dict[str, Any] = {}
+    for path in paths:
+        node = tree
+        parts = path.split(".")
+        for part in parts[:-1]:
+            if part in node and node[part] is None:
+                break  # an ancestor is already selected as a whole
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+    return tree
+
+
+def project(value: Any, include: Optional[Dict[str, Any]] = None,
+            exclude: Optional[Dict[str, Any]] = None) -> Any:
+    """按 include / exclude 字段树裁剪 value（列表逐项处理），不修改原对象"""
+    if include is None and exclude is None:
+        return value
+    if isinstance(value, list):
+        return [project(item, include, exclude) for item in value]
+    if not isinstance(value, dict):
+        return value
+    result = {}
+    for key, item in value.items():
+        if include is not None and key not in include:
+            continue
+        if exclude is not None and key in exclude and exclude[key] is None:
+            continue
+        result[key] = project(
+            item,
+            include[key] if include is not None else None,
+            exclude.get(key) if exclude is not None else None,
+        )
+    return result
+
+
+class Projection:
+    """由工具参数（preset / fields / exclude_fields）得到的裁剪规则"""
+
+    def __init__(self, kind: str, preset: Optional[str] = None, fields: Optional[List[str]] = None,
+                 exclude_fields: Optional[List[str]] = None):
+        # Explicit fields take precedence over the preset
+        keep = fields if fields else PRESETS[kind][preset or "full"]
+        self.include = path_tree(keep) if keep is not None else None
+        self.exclude = path_tree(exclude_fields) if exclude_fields else None
+
+    @classmethod
+    def from_params(cls, kind: str, params: Any) -> "Projection":
+        return cls(kind, params.preset, params.fields, params.exclude_fields)
+
+    @property
+    def is_identity(self) -> bool:
+        return self.include is None and self.exclude is None
+
+    def apply(self, records: Any) -> Any:
+        return project(records, self.include, self.exclude)
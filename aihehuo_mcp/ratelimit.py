@@ -0,0 +1,86 @@
+# ratelimit.py
+"""
+Client-side rate limiting for backend calls (used by http_client).
+Each endpoint family (/users, /ideas, /micro, /ai_reports, everything else)
+has a token bucket; a request that finds the bucket empty waits for its
+token instead of being sent and throttled by the backend. Waiters are
+served in arrival order.
+"""
+import asyncio
+import time
+from typing import Dict, Optional
+
+from .config import RATE_BURSTS, RATE_LIMITS
+from .metrics import METRICS
+
+# Longest prefix wins; report endpoints under /micro count as ai_reports
+FAMILY_PREFIXES = (
+    ("/micro/ai_reports", "ai_reports"),
+    ("/ai_reports", "ai_reports"),
+    ("/micro", "micro"),
+    ("/users", "users"),
+    ("/ideas", "ideas"),
+)
+
+
+def family_for(path: str) -> str:
+    for prefix, family in FAMILY_PREFIXES:
+        if path == prefix or path.startswith(prefix + "/"):
+            return family
+    return "other"
+
+
+class TokenBucket:
+    """令牌桶：每秒补充 rate 个令牌，最多积累 burst 个"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        # Held while waiting for a token, which queues later callers behind it
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> float:
+        """取一个令牌，返回等待的秒数"""
+        self._refill()
+        if self.tokens >= 1 and not self._lock.locked():
+            self.tokens -= 1
+            return 0.0
+        started = time.monotonic()
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+        return time.monotonic() - started
+
+
+_buckets: Dict[str, Optional[TokenBucket]] = {}
+
+
+def _bucket(family: str) -> Optional[TokenBucket]:
+    if family not in _buckets:
+        rate = RATE_LIMITS.get(family, 0)
+        # A rate of 0 disables limiting for the family
+        _buckets[family] = TokenBucket(rate, RATE_BURSTS.get(family, rate)) if rate > 0 else None
+    return _buckets[family]
+
+
+async def throttle(path: str) -> None:
+    """按路径所属的端点族限速，等待时间计入 server_metrics"""
+    family = family_for(path)
+    bucket = _bucket(family)
+    if bucket is None:
+        return
+    waited = await bucket.acquire()
+    if waited > 0:
+        stats = METRICS.family(family)
+        stats["throttled"] += 1
+        stats["throttled_seconds"] += waited
@@ -0,0 +1,190 @@
+# registry.py
+"""
+Table-driven tool registry for the aihehuo-mcp server.
+Each tool is declared once as a ToolSpec (endpoint, parameter model, response
+shaping, cache policy, error payload). tools/call is a dict lookup followed by
+the shared execution path in ToolRegistry.call, and the inputSchema returned
+by tools/list is generated from the same pydantic model used for validation,
+once, on first use.
+"""
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type
+
+from .config import AIHEHUO_API_BASE, CURRENT_USER_ID
+from .http_client import api_headers, api_request, decode_json
+from .metrics import finish_call, start_call
+from .serialize import dump_result
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+
+
+@dataclass
+class ToolCall:
+    """一次 tools/call 调用的上下文"""
+    name: str
+    arguments: Dict[str, Any]
+    progress_token: Any = None
+
+
+@dataclass
+class ToolSpec:
+    """工具声明：单请求工具只需填写端点相关字段，其余工具提供 handler"""
+    name: str
+    description: str
+    params_model: Type["BaseModel"]
+    # Single-request endpoint, used when no handler is given
+    method: str = "GET"
+    path: str = ""  # formatted with the params and current_user_id
+    body: Optional[Callable[[Any], Dict[str, Any]]] = None  # JSON request body
+    query: Optional[Callable[[Any], Dict[str, Any]]] = None  # URL query parameters
+    timeout: float = 15
+    response: str = "json"  # "json" or "text" (text is returned to the client as-is)
+    cache_policy: Optional[str] = None  # key into CACHE_TTLS, GET only
+    shape: Optional[Callable[[Any, Any], Any]] = None  # shape(data, params), must not mutate data
+    invalidates: Optional[Callable[[Any], List[str]]] = None  # cache keys dropped after success
+    # Custom execution: handler(server, params, call) -> result
+    handler: Optional[Callable[[Any, Any, ToolCall], Awaitable[Any]]] = None
+    # Returns an error payload when the params are rejected before any request
+    validate: Optional[Callable[[Any], Optional[Dict[str, Any]]]] = None
+    requires_current_user: bool = False
+    # Error payload: echoed arguments (name, default) + error + message, or on_error for other shapes
+    error_message: str = ""
+    error_fields: Sequence[Tuple[str, Any]] = ()
+    on_error: Optional[Callable[[Dict[str, Any], Exception], Dict[str, Any]]] = None
+
+
+def _inline_refs(node: Any, defs: Dict[str, Any]) -> Any:
+    # MCP clients do not all resolve $ref, so nested models are written out in place (without titles)
+    if isinstance(node, list):
+        return [_inline_refs(item, defs) for item in node]
+    if not isinstance(node, dict):
+        return node
+    if "$ref" in node:
+        target = defs[node["$ref"].rsplit("/", 1)[-1]]
+        node = {**target, **{k: v for k, v in node.items() if k != "$ref"}}
+    return {k: _inline_refs(v, defs) for k, v in node.items() if k != "title" or not isinstance(v, str)}
+
+
+def schema_from_model(model: Type["BaseModel"]) -> Dict[str, Any]:
+    """由 pydantic 模型生成 MCP inputSchema（去掉 title，Optional 字段折叠为其非空类型，嵌套模型就地展开）"""
+    schema = model.model_json_schema()
+    defs = schema.get("$defs", {})
+    properties = {}
+    for name, prop in schema.get("properties", {}).items():
+        prop = {k: v for k, v in prop.items() if k != "title"}
+        if defs:
+            prop = _inline_refs(prop, defs)
+        if "anyOf" in prop:
+            variants = [v for v in prop.pop("anyOf") if v.get("type") != "null"]
+            if len(variants) == 1:
+                prop = {**variants[0], **prop}
+            else:
+                prop["anyOf"] = variants
+        if "default" in prop and prop["default"] is None:
+            del prop["default"]
+        properties[name] = prop
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": schema.get("required", [])
+    }
+
+
+class ToolRegistry:
+    """按名称索引的工具表，负责参数校验、执行、缓存失效和错误格式化"""
+
+    def __init__(self, specs: Iterable[ToolSpec]):
+        self._specs: Dict[str, ToolSpec] = {spec.name: spec for spec in specs}
+        # Built on the first tools/list; the specs never change afterwards
+        self._schemas: Optional[Dict[str, Dict[str, Any]]] = None
+        self._tool_list: Optional[List[Dict[str, Any]]] = None
+
+    def __contains__(self, name: Any) -> bool:
+        return name in self._specs
+
+    def schemas(self) -> Dict[str, Dict[str, Any]]:
+        """按名称索引的工具声明（首次调用时生成并缓存，调用方不要修改）"""
+        if self._schemas is None:
+            self._schemas = {
+                spec.name: {
+                    "name": spec.name,
+                    "description": spec.description,
+                    "inputSchema": schema_from_model(spec.params_model)
+                }
+                for spec in self._specs.values()
+            }
+        return self._schemas
+
+    def tool_list(self) -> List[Dict[str, Any]]:
+        """tools/list 的 tools 数组（缓存）"""
+        if self._tool_list is None:
+            self._tool_list = list(self.schemas().values())
+        return self._tool_list
+
+    def error_payload(self, spec: ToolSpec, arguments: Dict[str, Any], exc: Exception) -> Dict[str, Any]:
+        if spec.on_error is not None:
+            return spec.on_error(arguments, exc)
+        result = {name: arguments.get(name, default) for name, default in spec.error_fields}
+        result["error"] = str(exc)
+        result["message"] = spec.error_message
+        return result
+
+    async def call(self, server: Any, call: ToolCall) -> str:
+        """执行工具调用，返回 content 文本（失败时为该工具的错误 JSON）"""
+        spec = self._specs[call.name]
+        # Backend requests made while the call runs are attributed to it (see metrics.py)
+        record, token = start_call(spec.name)
+        text = ""
+        try:
+            try:
+                with record.phase("validate"):
+                    params = spec.params_model(**call.arguments)
+                    rejected = None
+                    if spec.requires_current_user and CURRENT_USER_ID == "REPLACE_ME":
+                        rejected = {
+                            "error": "CURRENT_USER_ID not configured",
+                            "message": "Please set CURRENT_USER_ID environment variable"
+                        }
+                    elif spec.validate is not None:
+                        rejected = spec.validate(params)
+                if rejected is not None:
+                    result = rejected
+                elif spec.handler is not None:
+                    result = await spec.handler(server, params, call)
+                else:
+                    result = await self.execute(server, spec, params)
+            except Exception as e:
+                record.error = True
+                result = self.error_payload(spec, call.arguments, e)
+
+            with record.phase("serialize"):
+                text = result if isinstance(result, str) and spec.response == "text" else dump_result(result)
+            return text
+        finally:
+            finish_call(record, token, len(text.encode("utf-8")))
+
+    async def execute(self, server: Any, spec: ToolSpec, params: Any) -> Any:
+        """单请求工具的通用执行路径"""
+        url = AIHEHUO_API_BASE + spec.path.format(current_user_id=CURRENT_USER_ID, **params.model_dump())
+        query = spec.query(params) if spec.query is not None else None
+        as_text = spec.response == "text"
+
+        if spec.cache_policy is not None:
+            data = await server.cached_get(spec.cache_policy, url, params=query, timeout=spec.timeout, as_text=as_text)
+        else:
+            kwargs: Dict[str, Any] = {"headers": api_headers(), "timeout": spec.timeout}
+            if query is not None:
+                kwargs["params"] = query
+            if spec.body is not None:
+                kwargs["json"] = spec.body(params)
+            resp = await api_request(spec.method, url, **kwargs)
+            resp.raise_for_status()
+            if spec.invalidates is not None:
+                for key in spec.invalidates(params):
+                    server.cache.invalidate(key)
+            # Ensure response is decoded as UTF-8
+            resp.encoding = 'utf-8'
+            data = resp.text if as_text else decode_json(resp)
+
+        return spec.shape(data, params) if spec.shape is not None else data
@@ -0,0 +1,122 @@
+# resilience.py
+"""
+Retry and circuit-breaker policy for backend calls (used by http_client).
+Idempotent requests are retried on transport errors and on 429/502/503/504
+with exponential backoff and full jitter, honouring Retry-After. Each
+endpoint has a circuit breaker that opens after consecutive failures and
+fails fast until a cooldown has passed, then lets a single probe through.
+Endpoints are keyed with ids collapsed to {id}, so only signs that the
+backend itself is down count as failures: transport errors and 502/503/504.
+A 500 for one broken record is the backend answering and must not shut
+every other record of the same endpoint out.
+"""
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+from .config import (
+    BREAKER_COOLDOWN,
+    BREAKER_FAILURES,
+    HTTP_RETRIES,
+    HTTP_RETRY_AFTER_MAX,
+    HTTP_RETRY_BACKOFF,
+    HTTP_RETRY_BACKOFF_MAX,
+)
+from .metrics import METRICS, endpoint_key
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+RETRYABLE_STATUSES = frozenset({429, 502, 503, 504})
+# Responses that count toward opening a breaker (transport errors always do)
+BREAKER_STATUSES = frozenset({502, 503, 504})
+
+
+class BackendUnavailable(Exception):
+    """熔断器打开时直接失败，不向后端发送请求"""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After（秒数或 HTTP 日期），无法解析时返回 None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(attempt: int, retry_after: Optional[str] = None) -> Optional[float]:
+    """第 attempt 次重试（从 1 开始）前的等待秒数；超过重试次数或 Retry-After 过长时返回 None"""
+    if attempt > HTTP_RETRIES:
+        return None
+    requested = parse_retry_after(retry_after)
+    if requested is not None:
+        return requested if requested <= HTTP_RETRY_AFTER_MAX else None
+    # Full jitter: spreads retries from concurrent callers instead of synchronising them
+    return random.uniform(0, min(HTTP_RETRY_BACKOFF_MAX, HTTP_RETRY_BACKOFF * 2 ** (attempt - 1)))
+
+
+# === 熔断器 ===
+class CircuitBreaker:
+    """单个端点的熔断器：closed -> 连续失败 BREAKER_FAILURES 次 -> open -> 冷却后 half_open（放行一个探测请求）"""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._stats = METRICS.endpoint(key)
+
+    def before_request(self) -> None:
+        """请求前调用，熔断打开时抛出 BackendUnavailable"""
+        if self.state == "open":
+            remaining = self.opened_at + BREAKER_COOLDOWN - time.monotonic()
+            if remaining > 0:
+                self._stats.circuit_rejections += 1
+                raise BackendUnavailable(
+                    f"Backend endpoint {self.key} is unavailable (circuit open after {self.failures} failures, "
+                    f"retry in {remaining:.0f}s)"
+                )
+            self._set_state("half_open")
+        if self.state == "half_open":
+            if self._probing:
+                self._stats.circuit_rejections += 1
+                raise BackendUnavailable(f"Backend endpoint {self.key} is recovering (probe request in flight)")
+            self._probing = True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._probing = False
+        if self.state != "closed":
+            self._set_state("closed")
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == "half_open" or (self.state == "closed" and self.failures >= BREAKER_FAILURES):
+            self.opened_at = time.monotonic()
+            self._stats.circuit_opened += 1
+            self._set_state("open")
+
+    def release(self) -> None:
+        """请求未得出结论（如被取消）时释放探测名额"""
+        self._probing = False
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        self._stats.circuit_state = state
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def breaker_for(method: str, path: str) -> CircuitBreaker:
+    key = endpoint_key(method, path)
+    breaker = _breakers.get(key)
+    if breaker is None:
+        breaker = _breakers[key] = CircuitBreaker(key)
+    return breaker
@@ -0,0 +1,50 @@
+# serialize.py
+"""
+JSON encoding for tool results and JSON-RPC messages.
+Tool results are compact by default (AIHEHUO_OUTPUT_FORMAT=pretty restores
+the indented form) and are encoded with orjson when it is installed.
+"""
+import json
+from typing import Any
+
+from .config import OUTPUT_FORMAT, USE_ORJSON
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+PRETTY = OUTPUT_FORMAT == "pretty"
+
+if orjson is not None and USE_ORJSON:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+    _ORJSON_RESULT_OPTIONS = _ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if PRETTY else 0)
+else:
+    orjson = None
+
+
+def _dumps_std(obj: Any, pretty: bool) -> str:
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def dump_result(obj: Any) -> str:
+    """编码工具结果（content 中的 text）"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=_ORJSON_RESULT_OPTIONS).decode("utf-8")
+        except TypeError:
+            # e.g. integers beyond 64 bits; the stdlib encoder handles them
+            pass
+    return _dumps_std(obj, PRETTY)
+
+
+def dump_message(obj: Any) -> str:
+    """编码一条 JSON-RPC 消息（单行，不转义非 ASCII 字符）"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=_ORJSON_OPTIONS).decode("utf-8")
+        except TypeError:
+            pass
+    return _dumps_std(obj, False)
@@ -1,845 +1,45 @@
 # server.py
 import asyncio
 import json
-import os
 import re
 import sys
 import warnings
-from typing import Any, Dict, List, Optional
-
-import requests
-from pydantic import BaseModel, Field
-
-# Import prompts from separate file
-from .prompts import PROMPTS
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from .cache import ResponseCache, cache_key, normalize_query
+from .catalog import LIST_METHODS, StaticResult, load_list_etags, save_list_etags, source_fingerprint
+from .config import (
+    AIHEHUO_API_BASE,
+    BATCH_CONCURRENCY,
+    CACHE_MAX_BYTES,
+    CACHE_MAX_ENTRIES,
+    CACHE_TTLS,
+    CURRENT_USER_ID,
+    DISK_CACHE_ENABLED,
+    DISK_CACHE_MAX_BYTES,
+    DISK_CACHE_MAX_ENTRIES,
+    MAX_INFLIGHT_TOOL_CALLS,
+    METRICS_FILE,
+    METRICS_INTERVAL,
+    SEARCH_CACHE_MAX_BYTES,
+    SEARCH_CACHE_MAX_ENTRIES,
+    SEARCH_CACHE_TTL,
+    SEARCH_MAX_WINDOW,
+    SEARCH_PREFETCH_PAGES,
+    SEARCH_WINDOW,
+)
+from .http_client import api_headers, api_request, close_client, decode_json
+from .metrics import METRICS
+from .registry import ToolCall, ToolRegistry
+from .serialize import dump_message, dump_result
+from .storage import DiskCache, IdNumberMap, UploadIndex, UploadSessions, connect_sqlite
 
 # Suppress the specific warning about module import order
 warnings.filterwarnings("ignore", message=".*found in sys.modules after import.*")
 
-# === 配置 ===
-AIHEHUO_API_BASE = os.getenv("AIHEHUO_API_BASE", "https://new-api.aihehuo.com")
-AIHEHUO_API_KEY  = os.getenv("AIHEHUO_API_KEY",  "REPLACE_ME")
-CURRENT_USER_ID  = os.getenv("CURRENT_USER_ID",  "REPLACE_ME")
-
-# === 微信文章HTML模板 ===
-WECHAT_ARTICLE_TEMPLATE = """<!-- 微信公众号文章HTML模板 - 爱合伙创业者推荐 -->
-
-<div style="max-width: 677px; margin: 0 auto; background: white; overflow: hidden;">
-    
-    <!-- ========== 头部区域 ========== -->
-    <div style="background: linear-gradient(135deg, #ff6b6b 0%, #ee5a6f 100%); color: white; padding: 30px 20px; text-align: center;">
-        <h1 style="font-size: 1.6em; margin-bottom: 8px; font-weight: 600; line-height: 1.4;">🎯 【文章主标题】</h1>
-        <div style="font-size: 0.95em; opacity: 0.95; margin-top: 5px;">【副标题，如：10月10日新增创业者精选】</div>
-    </div>
-    
-    <div style="padding: 25px 18px;">
-        
-        <!-- ========== 数据概览区域 ========== -->
-        <div style="margin-bottom: 35px;">
-            <h2 style="font-size: 1.35em; color: #2c3e50; margin-bottom: 18px; padding-bottom: 8px; border-bottom: 2px solid #ff6b6b; font-weight: 600;">
-                <span style="margin-right: 6px;">📊</span>【章节标题，如：10月10日新增创业者画像】
-            </h2>
-            
-            <div style="background: #fafafa; padding: 20px; border-radius: 8px; margin-bottom: 25px; font-size: 0.95em;">
-                <p style="margin-bottom: 12px; line-height: 1.8;">【开场介绍段落】</p>
-                
-                <h3 style="color: #2c3e50; margin-bottom: 12px; font-size: 1.1em; font-weight: 600;">【小标题】</h3>
-                <p style="margin-bottom: 12px; line-height: 1.8;">
-                    <strong style="color: #ff6b6b; font-weight: 600;">【数据维度1】：</strong>【数据描述内容】
-                </p>
-                <p style="margin-bottom: 12px; line-height: 1.8;">
-                    <strong style="color: #ff6b6b; font-weight: 600;">【数据维度2】：</strong>【数据描述内容】
-                </p>
-                <p style="margin-bottom: 12px; line-height: 1.8;">
-                    <strong style="color: #ff6b6b; font-weight: 600;">【数据维度3】：</strong>【数据描述内容】
-                </p>
-                <p style="margin-bottom: 12px; line-height: 1.8;">
-                    <strong style="color: #ff6b6b; font-weight: 600;">【数据维度4】：</strong>【数据描述内容】
-                </p>
-            </div>
-        </div>
-        
-        <!-- ========== 带项目创始人部分 ========== -->
-        <div style="margin-bottom: 35px;">
-            <h2 style="font-size: 1.35em; color: #2c3e50; margin-bottom: 18px; padding-bottom: 8px; border-bottom: 2px solid #ff6b6b; font-weight: 600;">
-                <span style="margin-right: 6px;">🚀</span>【章节标题，如：带项目的典型创始人】
-            </h2>
-            
-            <!-- === 创始人卡片模板 - 开始 === -->
-            <div style="background: #fafafa; border-left: 3px solid #ff6b6b; border-radius: 6px; padding: 20px; margin-bottom: 20px;">
-                
-                <!-- 用户头部信息 -->
-                <div style="margin-bottom: 15px;">
-                    <div style="display: flex; align-items: center; gap: 10px; flex-wrap: wrap; margin-bottom: 8px;">
-                        <div style="font-size: 1.25em; font-weight: 600; color: #2c3e50;">【用户姓名】</div>
-                        <div style="background: linear-gradient(135deg, #ff6b6b 0%, #ee5a6f 100%); color: white; padding: 3px 12px; border-radius: 12px; font-size: 0.85em; font-weight: 500;">【创业号8位数字】</div>
-                    </div>
-                    <div style="background: #10b981; color: white; padding: 3px 10px; border-radius: 12px; font-size: 0.8em; font-weight: 500; display: inline-block;">带项目创始人</div>
-                </div>
-                
-                <!-- 项目标题 -->
-                <div style="font-size: 1.05em; color: #374151; margin-bottom: 12px; font-weight: 600; line-height: 1.6;">
-                    【emoji】 【项目名称/方向描述】
-                </div>
-                
-                <!-- 创业者背景 -->
-                <div style="margin-bottom: 10px; font-size: 0.95em; line-height: 1.8;">
-                    <strong style="color: #ff6b6b; font-weight: 600;">创业者背景：</strong>【工作经历、教育背景、行业经验等】
-                </div>
-                
-                <!-- 项目亮点 -->
-                <div style="background: #fff9e6; border-left: 3px solid #fbbf24; padding: 12px; margin: 12px 0; border-radius: 4px; font-size: 0.95em; line-height: 1.8;">
-                    <strong>💡 项目亮点：</strong>【项目的核心优势、商业模式、市场机会等】
-                </div>
-                
-                <!-- 寻找资源 -->
-                <div style="margin-bottom: 10px; font-size: 0.95em; line-height: 1.8;">
-                    <strong style="color: #ff6b6b; font-weight: 600;">🔍 寻找资源：</strong>【需要什么类型的合伙人或资源】
-                </div>
-                
-                <!-- 联想点 -->
-                <div style="background: #eff6ff; border-left: 3px solid #3b82f6; padding: 12px; margin: 12px 0; border-radius: 4px; font-size: 0.95em; line-height: 1.8;">
-                    <strong>🎯 联想点：</strong>【适合什么样的合伙人、市场分析、合作建议等】
-                </div>
-            </div>
-            <!-- === 创始人卡片模板 - 结束 === -->
-            
-            <!-- 复制上面的卡片结构，添加更多创始人 -->
-            
-        </div>
-        
-        <!-- ========== 找项目合伙人部分 ========== -->
-        <div style="margin-bottom: 35px;">
-            <h2 style="font-size: 1.35em; color: #2c3e50; margin-bottom: 18px; padding-bottom: 8px; border-bottom: 2px solid #ff6b6b; font-weight: 600;">
-                <span style="margin-right: 6px;">🤝</span>【章节标题，如：寻找项目的优质合伙人】
-            </h2>
-            
-            <!-- === 合伙人卡片模板 - 开始 === -->
-            <div style="background: #fafafa; border-left: 3px solid #ff6b6b; border-radius: 6px; padding: 20px; margin-bottom: 20px;">
-                
-                <!-- 用户头部信息 -->
-                <div style="margin-bottom: 15px;">
-                    <div style="display: flex; align-items: center; gap: 10px; flex-wrap: wrap; margin-bottom: 8px;">
-                        <div style="font-size: 1.25em; font-weight: 600; color: #2c3e50;">【用户姓名】</div>
-                        <div style="background: linear-gradient(135deg, #ff6b6b 0%, #ee5a6f 100%); color: white; padding: 3px 12px; border-radius: 12px; font-size: 0.85em; font-weight: 500;">【创业号8位数字】</div>
-                    </div>
-                    <div style="background: #3b82f6; color: white; padding: 3px 10px; border-radius: 12px; font-size: 0.8em; font-weight: 500; display: inline-block;">找项目合伙人</div>
-                </div>
-                
-                <!-- 合伙人定位 -->
-                <div style="font-size: 1.05em; color: #374151; margin-bottom: 12px; font-weight: 600; line-height: 1.6;">
-                    【emoji】 【合伙人定位描述】
-                </div>
-                
-                <!-- 背景介绍 -->
-                <div style="margin-bottom: 10px; font-size: 0.95em; line-height: 1.8;">
-                    <strong style="color: #ff6b6b; font-weight: 600;">背景：</strong>【教育背景、工作经历、创业经历等】
-                </div>
-                
-                <!-- 优势技能 -->
-                <div style="margin-bottom: 10px; font-size: 0.95em; line-height: 1.8;">
-                    <strong style="color: #ff6b6b; font-weight: 600;">优势：</strong>【核心技能、资源、经验等】
-                </div>
-                
-                <!-- 寻找诉求 -->
-                <div style="margin-bottom: 10px; font-size: 0.95em; line-height: 1.8;">
-                    <strong style="color: #ff6b6b; font-weight: 600;">诉求：</strong>【想找什么类型的项目或创始人】
-                </div>
-                
-                <!-- 适配项目 -->
-                <div style="background: #fff9e6; border-left: 3px solid #fbbf24; padding: 12px; margin: 12px 0; border-radius: 4px; font-size: 0.95em; line-height: 1.8;">
-                    <strong>💡 适配项目：</strong>【适合加入哪些类型的项目】
-                </div>
-                
-                <!-- 联想点 -->
-                <div style="background: #eff6ff; border-left: 3px solid #3b82f6; padding: 12px; margin: 12px 0; border-radius: 4px; font-size: 0.95em; line-height: 1.8;">
-                    <strong>🎯 联想点：</strong>【这位合伙人的特殊价值、适合的创始人类型等】
-                </div>
-            </div>
-            <!-- === 合伙人卡片模板 - 结束 === -->
-            
-            <!-- 复制上面的卡片结构，添加更多合伙人 -->
-            
-        </div>
-        
-        <!-- ========== 数据观察/总结区域 ========== -->
-        <div style="margin-bottom: 35px;">
-            <div style="background: #f0fdf4; border-radius: 8px; padding: 20px; margin-top: 25px;">
-                <h3 style="color: #059669; margin-bottom: 15px; font-size: 1.2em; font-weight: 600;">💡 【观察标题，如：数据观察】</h3>
-                
-                <ul style="list-style: none; padding-left: 0;">
-                    <li style="padding: 8px 0 8px 20px; position: relative; line-height: 1.8; font-size: 0.95em;">
-                        <span style="position: absolute; left: 0; color: #059669; font-weight: bold; font-size: 1.2em;">•</span>
-                        <strong>【观察点标题】：</strong>【观察内容描述】
-                    </li>
-                    <li style="padding: 8px 0 8px 20px; position: relative; line-height: 1.8; font-size: 0.95em;">
-                        <span style="position: absolute; left: 0; color: #059669; font-weight: bold; font-size: 1.2em;">•</span>
-                        <strong>【观察点标题】：</strong>【观察内容描述】
-                    </li>
-                    <li style="padding: 8px 0 8px 20px; position: relative; line-height: 1.8; font-size: 0.95em;">
-                        <span style="position: absolute; left: 0; color: #059669; font-weight: bold; font-size: 1.2em;">•</span>
-                        <strong>【观察点标题】：</strong>【观察内容描述】
-                    </li>
-                    <li style="padding: 8px 0 8px 20px; position: relative; line-height: 1.8; font-size: 0.95em;">
-                        <span style="position: absolute; left: 0; color: #059669; font-weight: bold; font-size: 1.2em;">•</span>
-                        <strong>【观察点标题】：</strong>【观察内容描述】
-                    </li>
-                    <li style="padding: 8px 0 8px 20px; position: relative; line-height: 1.8; font-size: 0.95em;">
-                        <span style="position: absolute; left: 0; color: #059669; font-weight: bold; font-size: 1.2em;">•</span>
-                        <strong>【观察点标题】：</strong>【观察内容描述】
-                    </li>
-                </ul>
-                
-                <!-- 温馨提示框 -->
-                <div style="margin-top: 20px; padding: 15px; background: white; border-radius: 6px; border-left: 3px solid #059669;">
-                    <strong style="color: #059669; font-size: 1em;">📌 【提示标题】</strong>
-                    <p style="margin-top: 8px; font-size: 0.95em; line-height: 1.8;">【提示内容描述】</p>
-                </div>
-            </div>
-        </div>
-        
-    </div>
-</div>"""
-
-# === 定义请求/响应模型 ===
-class SearchMembersParams(BaseModel):
-    query: str = Field(..., description="搜索关键词")
-    paginate: Dict[str, int] = Field(default_factory=lambda: {"page": 1, "per": 10}, description="分页参数")
-    wechat_reachable_only: bool = Field(default=False, description="是否只返回微信上能直接触达的用户（默认false）")
-    investor: Optional[bool] = Field(default=None, description="只搜索投资人（默认false）")
-    excluded_ids: Optional[List[str]] = Field(default=None, description="要排除的用户ID数组")
-
-class SearchIdeasParams(BaseModel):
-    query: str = Field(..., description="搜索关键词")
-    paginate: Dict[str, int] = Field(default_factory=lambda: {"page": 1, "per": 10}, description="分页参数")
-
-class GetGroupInfoParams(BaseModel):
-    group_id: str = Field(..., description="群组ID")
-
-class UpdateBioParams(BaseModel):
-    bio: str = Field(..., description="用户简介")
-
-class UpdateGoalParams(BaseModel):
-    goal: str = Field(..., description="用户目标")
-
-class GetCurrentUserParams(BaseModel):
-    pass  # No parameters needed, uses CURRENT_USER_ID from environment
-
-class GetCurrentUserIdeasParams(BaseModel):
-    paginate: Dict[str, int] = Field(default_factory=lambda: {"page": 1, "per": 10}, description="分页参数")
-
-class GetIdeaDetailsParams(BaseModel):
-    idea_id: str = Field(..., description="想法/项目ID")
-
-class FetchNewUsersParams(BaseModel):
-    pass  # No parameters needed, uses fixed pagination
-
-class GetUserDetailsParams(BaseModel):
-    user_id: str = Field(..., description="用户ID")
-
-class GetWechatDataParams(BaseModel):
-    user_id: str = Field(..., description="用户ID")
-
-class UploadFileParams(BaseModel):
-    file_path: str = Field(..., description="要上传的文件的本地路径（绝对路径）")
-
-class SubmitWechatArticleDraftParams(BaseModel):
-    title: str = Field(..., description="文章标题")
-    digest: str = Field(..., description="文章摘要")
-    body: Optional[str] = Field(None, description="文章正文HTML内容（仅包含body标签内的内容，不能包含超链接<a>标签）。与body_file二选一")
-    body_file: Optional[str] = Field(None, description="HTML文件路径（与body二选一，用于大型HTML内容）")
-
-class CreateAIReportParams(BaseModel):
-    title: str = Field(..., description="报告标题")
-    abstract: str = Field(..., description="报告摘要/简介")
-    html_file_path: str = Field(..., description="HTML文件路径")
-    mentioned_user_ids: List[str] = Field(default_factory=list, description="报告中提及的用户ID列表（注意是ID字符串，不是number）")
-    mentioned_idea_ids: List[str] = Field(default_factory=list, description="报告中提及的项目/想法ID列表")
-
-class UpdateAIReportParams(BaseModel):
-    report_id: str = Field(..., description="报告ID")
-    title: str = Field(..., description="报告标题")
-    abstract: str = Field(..., description="报告摘要/简介")
-    html_file_path: str = Field(..., description="HTML文件路径")
-
-class GetAIReportParams(BaseModel):
-    report_id: str = Field(..., description="报告ID")
-
-class NotifyMentionedUsersParams(BaseModel):
-    report_id: str = Field(..., description="报告ID")
-    intro_text: str = Field(..., description="发送给提及用户的介绍文本")
-    force: bool = Field(default=False, description="是否强制重新通知（默认false）")
-    user_id: Optional[int] = Field(default=None, description="可选，指定只通知某个提及的用户ID")
-
-class SubmitConfirmedUsersParams(BaseModel):
-    report_id: str = Field(..., description="报告ID")
-    user_ids: List[str] = Field(..., description="已确认阅读报告的用户ID数组")
-
-class AddMentionedUsersParams(BaseModel):
-    report_id: str = Field(..., description="报告ID")
-    user_ids: List[str] = Field(..., description="要添加到mentioned_user_ids列表的用户ID数组")
-
-class RemoveMentionedUsersParams(BaseModel):
-    report_id: str = Field(..., description="报告ID")
-    user_ids: List[str] = Field(..., description="要从mentioned_user_ids列表中移除的用户ID数组")
-
-class SubmitRejectedUsersParams(BaseModel):
-    report_id: str = Field(..., description="报告ID")
-    user_ids: List[str] = Field(..., description="已拒绝阅读报告的用户ID数组")
-
-class ConvertNumbersToIdsParams(BaseModel):
-    numbers: List[int] = Field(..., description="用户编号数组")
-
-class ConvertIdsToNumbersParams(BaseModel):
-    ids: List[int] = Field(..., description="用户ID数组")
-
-class GetLatest24hIdeasParams(BaseModel):
-    paginate: Dict[str, int] = Field(default_factory=lambda: {"page": 1, "per": 10}, description="分页参数")
-
-class GetBotImpressionsParams(BaseModel):
-    user_id: int = Field(..., description="用户ID")
-
-class UpdateBotImpressionsParams(BaseModel):
-    user_id: int = Field(..., description="用户ID")
-    summary: Optional[str] = Field(None, description="用户摘要")
-    tags: Optional[List[str]] = Field(None, description="标签列表")
-
-class UploadBusinessPlanParams(BaseModel):
-    file_path: str = Field(..., description="商业计划书 PDF 文件路径（绝对路径）")
-
 # === 爱合伙 MCP 服务器实现 ===
 class AihehuoMCPServer:
     def __init__(self):
-        self.tools = {
-            "server_info": {
-                "name": "server_info",
-                "description": "获取 MCP 服务信息（健康检查）",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {},
-                    "required": []
-                }
-            },
-            "search_members": {
-                "name": "search_members", 
-                "description": "搜索爱合伙平台上的创业者/会员。使用向量语义搜索，建议使用语义连贯的长句描述，避免简单关键词罗列",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "query": {
-                            "type": "string",
-                            "description": "语义搜索查询（长度必须大于5个字符，建议使用完整句子描述需求）",
-                            "minLength": 6
-                        },
-                        "paginate": {
-                            "type": "object",
-                            "properties": {
-                                "page": {"type": "integer", "default": 1},
-                                "per": {"type": "integer", "default": 10}
-                            },
-                            "default": {"page": 1, "per": 10}
-                        },
-                        "wechat_reachable_only": {
-                            "type": "boolean",
-                            "description": "是否只返回微信上能直接触达的用户（默认false）",
-                            "default": False
-                        },
-                        "investor": {
-                            "type": "boolean",
-                            "description": "只搜索投资人（可选，默认false）"
-                        },
-                        "excluded_ids": {
-                            "type": "array",
-                            "items": {
-                                "type": "string"
-                            },
-                            "description": "要排除的用户ID数组（可选）"
-                        }
-                    },
-                    "required": ["query"]
-                }
-            },
-            "search_ideas": {
-                "name": "search_ideas", 
-                "description": "搜索爱合伙平台上的创业想法/项目。使用向量语义搜索，建议使用语义连贯的长句描述，避免简单关键词罗列",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "query": {
-                            "type": "string",
-                            "description": "语义搜索查询（建议使用完整句子描述需求）"
-                        },
-                        "paginate": {
-                            "type": "object",
-                            "properties": {
-                                "page": {"type": "integer", "default": 1},
-                                "per": {"type": "integer", "default": 10}
-                            },
-                            "default": {"page": 1, "per": 10}
-                        }
-                    },
-                    "required": ["query"]
-                }
-            },
-            "get_group_info": {
-                "name": "get_group_info",
-                "description": "获取群组基本情况和群内所有成员数据（一次性获取所有用户）。数据会自动保存为Markdown文件到/tmp目录，返回文件路径。使用read_file工具读取文件内容",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "group_id": {
-                            "type": "string",
-                            "description": "群组ID"
-                        }
-                    },
-                    "required": ["group_id"]
-                }
-            },
-            "update_bio": {
-                "name": "update_bio",
-                "description": "更新用户简介",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "bio": {
-                            "type": "string",
-                            "description": "用户简介"
-                        }
-                    },
-                    "required": ["bio"]
-                }
-            },
-            "update_goal": {
-                "name": "update_goal",
-                "description": "更新用户目标",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "goal": {
-                            "type": "string",
-                            "description": "用户目标"
-                        }
-                    },
-                    "required": ["goal"]
-                }
-            },
-            "get_current_user_ideas": {
-                "name": "get_current_user_ideas",
-                "description": "获取当前用户的创业想法/项目",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "paginate": {
-                            "type": "object",
-                            "properties": {
-                                "page": {"type": "integer", "default": 1},
-                                "per": {"type": "integer", "default": 10}
-                            },
-                            "default": {"page": 1, "per": 10}
-                        }
-                    },
-                    "required": []
-                }
-            },
-            "get_idea_details": {
-                "name": "get_idea_details",
-                "description": "获取指定想法/项目的详细信息",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "idea_id": {
-                            "type": "string",
-                            "description": "想法/项目ID"
-                        }
-                    },
-                    "required": ["idea_id"]
-                }
-            },
-            "get_current_user_profile": {
-                "name": "get_current_user_profile",
-                "description": "获取当前用户完整资料信息",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {},
-                    "required": []
-                }
-            },
-            "fetch_new_users": {
-                "name": "fetch_new_users",
-                "description": "获取新用户列表，分页获取3页数据并合并（每页50个用户）",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {},
-                    "required": []
-                }
-            },
-            "get_user_details": {
-                "name": "get_user_details",
-                "description": "获取指定用户的详细信息",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "user_id": {
-                            "type": "string",
-                            "description": "用户ID"
-                        }
-                    },
-                    "required": ["user_id"]
-                }
-            },
-            "get_wechat_data": {
-                "name": "get_wechat_data",
-                "description": "获取指定用户的微信相关数据，包括微信备注名、加入的微信群组列表、群组昵称等",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "user_id": {
-                            "type": "string",
-                            "description": "用户ID"
-                        }
-                    },
-                    "required": ["user_id"]
-                }
-            },
-            "upload_file": {
-                "name": "upload_file",
-                "description": "上传文件到云存储，支持图片、视频、文档等多种文件类型。返回上传后的文件URL",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "file_path": {
-                            "type": "string",
-                            "description": "要上传的文件的本地绝对路径"
-                        }
-                    },
-                    "required": ["file_path"]
-                }
-            },
-            "submit_wechat_article_draft": {
-                "name": "submit_wechat_article_draft",
-                "description": "提交微信文章草稿。注意：文章正文不能包含超链接（<a>标签）。支持直接提供HTML内容或提供HTML文件路径",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "title": {
-                            "type": "string",
-                            "description": "文章标题"
-                        },
-                        "digest": {
-                            "type": "string",
-                            "description": "文章摘要"
-                        },
-                        "body": {
-                            "type": "string",
-                            "description": "文章正文HTML内容（仅包含body标签内的内容，不包含<body>标签本身，不能包含超链接<a>标签）。与body_file二选一"
-                        },
-                        "body_file": {
-                            "type": "string",
-                            "description": "HTML文件的绝对路径。当HTML内容太大时使用此参数。与body二选一"
-                        }
-                    },
-                    "required": ["title", "digest"]
-                }
-            },
-            "create_ai_report": {
-                "name": "create_ai_report",
-                "description": "创建AI生成的报告并在官网展示。与微信文章不同，报告可以包含超链接，并可以关联提及的用户和项目。必须提供HTML文件路径",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "title": {
-                            "type": "string",
-                            "description": "报告标题"
-                        },
-                        "abstract": {
-                            "type": "string",
-                            "description": "报告摘要/简介"
-                        },
-                        "html_file_path": {
-                            "type": "string",
-                            "description": "HTML文件的绝对路径"
-                        },
-                        "mentioned_user_ids": {
-                            "type": "array",
-                            "items": {
-                                "type": "string"
-                            },
-                            "description": "报告中提及的用户ID列表（ID字符串，不是number）",
-                            "default": []
-                        },
-                        "mentioned_idea_ids": {
-                            "type": "array",
-                            "items": {
-                                "type": "string"
-                            },
-                            "description": "报告中提及的项目/想法ID列表",
-                            "default": []
-                        }
-                    },
-                    "required": ["title", "abstract", "html_file_path"]
-                }
-            },
-            "update_ai_report": {
-                "name": "update_ai_report",
-                "description": "更新已存在的AI报告。可以更新报告的标题、摘要、正文。必须提供HTML文件路径",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "report_id": {
-                            "type": "string",
-                            "description": "报告ID"
-                        },
-                        "title": {
-                            "type": "string",
-                            "description": "报告标题"
-                        },
-                        "abstract": {
-                            "type": "string",
-                            "description": "报告摘要/简介"
-                        },
-                        "html_file_path": {
-                            "type": "string",
-                            "description": "HTML文件的绝对路径"
-                        }
-                    },
-                    "required": ["report_id", "title", "abstract", "html_file_path"]
-                }
-            },
-            "get_ai_report": {
-                "name": "get_ai_report",
-                "description": "获取指定AI报告的详细信息。返回报告的基本信息，包括标题、摘要、关联的用户和项目ID、已确认用户ID",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "report_id": {
-                            "type": "string",
-                            "description": "报告ID"
-                        }
-                    },
-                    "required": ["report_id"]
-                }
-            },
-            "notify_mentioned_users": {
-                "name": "notify_mentioned_users",
-                "description": "通知AI报告中提及的用户。向报告中关联的用户发送通知消息。可以通知所有提及的用户，也可以只通知指定的单个用户",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "report_id": {
-                            "type": "string",
-                            "description": "报告ID"
-                        },
-                        "intro_text": {
-                            "type": "string",
-                            "description": "发送给提及用户的介绍文本"
-                        },
-                        "force": {
-                            "type": "boolean",
-                            "description": "是否强制重新通知（默认false）",
-                            "default": False
-                        },
-                        "user_id": {
-                            "type": "integer",
-                            "description": "可选，指定只通知某个提及的用户ID（不提供则通知所有提及的用户）"
-                        }
-                    },
-                    "required": ["report_id", "intro_text"]
-                }
-            },
-            "submit_confirmed_users": {
-                "name": "submit_confirmed_users",
-                "description": "提交已确认阅读报告的用户ID。这些用户将永远不会再收到该报告的通知，即使使用force=true也不会通知",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "report_id": {
-                            "type": "string",
-                            "description": "报告ID"
-                        },
-                        "user_ids": {
-                            "type": "array",
-                            "items": {
-                                "type": "string"
-                            },
-                            "description": "已确认阅读报告的用户ID数组"
-                        }
-                    },
-                    "required": ["report_id", "user_ids"]
-                }
-            },
-            "add_mentioned_users": {
-                "name": "add_mentioned_users",
-                "description": "向AI报告的mentioned_user_ids列表中添加用户ID",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "report_id": {
-                            "type": "string",
-                            "description": "报告ID"
-                        },
-                        "user_ids": {
-                            "type": "array",
-                            "items": {
-                                "type": "string"
-                            },
-                            "description": "要添加到mentioned_user_ids列表的用户ID数组"
-                        }
-                    },
-                    "required": ["report_id", "user_ids"]
-                }
-            },
-            "remove_mentioned_users": {
-                "name": "remove_mentioned_users",
-                "description": "从AI报告的mentioned_user_ids列表中移除用户ID",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "report_id": {
-                            "type": "string",
-                            "description": "报告ID"
-                        },
-                        "user_ids": {
-                            "type": "array",
-                            "items": {
-                                "type": "string"
-                            },
-                            "description": "要从mentioned_user_ids列表中移除的用户ID数组"
-                        }
-                    },
-                    "required": ["report_id", "user_ids"]
-                }
-            },
-            "submit_rejected_users": {
-                "name": "submit_rejected_users",
-                "description": "提交已拒绝阅读报告的用户ID。这些用户将永远不会再收到该报告的通知，即使使用force=true也不会通知",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "report_id": {
-                            "type": "string",
-                            "description": "报告ID"
-                        },
-                        "user_ids": {
-                            "type": "array",
-                            "items": {
-                                "type": "string"
-                            },
-                            "description": "已拒绝阅读报告的用户ID数组"
-                        }
-                    },
-                    "required": ["report_id", "user_ids"]
-                }
-            },
-            "convert_numbers_to_ids": {
-                "name": "convert_numbers_to_ids",
-                "description": "将用户编号数组转换为用户ID数组。根据用户编号查找对应的用户ID",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "numbers": {
-                            "type": "array",
-                            "items": {
-                                "type": "integer"
-                            },
-                            "description": "用户编号数组"
-                        }
-                    },
-                    "required": ["numbers"]
-                }
-            },
-            "convert_ids_to_numbers": {
-                "name": "convert_ids_to_numbers",
-                "description": "将用户ID数组转换为用户编号数组。根据用户ID查找对应的用户编号",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "ids": {
-                            "type": "array",
-                            "items": {
-                                "type": "integer"
-                            },
-                            "description": "用户ID数组"
-                        }
-                    },
-                    "required": ["ids"]
-                }
-            },
-            "get_latest_24h_ideas": {
-                "name": "get_latest_24h_ideas",
-                "description": "获取过去24小时内最新发布的创业项目/想法。返回LLM优化的纯文本格式，便于AI分析和处理。自动过滤已删除和待审核的项目",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "paginate": {
-                            "type": "object",
-                            "properties": {
-                                "page": {"type": "integer", "default": 1},
-                                "per": {"type": "integer", "default": 10}
-                            },
-                            "default": {"page": 1, "per": 10}
-                        }
-                    },
-                    "required": []
-                }
-            },
-            "get_bot_impressions": {
-                "name": "get_bot_impressions",
-                "description": "获取指定用户的 Bot Impression 信息",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "user_id": {
-                            "type": "integer",
-                            "description": "用户ID"
-                        }
-                    },
-                    "required": ["user_id"]
-                }
-            },
-            "update_bot_impressions": {
-                "name": "update_bot_impressions",
-                "description": "更新指定用户的 Bot Impression 信息",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "user_id": {
-                            "type": "integer",
-                            "description": "用户ID"
-                        },
-                        "summary": {
-                            "type": "string",
-                            "description": "用户摘要"
-                        },
-                        "tags": {
-                            "type": "array",
-                            "items": {
-                                "type": "string"
-                            },
-                            "description": "标签列表"
-                        }
-                    },
-                    "required": ["user_id"]
-                }
-            },
-            "upload_business_plan": {
-                "name": "upload_business_plan",
-                "description": "上传商业计划书 PDF 文件并自动转换为图片（最多前15页）",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "file_path": {
-                            "type": "string",
-                            "description": "商业计划书 PDF 文件路径（绝对路径）"
-                        }
-                    },
-                    "required": ["file_path"]
-                }
-            }
-        }
-        
-        # Initialize prompts from separate file
-        self.prompts = PROMPTS
-        
         # Initialize resources
         self.resources = {
             "current_user_profile": {
@@ -849,47 +49,398 @@ class AihehuoMCPServer:
                 "mimeType": "application/json"
             }
         }
+        
+        # 由 main() 设置，用于发送 notifications/progress 等服务端通知
+        self.notify = None
+        
+        # 只读工具的响应缓存（按 URL 缓存，同一用户资料在多个工具间共享），可选磁盘层跨进程共享
+        disk_cache = None
+        if DISK_CACHE_ENABLED:
+            disk_cache = DiskCache(connect_sqlite("responses.sqlite3"), DISK_CACHE_MAX_ENTRIES, DISK_CACHE_MAX_BYTES)
+        self.cache = ResponseCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, backing=disk_cache)
+        # 语义搜索结果缓存（键为归一化查询 + 过滤条件，值为排序结果超集）
+        self.search_cache = ResponseCache(SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_MAX_BYTES)
+        # 用户 ID ↔ 创业号映射（首次使用时打开本地 SQLite 文件）
+        self._id_map: Optional[IdNumberMap] = None
+        # 未完成的分块上传会话（首次使用时打开）
+        self._upload_sessions: Optional[UploadSessions] = None
+        # 已上传文件的内容哈希索引（上传去重，首次使用时打开）
+        self._upload_index: Optional[UploadIndex] = None
+        # tools/list、prompts/list 的预编码结果（见 catalog.py）
+        self._static: Dict[str, StaticResult] = {}
+        self._fingerprint: Optional[str] = None
+    
+    @property
+    def id_map(self) -> IdNumberMap:
+        if self._id_map is None:
+            self._id_map = IdNumberMap(connect_sqlite("id_map.sqlite3"))
+        return self._id_map
+    
+    @property
+    def upload_sessions(self) -> UploadSessions:
+        if self._upload_sessions is None:
+            self._upload_sessions = UploadSessions(connect_sqlite("uploads.sqlite3"))
+        return self._upload_sessions
+    
+    @property
+    def upload_index(self) -> UploadIndex:
+        if self._upload_index is None:
+            self._upload_index = UploadIndex(connect_sqlite("uploads.sqlite3"))
+        return self._upload_index
+    
+    @property
+    def registry(self) -> ToolRegistry:
+        """工具表（见 tools.py）：pydantic 参数模型、HTML 模板等在首次用到时才导入，initialize 不需要它们"""
+        from .tools import TOOLS
+        return TOOLS
+    
+    @property
+    def prompts(self) -> Dict[str, Dict[str, Any]]:
+        # Prompts are embedded in prompts.py
+        from .prompts import PROMPTS
+        return PROMPTS
+    
+    def static_result(self, method: str) -> StaticResult:
+        """tools/list 或 prompts/list 的预编码结果（首次请求时编码）"""
+        result = self._static.get(method)
+        if result is None:
+            if method == "tools/list":
+                content = {"tools": self.registry.tool_list()}
+            else:
+                content = {"prompts": list(self.prompts.values())}
+            result = self._static[method] = StaticResult(content)
+        return result
+    
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint = source_fingerprint()
+        return self._fingerprint
+    
+    def known_list_etags(self) -> Optional[Dict[str, str]]:
+        """上次记录的各列表 etag（源码和配置未变时）；没有记录时返回 None，不为此导入工具表"""
+        etags = load_list_etags(self.fingerprint)
+        if etags is None or any(method not in etags for method in LIST_METHODS):
+            return None
+        return etags
+    
+    def remember_list_etags(self) -> Dict[str, str]:
+        """编码各列表并记录其 etag（与已有记录相同时不写文件）"""
+        etags = {method: self.static_result(method).etag for method in LIST_METHODS}
+        if load_list_etags(self.fingerprint) != etags:
+            save_list_etags(self.fingerprint, etags)
+        return etags
+    
+    def load_tools(self) -> None:
+        """导入工具表并编码各列表（main() 在 initialize 之后于后台线程调用）"""
+        self.remember_list_etags()
+    
+    def send_progress(self, progress_token: Any, progress: float, total: Optional[float] = None,
+                      message: Optional[str] = None) -> None:
+        """发送 MCP 进度通知（请求未携带 progressToken 时忽略）"""
+        if progress_token is None or self.notify is None:
+            return
+        params = {"progressToken": progress_token, "progress": progress}
+        if total is not None:
+            params["total"] = total
+        if message is not None:
+            params["message"] = message
+        self.notify({
+            "jsonrpc": "2.0",
+            "method": "notifications/progress",
+            "params": params
+        })
+    
+    async def cached_get(self, cache_policy: str, url: str, params: Optional[Dict[str, Any]] = None,
+                         timeout: float = 15, as_text: bool = False) -> Any:
+        """读穿缓存的 GET 请求：命中时直接返回，否则请求后端并按 cache_policy 对应的 TTL 缓存"""
+        ttl = CACHE_TTLS.get(cache_policy, 0)
+        key = cache_key(url, params)
+        if ttl > 0:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        resp = await api_request("GET", url, params=params, headers=api_headers(), timeout=timeout)
+        resp.raise_for_status()
+        # Ensure response is decoded as UTF-8
+        resp.encoding = 'utf-8'
+        data = resp.text if as_text else decode_json(resp)
+        if cache_policy == "get_user_details" and isinstance(data, dict):
+            # Only user records feed the id <-> number map; ideas and group data have ids of their own
+            self.id_map.learn_from([data.get("data")])
+        if ttl > 0:
+            self.cache.set(key, data, ttl, len(resp.content))
+        return data
+    
+    async def _search_backend(self, path: str, payload: Dict[str, Any]) -> Tuple[Any, int]:
+        resp = await api_request("GET", f"{AIHEHUO_API_BASE}{path}", json=payload, headers=api_headers(), timeout=15)
+        resp.raise_for_status()
+        # Ensure response is decoded as UTF-8
+        resp.encoding = 'utf-8'
+        data = decode_json(resp)
+        if path == "/users/search" and isinstance(data, dict) and isinstance(data.get("hits"), list):
+            self.id_map.learn_from(data["hits"])
+        return data, len(resp.content)
+    
+    def _search_key(self, path: str, query: str, filters: Dict[str, Any]) -> str:
+        return "|".join([path, normalize_query(query), json.dumps(filters, sort_keys=True)])
+    
+    async def cached_search(self, path: str, query: str, filters: Dict[str, Any],
+                            paginate: Dict[str, int], excluded_ids: Optional[List[str]] = None) -> Any:
+        """语义搜索：从缓存的排序结果超集中切出请求的页，excluded_ids 在本地过滤
+        
+        缓存未覆盖所需范围时按 SEARCH_WINDOW 取整重新拉取更大的窗口；
+        超出 SEARCH_MAX_WINDOW 或响应中没有 hits 列表时直接按原参数请求后端。
+        """
+        page = max(int(paginate.get("page", 1)), 1)
+        per = max(int(paginate.get("per", 10)), 1)
+        excluded = {str(i) for i in excluded_ids or []}
+        key = self._search_key(path, query, filters)
+        # Reserve room for excluded hits that will be filtered out of the window
+        need = page * per + len(excluded)
+        
+        entry = self.search_cache.get(key)
+        if entry is None or (len(entry["hits"]) < need and not entry["complete"]):
+            window = -(-need // SEARCH_WINDOW) * SEARCH_WINDOW
+            if window <= SEARCH_MAX_WINDOW:
+                payload = {"query": query, "paginate": {"page": 1, "per": window}, "vector_search": True}
+                payload.update(filters)
+                data, size = await self._search_backend(path, payload)
+                if isinstance(data, dict) and isinstance(data.get("hits"), list):
+                    hits = data["hits"]
+                    total = data.get("total")
+                    if not isinstance(total, int):
+                        # Without a total, a short window means the ranking is exhausted
+                        total = len(hits) if len(hits) < window else len(hits) + 1
+                    entry = {
+                        "template": {k: v for k, v in data.items() if k != "hits"},
+                        "hits": hits,
+                        "total": total,
+                        "complete": len(hits) >= total
+                    }
+                    self.search_cache.set(key, entry, SEARCH_CACHE_TTL, size)
+                else:
+                    entry = None
+        
+        if entry is None or (len(entry["hits"]) < need and not entry["complete"]):
+            payload = {"query": query, "paginate": {"page": page, "per": per}, "vector_search": True}
+            payload.update(filters)
+            if excluded_ids is not None:
+                payload["excluded_ids"] = excluded_ids
+            data, _ = await self._search_backend(path, payload)
+            return data
+        
+        hits = entry["hits"]
+        if excluded:
+            hits = [h for h in hits if not (isinstance(h, dict) and str(h.get("id")) in excluded)]
+        result = dict(entry["template"])
+        result.update({
+            "total": max(entry["total"] - (len(entry["hits"]) - len(hits)), 0),
+            "page": page,
+            "page_size": per,
+            "hits": hits[(page - 1) * per:page * per]
+        })
+        return result
+    
+    async def search_until(self, path: str, query: str, filters: Dict[str, Any], max_results: int,
+                           min_score: Optional[float] = None, excluded_ids: Optional[List[str]] = None,
+                           progress_token: Any = None) -> Any:
+        """自动翻页的语义搜索：并发预取后续页，按排名顺序去重合并，
+        凑满 max_results、遇到低于 min_score 的结果或结果耗尽时停止。
+        
+        每处理完一页发送一次进度通知；取到的排序结果写回搜索缓存，后续分页请求可直接切片。
+        """
+        excluded = {str(i) for i in excluded_ids or []}
+        key = self._search_key(path, query, filters)
+        collected: List[Any] = []
+        stopped_by = "exhausted"
+        
+        def take(hits: List[Any]) -> bool:
+            """按排名顺序收集结果，返回是否已满足停止条件"""
+            nonlocal stopped_by
+            for hit in hits:
+                if isinstance(hit, dict):
+                    if str(hit.get("id")) in excluded:
+                        continue
+                    score = hit.get("score")
+                    if min_score is not None and isinstance(score, (int, float)) and score < min_score:
+                        stopped_by = "min_score"
+                        return True
+                collected.append(hit)
+                if len(collected) >= max_results:
+                    stopped_by = "max_results"
+                    return True
+            return False
+        
+        # The cached ranking may already be long enough
+        entry = self.search_cache.get(key)
+        if entry is not None:
+            if take(entry["hits"]) or entry["complete"]:
+                result = dict(entry["template"])
+                result.update({
+                    "total": entry["total"],
+                    "returned": len(collected),
+                    "pages_fetched": 0,
+                    "stopped_by": stopped_by,
+                    "hits": collected
+                })
+                return result
+            collected.clear()
+            stopped_by = "exhausted"
+        
+        per = SEARCH_WINDOW
+        max_pages = -(-(max_results + len(excluded)) // per) + SEARCH_PREFETCH_PAGES
+        tasks: Dict[int, asyncio.Task] = {}
+        ranking: List[Any] = []
+        seen = set()
+        template: Dict[str, Any] = {}
+        total: Optional[int] = None
+        size = 0
+        pages_fetched = 0
+        exhausted = False
+        # Set when a page after the first fails: the hits merged so far are returned, marked truncated
+        page_error: Optional[str] = None
+        
+        async def fetch_page(page: int) -> Tuple[Any, int]:
+            payload = {"query": query, "paginate": {"page": page, "per": per}, "vector_search": True}
+            payload.update(filters)
+            return await self._search_backend(path, payload)
+        
+        try:
+            page = 1
+            while page <= max_pages:
+                # Keep up to SEARCH_PREFETCH_PAGES requests ahead of the page being merged
+                last_useful = max_pages if total is None else min(max_pages, -(-total // per))
+                for ahead in range(page, min(page + SEARCH_PREFETCH_PAGES, last_useful + 1)):
+                    if ahead not in tasks:
+                        tasks[ahead] = asyncio.create_task(fetch_page(ahead))
+                try:
+                    data, page_size = await tasks.pop(page)
+                except Exception as e:
+                    if page == 1:
+                        raise
+                    page_error = f"page {page}: {e}"
+                    stopped_by = "error"
+                    break
+                if not (isinstance(data, dict) and isinstance(data.get("hits"), list)):
+                    if page == 1:
+                        # Unknown response shape: hand it back unchanged
+                        return data
+                    page_error = f"page {page}: unexpected response"
+                    stopped_by = "error"
+                    break
+                hits = data["hits"]
+                pages_fetched += 1
+                size += page_size
+                if page == 1:
+                    template = {k: v for k, v in data.items() if k not in ("hits", "page", "page_size")}
+                    if isinstance(data.get("total"), int):
+                        total = data["total"]
+                
+                # Rankings can shift between page requests, so drop hits already seen
+                new_hits = []
+                for hit in hits:
+                    hit_id = str(hit.get("id")) if isinstance(hit, dict) else None
+                    if hit_id is not None:
+                        if hit_id in seen:
+                            continue
+                        seen.add(hit_id)
+                    new_hits.append(hit)
+                ranking.extend(new_hits)
+                done = take(new_hits)
+                self.send_progress(progress_token, len(collected), max_results, f"已获取{len(collected)}条结果")
+                
+                if len(hits) < per or (total is not None and page * per >= total):
+                    exhausted = True
+                    break
+                if done:
+                    break
+                page += 1
+        finally:
+            # Prefetched pages that are no longer needed (or failed) are cancelled and awaited,
+            # so their exceptions are retrieved instead of logged as never retrieved
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+        
+        if entry is None or len(ranking) > len(entry["hits"]):
+            if total is None:
+                total = len(ranking) if exhausted else len(ranking) + 1
+            self.search_cache.set(key, {
+                "template": template,
+                "hits": ranking,
+                "total": total,
+                "complete": exhausted
+            }, SEARCH_CACHE_TTL, size)
+        
+        result = dict(template)
+        result.update({
+            "total": total if total is not None else len(ranking),
+            "returned": len(collected),
+            "pages_fetched": pages_fetched,
+            "stopped_by": stopped_by,
+            "hits": collected
+        })
+        if page_error is not None:
+            result["truncated"] = True
+            result["error"] = page_error
+        return result
+    
+    async def batch_fetch(self, ids: List[Any], fetch_one: Callable[[Any], Awaitable[Any]]) -> List[Dict[str, Any]]:
+        """对去重后的 ID 并发执行 fetch_one（并发数受 BATCH_CONCURRENCY 限制），按输入顺序返回逐项结果"""
+        unique_ids = list(dict.fromkeys(ids))
+        slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+        
+        async def run_one(item_id: Any) -> Dict[str, Any]:
+            async with slots:
+                try:
+                    return {"id": item_id, "data": await fetch_one(item_id)}
+                except Exception as e:
+                    return {"id": item_id, "error": str(e)}
+        
+        return await asyncio.gather(*(run_one(item_id) for item_id in unique_ids))
+    
+    def batch_result(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        failed = sum(1 for item in results if "error" in item)
+        return {
+            "total": len(results),
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "results": results
+        }
     
-    async def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
-        """处理 MCP 请求"""
+    async def handle_request(self, request: Dict[str, Any]) -> Union[Dict[str, Any], str]:
+        """处理 MCP 请求（静态列表直接返回预编码的响应行）"""
         method = request.get("method")
         request_id = request.get("id")
         
         if method == "initialize":
-            return {
-                "jsonrpc": "2.0",
-                "id": request_id,
-                "result": {
-                    "protocolVersion": "2024-11-05",
-                    "capabilities": {
-                        "tools": {"listChanged": True},
-                        "prompts": {"listChanged": True},
-                        "resources": {"listChanged": True}
-                    },
-                    "serverInfo": {
-                        "name": "aihehuo-search-mcp",
-                        "version": "0.1.0"
-                    }
+            result = {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {
+                    "tools": {"listChanged": True},
+                    "prompts": {"listChanged": True},
+                    "resources": {"listChanged": True}
+                },
+                "serverInfo": {
+                    "name": "aihehuo-search-mcp",
+                    "version": "0.1.0"
                 }
             }
-        
-        elif method == "tools/list":
+            etags = self.known_list_etags()
+            if etags is not None:
+                # Same values as result._meta.etag of each list; unchanged etag means no need to re-list.
+                # Left out on a cold record: the warm-up after initialize saves them for the next start
+                result["_meta"] = {"etags": etags}
             return {
                 "jsonrpc": "2.0",
                 "id": request_id,
-                "result": {
-                    "tools": list(self.tools.values())
-                }
+                "result": result
             }
         
-        elif method == "prompts/list":
-            return {
-                "jsonrpc": "2.0",
-                "id": request_id,
-                "result": {
-                    "prompts": list(self.prompts.values())
-                }
-            }
+        elif method in LIST_METHODS:
+            return self.static_result(method).message(request_id)
         
         elif method == "prompts/get":
             prompt_name = request.get("params", {}).get("name")
@@ -961,21 +512,10 @@ class AihehuoMCPServer:
                         }
                     else:
                         # Fetch brief user information from API
-                        headers = {
-                            "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                            "Content-Type": "application/json",
-                            "Accept": "application/json",
-                            "User-Agent": "LLM_AGENT"
-                        }
-
                         # Build URL with current user ID: /users/{CURRENT_USER_ID}
                         url = f"{AIHEHUO_API_BASE}/users/{CURRENT_USER_ID}"
                         
-                        resp = requests.get(url, headers=headers, timeout=15)
-                        resp.raise_for_status()
-                        # Ensure response is decoded as UTF-8
-                        resp.encoding = 'utf-8'
-                        data = resp.json()["data"]
+                        data = (await self.cached_get("current_user_profile_resource", url))["data"]
                         
                         # Extract brief information from the full profile
                         brief_info = {
@@ -991,7 +531,7 @@ class AihehuoMCPServer:
                         }
                     
                     # Properly encode the brief info as UTF-8 string
-                    json_text = json.dumps(brief_info, ensure_ascii=False, indent=2)
+                    json_text = dump_result(brief_info)
                     
                     return {
                         "jsonrpc": "2.0",
@@ -1012,7 +552,7 @@ class AihehuoMCPServer:
                         "message": "Failed to fetch current user profile brief info"
                     }
                     # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
+                    error_text = dump_result(error_result)
                     return {
                         "jsonrpc": "2.0",
                         "id": request_id,
@@ -1031,1903 +571,166 @@ class AihehuoMCPServer:
                 }
         
         elif method == "tools/call":
-            tool_name = request.get("params", {}).get("name")
-            arguments = request.get("params", {}).get("arguments", {})
-            
-            if tool_name == "server_info":
-                result = {
-                    "name": "aihehuo-search-mcp",
-                    "version": "0.1.0",
-                    "api_base": AIHEHUO_API_BASE,
-                }
-                # Properly encode result as UTF-8
-                result_text = json.dumps(result, ensure_ascii=False, indent=2)
+            call_params = request.get("params", {})
+            tool_name = call_params.get("name")
+            if tool_name not in self.registry:
                 return {
                     "jsonrpc": "2.0",
                     "id": request_id,
-                    "result": {
-                        "content": [{"type": "text", "text": result_text}]
+                    "error": {
+                        "code": -32601,
+                        "message": f"Unknown tool: {tool_name}"
                     }
                 }
             
-            elif tool_name == "search_members":
-                try:
-                    params = SearchMembersParams(**arguments)
-                    
-                    # Validate query length
-                    if len(params.query.strip()) <= 5:
-                        error_result = {
-                            "error": "Query too short",
-                            "message": "搜索关键词长度必须大于5个字符",
-                            "query_length": len(params.query.strip()),
-                            "minimum_length": 6
-                        }
-                        error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                        return {
-                            "jsonrpc": "2.0",
-                            "id": request_id,
-                            "result": {
-                                "content": [{"type": "text", "text": error_text}]
-                            }
-                        }
-                    
-                    payload = {
-                        "query": params.query,
-                        "paginate": params.paginate,
-                        "vector_search": True,
-                        "wechat_reachable_only": params.wechat_reachable_only
-                    }
-                    
-                    # Add optional parameters if provided
-                    if params.investor is not None:
-                        payload["investor"] = params.investor
-                    if params.excluded_ids is not None:
-                        payload["excluded_ids"] = params.excluded_ids
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
+            call = ToolCall(
+                name=tool_name,
+                arguments=call_params.get("arguments", {}),
+                progress_token=call_params.get("_meta", {}).get("progressToken")
+            )
+            result_text = await self.registry.call(self, call)
+            return {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "result": {
+                    "content": [{"type": "text", "text": result_text}]
+                }
+            }
+        
+        else:
+            return {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": {
+                    "code": -32601,
+                    "message": f"Unknown method: {method}"
+                }
+            }
 
-                    url = f"{AIHEHUO_API_BASE}/users/search"
-                    
-                    resp = requests.get(url, json=payload, headers=headers, timeout=15)
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-                    
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "total": 0,
-                        "page": arguments.get("paginate", {}).get("page", 1),
-                        "page_size": arguments.get("paginate", {}).get("per", 10),
-                        "hits": [],
-                        "error": str(e)
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "search_ideas":
-                try:
-                    params = SearchIdeasParams(**arguments)
-                    
-                    payload = {
-                        "query": params.query,
-                        "paginate": params.paginate,
-                        "vector_search": True
-                    }
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
+# === 主入口（STDIO）===
+def write_message(message: Union[Dict[str, Any], str]) -> None:
+    """向 stdout 写入一条 JSON-RPC 消息（每行一条，str 为已编码的消息）"""
+    # Ensure UTF-8 output
+    sys.stdout.write((message if isinstance(message, str) else dump_message(message)) + "\n")
+    sys.stdout.flush()
+
+async def dispatch_request(server: "AihehuoMCPServer", request: Dict[str, Any]) -> None:
+    """处理单个请求并写回响应，异常转换为 JSON-RPC 错误"""
+    request_id = request.get("id")
+    try:
+        response = await server.handle_request(request)
+        write_message(response)
+    except Exception as e:
+        # If request_id is None (shouldn't happen for valid requests), use 0 as fallback
+        write_message({
+            "jsonrpc": "2.0",
+            "id": request_id if request_id is not None else 0,
+            "error": {
+                "code": -32603,
+                "message": f"Internal error: {str(e)}"
+            }
+        })
 
-                    url = f"{AIHEHUO_API_BASE}/ideas/search"
-                    
-                    resp = requests.get(url, json=payload, headers=headers, timeout=15)
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-                    
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "total": 0,
-                        "page": arguments.get("paginate", {}).get("page", 1),
-                        "page_size": arguments.get("paginate", {}).get("per", 10),
-                        "hits": [],
-                        "error": str(e)
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "get_group_info":
-                try:
-                    params = GetGroupInfoParams(**arguments)
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
-
-                    url = f"{AIHEHUO_API_BASE}/users/e{params.group_id}?all_users=1"
-                    
-                    resp = requests.get(url, headers=headers, timeout=30)
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-                    
-                    # Extract group data from response
-                    group_data = data.get("data", {}).get("group", {})
-                    
-                    # Format as Markdown
-                    md_content = []
-                    md_content.append(f"# {group_data.get('title', '群组信息')}\n")
-                    md_content.append(f"**群组ID**: {group_data.get('id', 'N/A')}\n")
-                    md_content.append(f"\n## 群组介绍\n")
-                    md_content.append(f"{group_data.get('intro', 'N/A')}\n")
-                    md_content.append(f"\n## 群组描述\n")
-                    md_content.append(f"{group_data.get('description', 'N/A')}\n")
-                    md_content.append(f"\n## 群友列表\n")
-                    
-                    users = group_data.get("users", [])
-                    if users:
-                        for i, user in enumerate(users, 1):
-                            user_text = user.get("user_text", "")
-                            md_content.append(f"\n### {i}. 群友信息\n")
-                            md_content.append(f"{user_text}\n")
-                    else:
-                        md_content.append("\n暂无群友数据\n")
-                    
-                    # Save to /tmp directory
-                    filename = f"/tmp/group_{params.group_id}.md"
-                    with open(filename, 'w', encoding='utf-8') as f:
-                        f.write('\n'.join(md_content))
-                    
-                    # Return success message with file path
-                    result = {
-                        "success": True,
-                        "message": f"群组数据已保存为Markdown文件（包含所有{len(users)}位群友）",
-                        "file_path": filename,
-                        "group_id": group_data.get('id', 'N/A'),
-                        "group_title": group_data.get('title', 'N/A'),
-                        "total_users": len(users),
-                        "note": "请使用read_file工具读取该文件以查看完整的群组和群友信息"
-                    }
-                    
-                    result_text = json.dumps(result, ensure_ascii=False, indent=2)
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": result_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "group_id": arguments.get("group_id", "unknown"),
-                        "error": str(e),
-                        "message": "Failed to fetch group information"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "update_bio":
-                try:
-                    params = UpdateBioParams(**arguments)
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
-
-                    url = f"{AIHEHUO_API_BASE}/users/update_bio"
-                    payload = {"bio": params.bio}
-                    
-                    resp = requests.put(url, json=payload, headers=headers, timeout=15)
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-                    
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "bio": arguments.get("bio", ""),
-                        "error": str(e),
-                        "message": "Failed to update user bio"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "update_goal":
-                try:
-                    params = UpdateGoalParams(**arguments)
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
-
-                    url = f"{AIHEHUO_API_BASE}/users/update_goal"
-                    payload = {"goal": params.goal}
-                    
-                    resp = requests.put(url, json=payload, headers=headers, timeout=15)
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-                    
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "goal": arguments.get("goal", ""),
-                        "error": str(e),
-                        "message": "Failed to update user goal"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "get_current_user_profile":
-                try:
-                    # Check if CURRENT_USER_ID is set
-                    if CURRENT_USER_ID == "REPLACE_ME":
-                        error_result = {
-                            "error": "CURRENT_USER_ID not configured",
-                            "message": "Please set CURRENT_USER_ID environment variable"
-                        }
-                        error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                        return {
-                            "jsonrpc": "2.0",
-                            "id": request_id,
-                            "result": {
-                                "content": [{"type": "text", "text": error_text}]
-                            }
-                        }
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
-
-                    # Build URL with current user ID: /users/{CURRENT_USER_ID}
-                    url = f"{AIHEHUO_API_BASE}/users/{CURRENT_USER_ID}"
-                    
-                    resp = requests.get(url, headers=headers, timeout=15)
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-                    
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "user_id": CURRENT_USER_ID,
-                        "error": str(e),
-                        "message": "Failed to fetch current user profile"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "get_current_user_ideas":
-                try:
-                    params = GetCurrentUserIdeasParams(**arguments)
-                    
-                    # Check if CURRENT_USER_ID is set
-                    if CURRENT_USER_ID == "REPLACE_ME":
-                        error_result = {
-                            "error": "CURRENT_USER_ID not configured",
-                            "message": "Please set CURRENT_USER_ID environment variable"
-                        }
-                        error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                        return {
-                            "jsonrpc": "2.0",
-                            "id": request_id,
-                            "result": {
-                                "content": [{"type": "text", "text": error_text}]
-                            }
-                        }
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
-
-                    # Build URL for current user's ideas with pagination: /ideas/my_ideas
-                    url = f"{AIHEHUO_API_BASE}/ideas/my_ideas"
-                    
-                    # Add pagination parameters to the request
-                    payload = {
-                        "paginate": params.paginate
-                    }
-                    
-                    resp = requests.get(url, json=payload, headers=headers, timeout=15)
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-                    
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "user_id": CURRENT_USER_ID,
-                        "error": str(e),
-                        "message": "Failed to fetch current user ideas"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "get_idea_details":
-                try:
-                    params = GetIdeaDetailsParams(**arguments)
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
-
-                    # Build URL for idea details: /ideas/{idea_id}
-                    url = f"{AIHEHUO_API_BASE}/ideas/{params.idea_id}"
-                    
-                    resp = requests.get(url, headers=headers, timeout=15)
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-                    
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "idea_id": arguments.get("idea_id", "unknown"),
-                        "error": str(e),
-                        "message": "Failed to fetch idea details"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "fetch_new_users":
-                try:
-                    params = FetchNewUsersParams(**arguments)
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
-
-                    # Fetch 3 pages of data with per=50
-                    all_users = []
-                    for page in range(1, 4):
-                        try:
-                            url = f"{AIHEHUO_API_BASE}/users/new_users"
-                            payload = {
-                                "paginate": {
-                                    "page": page,
-                                    "per": 50
-                                }
-                            }
-                            
-                            resp = requests.get(url, json=payload, headers=headers, timeout=15)
-                            resp.raise_for_status()
-                            resp.encoding = 'utf-8'
-                            data = resp.json()
-                            
-                            # Extract users from response.data
-                            if "data" in data and isinstance(data["data"], list):
-                                # Filter to only include specified fields
-                                filtered_users = []
-                                for user in data["data"]:
-                                    filtered_users.append(user)
-                                
-                                all_users.extend(filtered_users)
-                                
-                                # If we get less than 50 users, we've reached the end
-                                if len(data["data"]) < 50:
-                                    break
-                                    
-                        except Exception as e:
-                            # Log error but continue with other pages
-                            print(f"Error fetching page {page}: {str(e)}")
-                            continue
-                    
-                    # Create result with concatenated users
-                    result = {
-                        "total_users": len(all_users),
-                        "pages_fetched": min(page, 10),
-                        "users": all_users,
-                        "html_body_template": WECHAT_ARTICLE_TEMPLATE
-                    }
-                    
-                    # Properly encode the result as UTF-8 string
-                    json_text = json.dumps(result, ensure_ascii=False, indent=2)
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "error": str(e),
-                        "message": "Failed to fetch new users",
-                        "total_users": 0,
-                        "users": []
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "get_user_details":
-                try:
-                    params = GetUserDetailsParams(**arguments)
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
-
-                    # Build URL for user details: /users/{user_id}
-                    url = f"{AIHEHUO_API_BASE}/users/{params.user_id}"
-                    
-                    resp = requests.get(url, headers=headers, timeout=15)
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-                    
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "user_id": arguments.get("user_id", "unknown"),
-                        "error": str(e),
-                        "message": "Failed to fetch user details"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "get_wechat_data":
-                try:
-                    params = GetWechatDataParams(**arguments)
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
-
-                    # Build URL for wechat data: /users/get_wechat_data?user_id={user_id}
-                    url = f"{AIHEHUO_API_BASE}/users/get_wechat_data"
-                    
-                    # Add user_id as query parameter
-                    request_params = {
-                        "user_id": params.user_id
-                    }
-                    
-                    resp = requests.get(url, params=request_params, headers=headers, timeout=15)
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-                    
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "user_id": arguments.get("user_id", "unknown"),
-                        "error": str(e),
-                        "message": "Failed to fetch wechat data"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "upload_file":
-                try:
-                    params = UploadFileParams(**arguments)
-                    
-                    # Verify file exists
-                    if not os.path.exists(params.file_path):
-                        error_result = {
-                            "error": "File not found",
-                            "message": f"File not found at path: {params.file_path}"
-                        }
-                        error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                        return {
-                            "jsonrpc": "2.0",
-                            "id": request_id,
-                            "result": {
-                                "content": [{"type": "text", "text": error_text}]
-                            }
-                        }
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
-                    
-                    # Build URL for upload: /micro/upload
-                    url = f"{AIHEHUO_API_BASE}/micro/upload"
-                    
-                    # Get filename from path
-                    filename = os.path.basename(params.file_path)
-                    
-                    # Determine MIME type based on file extension
-                    import mimetypes
-                    mime_type, _ = mimetypes.guess_type(params.file_path)
-                    if mime_type is None:
-                        mime_type = 'application/octet-stream'
-                    
-                    # Upload file using multipart/form-data
-                    with open(params.file_path, 'rb') as f:
-                        files = {
-                            'file': (filename, f, mime_type)
-                        }
-                        
-                        resp = requests.post(url, headers=headers, files=files, timeout=60)
-                    
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-                    
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "file_path": arguments.get("file_path", "unknown"),
-                        "error": str(e),
-                        "message": "Failed to upload file"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "submit_wechat_article_draft":
-                try:
-                    params = SubmitWechatArticleDraftParams(**arguments)
-
-                    # Validate that either body or body_file is provided
-                    if not params.body and not params.body_file:
-                        error_result = {
-                            "error": "Missing required parameter",
-                            "message": "Either body or body_file must be provided"
-                        }
-                        error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                        return {
-                            "jsonrpc": "2.0",
-                            "id": request_id,
-                            "result": {
-                                "content": [{"type": "text", "text": error_text}]
-                            }
-                        }
-
-                    # If both are provided, return error
-                    if params.body and params.body_file:
-                        error_result = {
-                            "error": "Conflicting parameters",
-                            "message": "Only one of body or body_file should be provided, not both"
-                        }
-                        error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                        return {
-                            "jsonrpc": "2.0",
-                            "id": request_id,
-                            "result": {
-                                "content": [{"type": "text", "text": error_text}]
-                            }
-                        }
-
-                    # Build URL for submitting article draft: /articles/draft_wechat_article
-                    url = f"{AIHEHUO_API_BASE}/articles/draft_wechat_article"
-
-                    # Use different request methods based on whether file or body is provided
-                    if params.body_file:
-                        # Upload file using multipart/form-data
-                        try:
-                            # Verify file exists
-                            if not os.path.exists(params.body_file):
-                                error_result = {
-                                    "error": "File not found",
-                                    "message": f"HTML file not found at path: {params.body_file}"
-                                }
-                                error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                                return {
-                                    "jsonrpc": "2.0",
-                                    "id": request_id,
-                                    "result": {
-                                        "content": [{"type": "text", "text": error_text}]
-                                    }
-                                }
-
-                            headers = {
-                                "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                                "Accept": "application/json",
-                                "User-Agent": "LLM_AGENT"
-                            }
-
-                            # Prepare multipart form data (no nested schema)
-                            with open(params.body_file, 'rb') as f:
-                                files = {
-                                    'body_file': ('article.html', f, 'text/html')
-                                }
-                                data = [
-                                    ('title', params.title),
-                                    ('digest', params.digest)
-                                ]
-
-                                resp = requests.post(url, headers=headers, files=files, data=data, timeout=30)
-
-                        except Exception as file_error:
-                            error_result = {
-                                "error": "File upload error",
-                                "message": f"Failed to upload HTML file: {str(file_error)}"
-                            }
-                            error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                            return {
-                                "jsonrpc": "2.0",
-                                "id": request_id,
-                                "result": {
-                                    "content": [{"type": "text", "text": error_text}]
-                                }
-                            }
-                    else:
-                        # Use JSON request with body (no nested schema)
-                        headers = {
-                            "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                            "Content-Type": "application/json",
-                            "Accept": "application/json",
-                            "User-Agent": "LLM_AGENT"
-                        }
-
-                        payload = {
-                            "title": params.title,
-                            "digest": params.digest,
-                            "body": params.body
-                        }
-
-                        resp = requests.post(url, json=payload, headers=headers, timeout=30)
-
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-                    
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "title": arguments.get("title", ""),
-                        "error": str(e),
-                        "message": "Failed to submit WeChat article draft"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "create_ai_report":
-                try:
-                    params = CreateAIReportParams(**arguments)
-
-                    # Build URL for creating AI report: /ai_reports
-                    url = f"{AIHEHUO_API_BASE}/ai_reports"
-
-                    # Upload file using multipart/form-data
-                    try:
-                        # Verify file exists
-                        if not os.path.exists(params.html_file_path):
-                            error_result = {
-                                "error": "File not found",
-                                "message": f"HTML file not found at path: {params.html_file_path}"
-                            }
-                            error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                            return {
-                                "jsonrpc": "2.0",
-                                "id": request_id,
-                                "result": {
-                                    "content": [{"type": "text", "text": error_text}]
-                                }
-                            }
-
-                        headers = {
-                            "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                            "Accept": "application/json",
-                            "User-Agent": "LLM_AGENT"
-                        }
-
-                        # Prepare multipart form data with ai_report schema
-                        with open(params.html_file_path, 'rb') as f:
-                            files = {
-                                'ai_report[html_file]': ('report.html', f, 'text/html')
-                            }
-                            
-                            # Build form data with proper array handling for Rails
-                            # Rails expects array fields as multiple 'field[]' entries
-                            data = [
-                                ('ai_report[title]', params.title),
-                                ('ai_report[abstract]', params.abstract)
-                            ]
-                            
-                            # Add array fields - each item as separate field with [] notation
-                            for user_id in params.mentioned_user_ids:
-                                data.append(('ai_report[mentioned_user_ids][]', user_id))
-                            
-                            for idea_id in params.mentioned_idea_ids:
-                                data.append(('ai_report[mentioned_idea_ids][]', idea_id))
-
-                            resp = requests.post(url, headers=headers, files=files, data=data, timeout=30)
-
-                    except Exception as file_error:
-                        error_result = {
-                            "error": "File upload error",
-                            "message": f"Failed to upload HTML file: {str(file_error)}"
-                        }
-                        error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                        return {
-                            "jsonrpc": "2.0",
-                            "id": request_id,
-                            "result": {
-                                "content": [{"type": "text", "text": error_text}]
-                            }
-                        }
-
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-
-                except Exception as e:
-                    error_result = {
-                        "title": arguments.get("title", ""),
-                        "error": str(e),
-                        "message": "Failed to create AI report"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "update_ai_report":
-                try:
-                    params = UpdateAIReportParams(**arguments)
-
-                    # Build URL for updating AI report: /ai_reports/{report_id}
-                    url = f"{AIHEHUO_API_BASE}/ai_reports/{params.report_id}"
-
-                    # Upload file using multipart/form-data
-                    try:
-                        # Verify file exists
-                        if not os.path.exists(params.html_file_path):
-                            error_result = {
-                                "error": "File not found",
-                                "message": f"HTML file not found at path: {params.html_file_path}"
-                            }
-                            error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                            return {
-                                "jsonrpc": "2.0",
-                                "id": request_id,
-                                "result": {
-                                    "content": [{"type": "text", "text": error_text}]
-                                }
-                            }
-
-                        headers = {
-                            "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                            "Accept": "application/json",
-                            "User-Agent": "LLM_AGENT"
-                        }
-
-                        # Prepare multipart form data with ai_report schema
-                        with open(params.html_file_path, 'rb') as f:
-                            files = {
-                                'ai_report[html_file]': ('report.html', f, 'text/html')
-                            }
-                            
-                            # Build form data with proper array handling for Rails
-                            # Rails expects array fields as multiple 'field[]' entries
-                            data = [
-                                ('ai_report[title]', params.title),
-                                ('ai_report[abstract]', params.abstract),
-                                ('_method', 'put')  # Rails method override for multipart
-                            ]
-
-                            resp = requests.put(url, headers=headers, files=files, data=data, timeout=30)
-
-                    except Exception as file_error:
-                        error_result = {
-                            "error": "File upload error",
-                            "message": f"Failed to upload HTML file: {str(file_error)}"
-                        }
-                        error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                        return {
-                            "jsonrpc": "2.0",
-                            "id": request_id,
-                            "result": {
-                                "content": [{"type": "text", "text": error_text}]
-                            }
-                        }
-
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-
-                except Exception as e:
-                    error_result = {
-                        "report_id": arguments.get("report_id", ""),
-                        "title": arguments.get("title", ""),
-                        "error": str(e),
-                        "message": "Failed to update AI report"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "get_ai_report":
-                try:
-                    params = GetAIReportParams(**arguments)
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
-
-                    # Build URL for getting AI report: /ai_reports/{report_id}
-                    url = f"{AIHEHUO_API_BASE}/ai_reports/{params.report_id}"
-                    
-                    resp = requests.get(url, headers=headers, timeout=30)
-                    resp.raise_for_status()
-                    
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    full_data = resp.json()
-                    
-                    # Extract only the required fields from the response
-                    if "data" in full_data:
-                        report_data = full_data["data"]
-                        filtered_data = {
-                            "data": {
-                                "id": report_data.get("id"),
-                                "title": report_data.get("title"),
-                                "abstract": report_data.get("abstract"),
-                                "mentioned_user_ids": report_data.get("mentioned_user_ids", []),
-                                "mentioned_idea_ids": report_data.get("mentioned_idea_ids", []),
-                                "confirmed_user_ids": report_data.get("confirmed_user_ids", []),
-                                "rejected_user_ids": report_data.get("rejected_user_ids", [])
-                            }
-                        }
-                    else:
-                        filtered_data = full_data
-                    
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(filtered_data, ensure_ascii=False, indent=2)
-
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-
-                except Exception as e:
-                    error_result = {
-                        "report_id": arguments.get("report_id", ""),
-                        "error": str(e),
-                        "message": "Failed to get AI report"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "notify_mentioned_users":
-                try:
-                    params = NotifyMentionedUsersParams(**arguments)
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
-
-                    # Build URL for notifying mentioned users: /ai_reports/{report_id}/notify_mentioned_users
-                    url = f"{AIHEHUO_API_BASE}/micro/ai_reports/{params.report_id}/notify_mentioned_users"
-                    
-                    payload = {
-                        "intro_text": params.intro_text,
-                        "force": params.force
-                    }
-                    
-                    # Add optional user_id if provided
-                    if params.user_id is not None:
-                        payload["user_id"] = params.user_id
-                    
-                    resp = requests.post(url, json=payload, headers=headers, timeout=30)
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-                    
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "report_id": arguments.get("report_id", ""),
-                        "intro_text": arguments.get("intro_text", ""),
-                        "error": str(e),
-                        "message": "Failed to notify mentioned users"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "submit_confirmed_users":
-                try:
-                    params = SubmitConfirmedUsersParams(**arguments)
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
-
-                    # Build URL for submitting confirmed users: /ai_reports/{report_id}/submit_confirmed_users
-                    url = f"{AIHEHUO_API_BASE}/micro/ai_reports/{params.report_id}/submit_confirmed_users"
-                    
-                    payload = {
-                        "user_ids": params.user_ids
-                    }
-                    
-                    resp = requests.post(url, json=payload, headers=headers, timeout=30)
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-                    
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "report_id": arguments.get("report_id", ""),
-                        "user_ids": arguments.get("user_ids", []),
-                        "error": str(e),
-                        "message": "Failed to submit confirmed users"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "add_mentioned_users":
-                try:
-                    params = AddMentionedUsersParams(**arguments)
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
-
-                    # Build URL for adding mentioned users: /ai_reports/{report_id}/add_mentioned_users
-                    url = f"{AIHEHUO_API_BASE}/micro/ai_reports/{params.report_id}/add_mentioned_users"
-                    
-                    payload = {
-                        "user_ids": params.user_ids
-                    }
-                    
-                    resp = requests.post(url, json=payload, headers=headers, timeout=30)
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-                    
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "report_id": arguments.get("report_id", ""),
-                        "user_ids": arguments.get("user_ids", []),
-                        "error": str(e),
-                        "message": "Failed to add mentioned users"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "remove_mentioned_users":
-                try:
-                    params = RemoveMentionedUsersParams(**arguments)
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
-
-                    # Build URL for removing mentioned users: /ai_reports/{report_id}/remove_mentioned_users
-                    url = f"{AIHEHUO_API_BASE}/micro/ai_reports/{params.report_id}/remove_mentioned_users"
-                    
-                    payload = {
-                        "user_ids": params.user_ids
-                    }
-                    
-                    resp = requests.post(url, json=payload, headers=headers, timeout=30)
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-                    
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "report_id": arguments.get("report_id", ""),
-                        "user_ids": arguments.get("user_ids", []),
-                        "error": str(e),
-                        "message": "Failed to remove mentioned users"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "submit_rejected_users":
-                try:
-                    params = SubmitRejectedUsersParams(**arguments)
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
-
-                    # Build URL for submitting rejected users: /ai_reports/{report_id}/submit_rejected_users
-                    url = f"{AIHEHUO_API_BASE}/micro/ai_reports/{params.report_id}/submit_rejected_users"
-                    
-                    payload = {
-                        "user_ids": params.user_ids
-                    }
-                    
-                    resp = requests.post(url, json=payload, headers=headers, timeout=30)
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-                    
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "report_id": arguments.get("report_id", ""),
-                        "user_ids": arguments.get("user_ids", []),
-                        "error": str(e),
-                        "message": "Failed to submit rejected users"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "convert_numbers_to_ids":
-                try:
-                    params = ConvertNumbersToIdsParams(**arguments)
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
-
-                    # Build URL for converting numbers to IDs: /users/convert_numbers_to_ids
-                    url = f"{AIHEHUO_API_BASE}/users/convert_numbers_to_ids"
-                    
-                    payload = {
-                        "numbers": params.numbers
-                    }
-                    
-                    resp = requests.post(url, json=payload, headers=headers, timeout=15)
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-                    
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "numbers": arguments.get("numbers", []),
-                        "error": str(e),
-                        "message": "Failed to convert numbers to IDs"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "convert_ids_to_numbers":
-                try:
-                    params = ConvertIdsToNumbersParams(**arguments)
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
-
-                    # Build URL for converting IDs to numbers: /users/convert_ids_to_numbers
-                    url = f"{AIHEHUO_API_BASE}/users/convert_ids_to_numbers"
-                    
-                    payload = {
-                        "ids": params.ids
-                    }
-                    
-                    resp = requests.post(url, json=payload, headers=headers, timeout=15)
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-                    
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "ids": arguments.get("ids", []),
-                        "error": str(e),
-                        "message": "Failed to convert IDs to numbers"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "get_latest_24h_ideas":
-                try:
-                    params = GetLatest24hIdeasParams(**arguments)
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"  # Request LLM-optimized format
-                    }
-
-                    # Build URL for latest 24h ideas: /ideas/latest_24h
-                    url = f"{AIHEHUO_API_BASE}/ideas/latest_24h"
-                    
-                    # Add pagination parameters to the request
-                    request_params = {
-                        "paginate[page]": params.paginate.get("page", 1),
-                        "paginate[per]": params.paginate.get("per", 10)
-                    }
-                    
-                    resp = requests.get(url, params=request_params, headers=headers, timeout=15)
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    data = resp.json()
-                    
-                    # Properly encode the JSON data as UTF-8 string
-                    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": json_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "error": str(e),
-                        "message": "Failed to fetch latest 24h ideas",
-                        "paginate": arguments.get("paginate", {})
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "get_bot_impressions":
-                try:
-                    params = GetBotImpressionsParams(**arguments)
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
+def dump_metrics() -> None:
+    """把指标写入 AIHEHUO_METRICS_FILE（写入失败只记录到 stderr）"""
+    try:
+        METRICS.write_prometheus(METRICS_FILE)
+    except OSError as e:
+        print(f"Cannot write metrics to {METRICS_FILE}: {e}", file=sys.stderr)
 
-                    # Build URL for bot impressions: /micro/bot_impressions/show_by_user
-                    url = f"{AIHEHUO_API_BASE}/micro/bot_impressions/show_by_user"
-                    
-                    # Add user_id as query parameter
-                    request_params = {
-                        "user_id": params.user_id
-                    }
-                    
-                    resp = requests.get(url, params=request_params, headers=headers, timeout=15)
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    plain_text = resp.text
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": plain_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "user_id": arguments.get("user_id", "unknown"),
-                        "error": str(e),
-                        "message": "Failed to fetch bot impressions"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            elif tool_name == "update_bot_impressions":
-                try:
-                    params = UpdateBotImpressionsParams(**arguments)
-                    
-                    # Validate that at least summary or tags is provided
-                    if params.summary is None and params.tags is None:
-                        error_result = {
-                            "error": "Validation error",
-                            "message": "At least one of summary or tags must be provided",
-                            "user_id": params.user_id
-                        }
-                        error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                        return {
-                            "jsonrpc": "2.0",
-                            "id": request_id,
-                            "result": {
-                                "content": [{"type": "text", "text": error_text}]
-                            }
-                        }
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
-
-                    # Build URL for updating bot impressions: /micro/bot_impressions/update_by_user
-                    url = f"{AIHEHUO_API_BASE}/micro/bot_impressions/update_by_user"
-                    
-                    # Prepare payload
-                    payload = {
-                        "user_id": params.user_id
-                    }
-                    
-                    # Add optional fields if provided
-                    if params.summary is not None:
-                        payload["summary"] = params.summary
-                    if params.tags is not None:
-                        payload["tags"] = params.tags
-                    
-                    resp = requests.post(url, json=payload, headers=headers, timeout=15)
-                    resp.raise_for_status()
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    plain_text = resp.text
-                    
-                    # Properly encode the JSON data as UTF-8 string
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": plain_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "user_id": arguments.get("user_id", "unknown"),
-                        "summary": arguments.get("summary"),
-                        "tags": arguments.get("tags"),
-                        "error": str(e),
-                        "message": "Failed to update bot impressions"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            # @api {post} /bps 上传商业计划书 PDF
-            # @apiName CreateBp
-            # @apiGroup Bp
-            # @apiVersion 1.0.0
-            # @apiDescription 上传商业计划书 PDF 文件并自动转换为图片（最多前15页）
-            # @apiHeader {String} Authorization Bearer token（JWT 认证必填）
-            # @apiParam (multipart/form-data) {File} file 商业计划书 PDF 文件（必填）
-            # @apiParamExample {curl} 请求示例:
-            #   curl -X POST https://new-api.aihehuo.com/micro/bps \
-            #     -H "Authorization: Bearer YOUR_JWT_TOKEN" \
-            #     -F "file=@/path/to/business-plan.pdf"
-            # @apiSuccess {Number} id BP记录ID
-            # @apiSuccess {String} name 文件名
-            # @apiSuccess {String} url PDF文件URL
-            # @apiSuccess {Number} user_id 用户ID
-            # @apiSuccess {String} excerpt_url PDF摘要URL（前15页）
-            # @apiSuccess {String} job_id 图片转换任务ID（异步处理中）
-            # @apiSuccess {Number} pages PDF总页数
-            # @apiSuccessExample {json} 成功响应:
-            #   HTTP/1.1 201 Created
-            #   {
-            #     "id": 123,
-            #     "name": "business-plan.pdf",
-            #     "url": "https://oss-qd.aihehuo.com/1234567890_business-plan.pdf",
-            #     "user_id": 456,
-            #     "excerpt_url": "https://oss-qd.aihehuo.com/1234567890_business-plan_2.pdf",
-            #     "job_id": "abc123xyz",
-            #     "pages": 25
-            #   }
-            # @apiError (Error 400) UploadFailed 文件上传失败
-            # @apiError (Error 400) InvalidFileType 文件类型必须是 PDF
-            # @apiError (Error 401) Unauthorized 未授权（缺少或无效的 JWT token）
-            # @apiErrorExample {json} 错误响应:
-            #   HTTP/1.1 400 Bad Request
-            #   {
-            #     "error": "文件类型必须是 PDF",
-            #     "code": 0
-            #   }
-            # @apiNote
-            #   - 上传后会自动创建前15页的PDF摘要
-            #   - 摘要会异步转换为图片，可通过 job_id 或稍后查询 excerpt_images 字段获取结果
-            #   - 图片转换任务会在后台延迟1分钟后开始轮询
-            #   - PDF文本内容会自动解析并保存到 parsed_text 字段（后台异步处理）
-            
-            elif tool_name == "upload_business_plan":
-                try:
-                    params = UploadBusinessPlanParams(**arguments)
-                    
-                    # Verify file exists
-                    if not os.path.exists(params.file_path):
-                        error_result = {
-                            "error": "File not found",
-                            "message": f"PDF file not found at path: {params.file_path}"
-                        }
-                        error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                        return {
-                            "jsonrpc": "2.0",
-                            "id": request_id,
-                            "result": {
-                                "content": [{"type": "text", "text": error_text}]
-                            }
-                        }
-                    
-                    # Verify file is PDF
-                    if not params.file_path.lower().endswith('.pdf'):
-                        error_result = {
-                            "error": "Invalid file type",
-                            "message": "文件类型必须是 PDF"
-                        }
-                        error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                        return {
-                            "jsonrpc": "2.0",
-                            "id": request_id,
-                            "result": {
-                                "content": [{"type": "text", "text": error_text}]
-                            }
-                        }
-                    
-                    headers = {
-                        "Authorization": f"Bearer {AIHEHUO_API_KEY}",
-                        "Accept": "application/json",
-                        "User-Agent": "LLM_AGENT"
-                    }
+def report_warm_up(future: "asyncio.Future") -> None:
+    # Nothing awaits the warm-up; without this a failure would only surface as "never retrieved" at exit
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Tool table warm-up failed: {future.exception()!r}", file=sys.stderr)
 
-                    # Build URL for BP upload: POST /micro/bps
-                    url = f"{AIHEHUO_API_BASE}/micro/bps"
-                    
-                    # Prepare multipart form data
-                    with open(params.file_path, 'rb') as f:
-                        files = {
-                            'file': (os.path.basename(params.file_path), f, 'application/pdf')
-                        }
-                        resp = requests.post(url, headers=headers, files=files, timeout=300)
-                        resp.raise_for_status()
-                    
-                    # Ensure response is decoded as UTF-8
-                    resp.encoding = 'utf-8'
-                    plain_text = resp.text
-                    
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": plain_text}]
-                        }
-                    }
-                    
-                except Exception as e:
-                    error_result = {
-                        "file_path": arguments.get("file_path", "unknown"),
-                        "error": str(e),
-                        "message": "Failed to upload business plan"
-                    }
-                    # Properly encode error result as UTF-8
-                    error_text = json.dumps(error_result, ensure_ascii=False, indent=2)
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [{"type": "text", "text": error_text}]
-                        }
-                    }
-            
-            else:
-                return {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "error": {
-                        "code": -32601,
-                        "message": f"Unknown tool: {tool_name}"
-                    }
-                }
-        
-        else:
-            return {
-                "jsonrpc": "2.0",
-                "id": request_id,
-                "error": {
-                    "code": -32601,
-                    "message": f"Unknown method: {method}"
-                }
-            }
+async def dump_metrics_periodically() -> None:
+    while True:
+        await asyncio.sleep(METRICS_INTERVAL)
+        dump_metrics()
 
-# === 主入口（STDIO）===
 async def main() -> None:
     server = AihehuoMCPServer()
+    server.notify = write_message
+    loop = asyncio.get_running_loop()
     
-    # 从 stdin 读取请求，向 stdout 写入响应
+    # tools/call 各自作为独立任务运行，响应按完成顺序写出（通过 JSON-RPC id 匹配）
+    # 同时执行的工具调用数量受 AIHEHUO_MAX_INFLIGHT 限制
+    inflight = asyncio.Semaphore(MAX_INFLIGHT_TOOL_CALLS)
+    pending_tasks = set()
+    warm_up = None
+    metrics_task = asyncio.create_task(dump_metrics_periodically()) if METRICS_FILE else None
+    
+    async def run_tool_call(request: Dict[str, Any]) -> None:
+        async with inflight:
+            await dispatch_request(server, request)
+    
+    # 从 stdin 持续读取请求，向 stdout 写入响应
     while True:
         request_id = None
-        line = sys.stdin.readline()
+        # Read in a worker thread so in-flight tool calls keep running while we wait for input
+        line = await loop.run_in_executor(None, sys.stdin.readline)
         if not line:
             break
         
+        # Try to parse JSON first
         try:
-            # Try to parse JSON first
-            try:
-                request = json.loads(line.strip())
-                request_id = request.get("id")
-            except json.JSONDecodeError as json_err:
-                # Try to extract id from raw string for parse error responses
-                id_match = re.search(r'"id"\s*:\s*("([^"]+)"|(\d+))', line)
-                if id_match:
-                    id_str = id_match.group(2) or id_match.group(3)
-                    try:
-                        request_id = int(id_str)
-                    except ValueError:
-                        request_id = id_str
-                
-                # For JSON-RPC 2.0, parse error responses should have id: null
-                # But MCP validator may require a valid id, so use 0 as fallback if extraction fails
-                # This is technically incorrect per JSON-RPC spec but needed for compatibility
-                error_response = {
-                    "jsonrpc": "2.0",
-                    "id": request_id if request_id is not None else 0,
-                    "error": {
-                        "code": -32700,
-                        "message": f"Parse error: {str(json_err)}"
-                    }
+            # json.loads skips the trailing newline itself; strip() would copy a multi-MB line
+            request = json.loads(line)
+            request_id = request.get("id")
+        except json.JSONDecodeError as json_err:
+            # Try to extract id from raw string for parse error responses
+            id_match = re.search(r'"id"\s*:\s*("([^"]+)"|(\d+))', line)
+            if id_match:
+                id_str = id_match.group(2) or id_match.group(3)
+                try:
+                    request_id = int(id_str)
+                except ValueError:
+                    request_id = id_str
+            
+            # For JSON-RPC 2.0, parse error responses should have id: null
+            # But MCP validator may require a valid id, so use 0 as fallback if extraction fails
+            # This is technically incorrect per JSON-RPC spec but needed for compatibility
+            write_message({
+                "jsonrpc": "2.0",
+                "id": request_id if request_id is not None else 0,
+                "error": {
+                    "code": -32700,
+                    "message": f"Parse error: {str(json_err)}"
                 }
-                error_json = json.dumps(error_response, ensure_ascii=False)
-                print(error_json, flush=True)
-                continue
-            
-            response = await server.handle_request(request)
-            # Ensure UTF-8 output
-            response_json = json.dumps(response, ensure_ascii=False)
-            print(response_json, flush=True)
-            
+            })
+            continue
         except Exception as e:
-            # Use the request_id we extracted earlier
-            # If request_id is None (shouldn't happen for valid requests), use 0 as fallback
-            error_response = {
+            write_message({
                 "jsonrpc": "2.0",
                 "id": request_id if request_id is not None else 0,
                 "error": {
                     "code": -32603,
                     "message": f"Internal error: {str(e)}"
                 }
-            }
-            # Ensure UTF-8 output for errors too
-            error_json = json.dumps(error_response, ensure_ascii=False)
-            print(error_json, flush=True)
+            })
+            continue
+        # Not kept alive while the call runs (inline HTML bodies can be several MB)
+        line = None
+        
+        if request.get("method") == "tools/call":
+            task = asyncio.create_task(run_tool_call(request))
+            pending_tasks.add(task)
+            task.add_done_callback(pending_tasks.discard)
+        else:
+            # initialize / list / get 等轻量请求按到达顺序直接处理
+            await dispatch_request(server, request)
+            if request.get("method") == "initialize" and warm_up is None:
+                # Clients ask for tools/list right after initialize; import the tool table meanwhile
+                warm_up = loop.run_in_executor(None, server.load_tools)
+                warm_up.add_done_callback(report_warm_up)
+    
+    # stdin 关闭后等待所有进行中的工具调用完成再退出
+    if pending_tasks:
+        await asyncio.gather(*pending_tasks, return_exceptions=True)
+    if metrics_task is not None:
+        metrics_task.cancel()
+        dump_metrics()
+    await close_client()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,321 @@
+# storage.py
+"""
+Persistent local stores for the aihehuo-mcp server, kept as SQLite files
+under AIHEHUO_CACHE_DIR. Falls back to an in-memory database when the
+directory is not writable so the server still works, just without
+persistence.
+"""
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .config import CACHE_DIR
+
+
+def connect_sqlite(name: str) -> sqlite3.Connection:
+    """打开 CACHE_DIR 下的 SQLite 数据库（WAL 模式，允许多个进程同时读写）"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(CACHE_DIR, name), timeout=5, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    except (OSError, sqlite3.Error) as e:
+        print(f"Cannot open {name} in {CACHE_DIR} ({e}), using in-memory store", file=sys.stderr)
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+    return conn
+
+
+# === 用户 ID ↔ 创业号映射 ===
+def is_user_id(value: Any) -> bool:
+    return (isinstance(value, str) and value != "") or (isinstance(value, int) and not isinstance(value, bool))
+
+
+def is_user_number(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.isdigit()
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def stored_user_id(value: str) -> Any:
+    # ids are stored as TEXT; the backend's numeric ids come back as ints, like in its own responses
+    return int(value) if value.isdigit() else value
+
+
+class IdNumberMap:
+    """用户 ID 与创业号（number）的双向映射，二者一经分配不会改变，可永久缓存"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS user_numbers (id TEXT PRIMARY KEY, number INTEGER NOT NULL UNIQUE)"
+            )
+
+    def ids_for_numbers(self, numbers: Iterable[int]) -> Dict[int, Any]:
+        numbers = list(numbers)
+        if not numbers:
+            return {}
+        rows = self._select("SELECT number, id FROM user_numbers WHERE number IN ({})", numbers)
+        return {int(number): stored_user_id(user_id) for number, user_id in rows}
+
+    def numbers_for_ids(self, ids: Iterable[Any]) -> Dict[str, int]:
+        ids = [str(i) for i in ids]
+        if not ids:
+            return {}
+        rows = self._select("SELECT id, number FROM user_numbers WHERE id IN ({})", ids)
+        return {user_id: int(number) for user_id, number in rows}
+
+    def add_pairs(self, pairs: Iterable[Tuple[Any, Any]]) -> None:
+        # Only scalar ids go in: anything else would be stored as its repr and served forever
+        rows = [(str(user_id), int(number)) for user_id, number in pairs
+                if is_user_id(user_id) and is_user_number(number)]
+        if rows:
+            with self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO user_numbers (id, number) VALUES (?, ?)", rows)
+
+    def learn_from(self, records: Iterable[Any]) -> None:
+        """从用户记录（用户详情、成员搜索结果、新用户列表中的条目）收集 id 和 number；不递归进入嵌套对象"""
+        pairs: List[Tuple[Any, Any]] = []
+        for record in records:
+            if isinstance(record, dict) and is_user_id(record.get("id")) and is_user_number(record.get("number")):
+                pairs.append((record["id"], record["number"]))
+        self.add_pairs(pairs)
+
+    def _select(self, sql: str, values: List[Any]) -> List[Tuple[Any, Any]]:
+        rows: List[Tuple[Any, Any]] = []
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(values), 500):
+            chunk = values[start:start + 500]
+            rows.extend(self._conn.execute(sql.format(",".join("?" * len(chunk))), chunk).fetchall())
+        return rows
+
+
+# === 跨进程共享的响应缓存 ===
+class DiskCache:
+    """响应缓存的磁盘层，同一主机上的所有服务进程共用一个 SQLite 文件
+    
+    值以 JSON 保存，过期时间使用墙上时钟（进程间可比）；超过条目数或字节数上限时
+    先清理已过期条目，再从最早过期的条目开始淘汰。
+    """
+
+    # Check the size caps once every this many writes
+    TRIM_EVERY = 64
+
+    def __init__(self, conn: sqlite3.Connection, max_entries: int, max_bytes: int):
+        self._conn = conn
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._writes = 0
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)")
+
+    def get(self, key: str) -> Optional[Tuple[Any, float, int]]:
+        """返回 (value, 剩余有效秒数, size)，未命中或已过期时返回 None"""
+        now = time.time()
+        try:
+            row = self._conn.execute(
+                "SELECT value, expires_at, size FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+        except sqlite3.Error:
+            self.errors += 1
+            return None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0]), row[1] - now, row[2]
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        encoded = json.dumps(value, ensure_ascii=False)
+        size = len(encoded.encode("utf-8"))
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        try:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, size, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, encoded, size, time.time() + ttl)
+                )
+            self._writes += 1
+            if self._writes % self.TRIM_EVERY == 0:
+                self.trim()
+        except sqlite3.Error:
+            # Another process may hold the write lock past the timeout; the memory tier still has the value
+            self.errors += 1
+
+    def trim(self) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            if count <= self.max_entries and total <= self.max_bytes:
+                return
+            doomed = []
+            for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY expires_at"):
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                doomed.append((key,))
+                count -= 1
+                total -= size
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def invalidate(self, key: str) -> None:
+        try:
+            with self._conn:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        except sqlite3.Error:
+            self.errors += 1
+
+    def invalidate_prefix(self, prefix: str) -> None:
+        try:
+            with self._conn:
+                self._conn.execute("DELETE FROM responses WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+        except sqlite3.Error:
+            self.errors += 1
+
+    def clear(self) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        except sqlite3.Error:
+            count, total = None, None
+        return {
+            "entries": count,
+            "bytes": total,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+        }
+
+
+# === 分块上传会话 ===
+class UploadSessions:
+    """未完成的分块上传：文件指纹 -> 后端 upload_id，供中断后续传"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS upload_sessions ("
+                "fingerprint TEXT PRIMARY KEY, upload_id TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def get(self, fingerprint: str) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT upload_id FROM upload_sessions WHERE fingerprint = ?", (fingerprint,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, fingerprint: str, upload_id: str) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO upload_sessions (fingerprint, upload_id, created_at) VALUES (?, ?, ?)",
+                (fingerprint, upload_id, time.time())
+            )
+
+    def forget(self, fingerprint: str) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM upload_sessions WHERE fingerprint = ?", (fingerprint,))
+
+
+class UploadIndex:
+    """已上传内容：(上传范围, SHA-256) -> 后端返回的响应体；另记文件指纹 -> SHA-256，未修改的文件不必重新计算"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS uploaded_files ("
+                "scope TEXT NOT NULL, sha256 TEXT NOT NULL, size INTEGER NOT NULL, body TEXT NOT NULL, "
+                "uploaded_at REAL NOT NULL, PRIMARY KEY (scope, sha256))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS file_digests (fingerprint TEXT PRIMARY KEY, sha256 TEXT NOT NULL)"
+            )
+
+    def lookup(self, scope: str, sha256: str, max_age: float = 0) -> Optional[str]:
+        """返回记录的响应体；max_age > 0 时忽略更早的记录"""
+        row = self._conn.execute(
+            "SELECT body, uploaded_at FROM uploaded_files WHERE scope = ? AND sha256 = ?", (scope, sha256)
+        ).fetchone()
+        if row is None or (max_age > 0 and time.time() - row[1] > max_age):
+            return None
+        return row[0]
+
+    def record(self, scope: str, sha256: str, size: int, body: str) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO uploaded_files (scope, sha256, size, body, uploaded_at) VALUES (?, ?, ?, ?, ?)",
+                (scope, sha256, size, body, time.time())
+            )
+
+    def forget(self, scope: str, sha256: str) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM uploaded_files WHERE scope = ? AND sha256 = ?", (scope, sha256))
+
+    def digest_for(self, fingerprint: str) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT sha256 FROM file_digests WHERE fingerprint = ?", (fingerprint,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def remember_digest(self, fingerprint: str, sha256: str) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO file_digests (fingerprint, sha256) VALUES (?, ?)", (fingerprint, sha256)
+            )
+
+
+def extract_conversion(data: Any, requested: List[Any], by: str) -> Dict[str, Any]:
+    """从 convert_* 接口响应中解析出 {请求值: 转换结果}；by 为请求值一侧的字段（"number" 或 "user_id"）
+    
+    兼容 {"results"/"data": [{"number", "user_id", "found"}, ...]}（"user_id" 也可以是 "id"）、
+    顶层结果数组和 {"data": {请求值: 结果}}。found 为 false 的条目和非标量的值一律跳过。
+    """
+    other_valid = is_user_id if by == "number" else is_user_number
+    wanted = {str(value) for value in requested}
+    result: Dict[str, Any] = {}
+    items = conversion_items(data)
+    if items is not None:
+        for item in items:
+            if not isinstance(item, dict) or item.get("found") is False:
+                continue
+            number = item.get("number")
+            user_id = item.get("user_id", item.get("id"))
+            if not (is_user_number(number) and is_user_id(user_id)):
+                continue
+            key, value = (number, user_id) if by == "number" else (user_id, number)
+            if str(key) in wanted:
+                result[str(key)] = value
+        return result
+    payload = data.get("data") if isinstance(data, dict) else None
+    if isinstance(payload, dict):
+        for key, value in payload.items():
+            if str(key) in wanted and other_valid(value):
+                result[str(key)] = value
+    return result
+
+
+def conversion_items(data: Any) -> Optional[List[Any]]:
+    """convert_* 响应中的结果数组（results 或 data 字段，或顶层数组），没有时返回 None"""
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        for field in ("results", "data"):
+            if isinstance(data.get(field), list):
+                return data[field]
+    return None
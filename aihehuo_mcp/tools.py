@@ -0,0 +1,1077 @@
+# tools.py
+"""
+Tool declarations for the aihehuo-mcp server.
+Single-request tools are plain ToolSpec entries; tools that need more than
+one backend call (search caching, batches, uploads, group export, ...) point
+at a handler defined in this module.
+"""
+import asyncio
+import hashlib
+import json
+import mimetypes
+import os
+import sys
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .article import render_wechat_article as render_article
+from .cache import cache_key
+from .config import (
+    AIHEHUO_API_BASE,
+    BATCH_MAX_ITEMS,
+    CURRENT_USER_ID,
+    HTML_PREFLIGHT,
+    INLINE_BODY_MULTIPART_THRESHOLD,
+    NEW_USERS_MAX_FANOUT,
+    WECHAT_ARTICLE_MAX_BYTES,
+)
+from .fusion import fuse
+from .group_export import (
+    STREAMING_AVAILABLE,
+    GroupMarkdownWriter,
+    collect_group_users,
+    load_group_snapshot,
+    save_group_snapshot,
+    stream_group_markdown,
+)
+from .http_client import api_headers, api_request, api_stream, decode_json
+from .models import (
+    AddMentionedUsersParams,
+    ConvertIdsToNumbersParams,
+    ConvertNumbersToIdsParams,
+    CreateAIReportParams,
+    FetchNewUsersParams,
+    GetAIReportParams,
+    GetBotImpressionsBatchParams,
+    GetBotImpressionsParams,
+    GetCurrentUserIdeasParams,
+    GetCurrentUserParams,
+    GetGroupInfoParams,
+    GetIdeaDetailsParams,
+    GetIdeasDetailsBatchParams,
+    GetLatest24hIdeasParams,
+    GetUserDetailsParams,
+    GetUsersDetailsBatchParams,
+    GetWechatDataParams,
+    MultiSearchMembersParams,
+    NotifyMentionedUsersParams,
+    RemoveMentionedUsersParams,
+    RenderWechatArticleParams,
+    SearchIdeasParams,
+    SearchMembersParams,
+    ServerInfoParams,
+    ServerMetricsParams,
+    SubmitConfirmedUsersParams,
+    SubmitRejectedUsersParams,
+    SubmitWechatArticleDraftParams,
+    UpdateAIReportParams,
+    UpdateBioParams,
+    UpdateBotImpressionsParams,
+    UpdateGoalParams,
+    UploadBusinessPlanParams,
+    UploadFileParams,
+)
+from .metrics import METRICS
+from .multipart import MultipartBody
+from .preflight import check_html
+from .projection import Projection
+from .registry import ToolCall, ToolRegistry, ToolSpec
+from .storage import conversion_items, extract_conversion
+from .uploads import send_file
+
+BOT_IMPRESSIONS_PATH = "/micro/bot_impressions/show_by_user"
+
+
+# === 参数校验与错误格式 ===
+def search_error(arguments: Dict[str, Any], exc: Exception) -> Dict[str, Any]:
+    return {
+        "total": 0,
+        "page": arguments.get("paginate", {}).get("page", 1),
+        "page_size": arguments.get("paginate", {}).get("per", 10),
+        "hits": [],
+        "error": str(exc)
+    }
+
+def current_user_error(message: str):
+    def on_error(arguments: Dict[str, Any], exc: Exception) -> Dict[str, Any]:
+        return {"user_id": CURRENT_USER_ID, "error": str(exc), "message": message}
+    return on_error
+
+def check_query_length(params: SearchMembersParams) -> Optional[Dict[str, Any]]:
+    if len(params.query.strip()) <= 5:
+        return {
+            "error": "Query too short",
+            "message": "搜索关键词长度必须大于5个字符",
+            "query_length": len(params.query.strip()),
+            "minimum_length": 6
+        }
+    return None
+
+def check_queries_length(params: MultiSearchMembersParams) -> Optional[Dict[str, Any]]:
+    too_short = [query for query in params.queries if len(query.strip()) <= 5]
+    if too_short:
+        return {
+            "error": "Query too short",
+            "message": "每个搜索查询长度必须大于5个字符",
+            "queries": too_short,
+            "minimum_length": 6
+        }
+    return None
+
+def check_batch_size(field: str):
+    def validate(params: Any) -> Optional[Dict[str, Any]]:
+        ids = getattr(params, field)
+        if len(ids) > BATCH_MAX_ITEMS:
+            return {
+                "error": "Too many ids",
+                "message": f"每次最多查询{BATCH_MAX_ITEMS}个ID",
+                "count": len(ids)
+            }
+        return None
+    return validate
+
+def check_article_body(params: SubmitWechatArticleDraftParams) -> Optional[Dict[str, Any]]:
+    # Exactly one of body or body_file must be provided
+    if not params.body and not params.body_file:
+        return {
+            "error": "Missing required parameter",
+            "message": "Either body or body_file must be provided"
+        }
+    if params.body and params.body_file:
+        return {
+            "error": "Conflicting parameters",
+            "message": "Only one of body or body_file should be provided, not both"
+        }
+    return None
+
+def check_bot_impressions_update(params: UpdateBotImpressionsParams) -> Optional[Dict[str, Any]]:
+    if params.summary is None and params.tags is None:
+        return {
+            "error": "Validation error",
+            "message": "At least one of summary or tags must be provided",
+            "user_id": params.user_id
+        }
+    return None
+
+def file_not_found(path: str, kind: str = "File") -> Dict[str, Any]:
+    return {
+        "error": "File not found",
+        "message": f"{kind} not found at path: {path}"
+    }
+
+def file_upload_error(exc: Exception) -> Dict[str, Any]:
+    return {
+        "error": "File upload error",
+        "message": f"Failed to upload HTML file: {str(exc)}"
+    }
+
+
+# === 响应整形 ===
+def shape_ai_report(full_data: Any, params: GetAIReportParams) -> Any:
+    # Extract only the required fields from the response
+    if "data" not in full_data:
+        return full_data
+    report_data = full_data["data"]
+    return {
+        "data": {
+            "id": report_data.get("id"),
+            "title": report_data.get("title"),
+            "abstract": report_data.get("abstract"),
+            "mentioned_user_ids": report_data.get("mentioned_user_ids", []),
+            "mentioned_idea_ids": report_data.get("mentioned_idea_ids", []),
+            "confirmed_user_ids": report_data.get("confirmed_user_ids", []),
+            "rejected_user_ids": report_data.get("rejected_user_ids", [])
+        }
+    }
+
+def project_hits(data: Any, projection: Projection) -> Any:
+    # The hits may be shared with the search cache, so build a new envelope
+    if projection.is_identity or not isinstance(data, dict) or not isinstance(data.get("hits"), list):
+        return data
+    return {**data, "hits": projection.apply(data["hits"])}
+
+def shape_user_details(data: Any, params: GetUserDetailsParams) -> Any:
+    projection = Projection.from_params("user", params)
+    if projection.is_identity or not isinstance(data, dict) or "data" not in data:
+        return data
+    return {**data, "data": projection.apply(data["data"])}
+
+
+# === 自定义工具处理函数 ===
+async def server_info(server: Any, params: ServerInfoParams, call: ToolCall) -> Any:
+    return {
+        "name": "aihehuo-search-mcp",
+        "version": "0.1.0",
+        "api_base": AIHEHUO_API_BASE,
+        "cache": server.cache.stats(),
+        "search_cache": server.search_cache.stats(),
+    }
+
+async def server_metrics(server: Any, params: ServerMetricsParams, call: ToolCall) -> Any:
+    return METRICS.snapshot(params.tool)
+
+async def search_members(server: Any, params: SearchMembersParams, call: ToolCall) -> Any:
+    filters = {
+        "wechat_reachable_only": params.wechat_reachable_only
+    }
+    # Add optional parameters if provided
+    if params.investor is not None:
+        filters["investor"] = params.investor
+    if params.max_results is not None:
+        data = await server.search_until(
+            "/users/search", params.query, filters, params.max_results, params.min_score,
+            params.excluded_ids, call.progress_token
+        )
+    else:
+        # excluded_ids are applied locally on the cached superset
+        data = await server.cached_search(
+            "/users/search", params.query, filters, params.paginate, params.excluded_ids
+        )
+    return project_hits(data, Projection.from_params("user", params))
+
+async def multi_search_members(server: Any, params: MultiSearchMembersParams, call: ToolCall) -> Any:
+    filters = {
+        "wechat_reachable_only": params.wechat_reachable_only
+    }
+    if params.investor is not None:
+        filters["investor"] = params.investor
+    queries = list(dict.fromkeys(params.queries))
+    paginate = {"page": 1, "per": params.per_query}
+
+    # All queries run concurrently and share the search cache with search_members
+    responses = await asyncio.gather(
+        *(server.cached_search("/users/search", query, filters, paginate, params.excluded_ids) for query in queries),
+        return_exceptions=True
+    )
+    excluded = {str(i) for i in params.excluded_ids or []}
+    ranked_lists = []
+    per_query = []
+    for query, response in zip(queries, responses):
+        if isinstance(response, Exception):
+            ranked_lists.append([])
+            per_query.append({"query": query, "error": str(response)})
+            continue
+        if not isinstance(response, dict):
+            # Unknown response shape (cached_search hands it back unchanged): no hits from this query
+            ranked_lists.append([])
+            per_query.append({"query": query, "error": "unexpected response", "returned": 0})
+            continue
+        hits = response.get("hits")
+        hits = [hit for hit in hits or [] if not (isinstance(hit, dict) and str(hit.get("id")) in excluded)]
+        ranked_lists.append(hits)
+        per_query.append({"query": query, "total": response.get("total"), "returned": len(hits)})
+
+    projection = Projection.from_params("user", params)
+    fused = fuse(ranked_lists, params.fusion)
+    hits = []
+    for item in fused[:params.max_results]:
+        # Copy so the cached hit is left untouched
+        hit = dict(projection.apply(item["hit"]))
+        hit["fused_score"] = round(item["fused_score"], 6)
+        hit["matched_queries"] = [
+            {"query": queries[m["query_index"]], "rank": m["rank"], "score": m["score"]}
+            for m in item["matched_queries"]
+        ]
+        hits.append(hit)
+    return {
+        "fusion": params.fusion,
+        "queries": per_query,
+        "total": len(fused),
+        "hits": hits
+    }
+
+async def search_ideas(server: Any, params: SearchIdeasParams, call: ToolCall) -> Any:
+    if params.max_results is not None:
+        data = await server.search_until(
+            "/ideas/search", params.query, {}, params.max_results, params.min_score,
+            progress_token=call.progress_token
+        )
+    else:
+        data = await server.cached_search("/ideas/search", params.query, {}, params.paginate)
+    return project_hits(data, Projection.from_params("idea", params))
+
+async def get_group_info(server: Any, params: GetGroupInfoParams, call: ToolCall) -> Any:
+    headers = api_headers()
+    url = f"{AIHEHUO_API_BASE}/users/e{params.group_id}?all_users=1"
+    filename = f"/tmp/group_{params.group_id}.md"
+
+    async def on_progress(count: int) -> None:
+        server.send_progress(call.progress_token, count, message=f"已写入{count}位群友")
+
+    # Conditional request against the last snapshot, if the API supports it
+    snapshot = load_group_snapshot(params.group_id)
+    if os.path.exists(filename):
+        if snapshot.get("etag"):
+            headers["If-None-Match"] = snapshot["etag"]
+        if snapshot.get("last_modified"):
+            headers["If-Modified-Since"] = snapshot["last_modified"]
+
+    writer = GroupMarkdownWriter(filename, snapshot.get("members"), collect_changes=params.diff)
+    try:
+        not_modified = False
+        if STREAMING_AVAILABLE:
+            # Parse the member list incrementally and write each section as it arrives
+            async with api_stream("GET", url, headers=headers, timeout=30) as resp:
+                if resp.status_code == 304:
+                    not_modified = True
+                else:
+                    resp.raise_for_status()
+                    group_data = await stream_group_markdown(resp.aiter_bytes(), writer, on_progress)
+        else:
+            resp = await api_request("GET", url, headers=headers, timeout=30)
+            if resp.status_code == 304:
+                not_modified = True
+            else:
+                resp.raise_for_status()
+                # Ensure response is decoded as UTF-8
+                resp.encoding = 'utf-8'
+                data = decode_json(resp)
+
+                # Extract group data from response
+                group_data = collect_group_users(data.get("data", {}).get("group", {}), writer)
+
+        if not_modified:
+            group_data = snapshot.get("group", {})
+            total_users = snapshot.get("total_users", 0)
+            file_rewritten = False
+        else:
+            total_users = writer.count
+            digest = writer.digest(group_data)
+            # Skip rewriting the Markdown file when nothing changed since the last run
+            file_rewritten = digest != snapshot.get("digest") or not os.path.exists(filename)
+            if file_rewritten:
+                writer.finish(group_data)
+            save_group_snapshot(params.group_id, {
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "digest": digest,
+                "group": group_data,
+                "total_users": total_users,
+                "members": writer.members
+            })
+    finally:
+        writer.close()
+
+    # Return success message with file path
+    result = {
+        "success": True,
+        "message": f"群组数据已保存为Markdown文件（包含所有{total_users}位群友）",
+        "file_path": filename,
+        "group_id": group_data.get('id', 'N/A'),
+        "group_title": group_data.get('title', 'N/A'),
+        "total_users": total_users,
+        "changed": file_rewritten,
+        "note": "请使用read_file工具读取该文件以查看完整的群组和群友信息"
+    }
+    if params.diff:
+        if not_modified:
+            result["diff"] = {"joined": [], "left": [], "changed": []}
+        else:
+            result["diff"] = {
+                "joined": writer.joined,
+                "left": writer.left() if snapshot else [],
+                "changed": writer.changed
+            }
+        result["diff"]["first_snapshot"] = not snapshot
+    return result
+
+async def get_ideas_details_batch(server: Any, params: GetIdeasDetailsBatchParams, call: ToolCall) -> Any:
+    async def fetch_one(idea_id: str) -> Any:
+        # Same URL and cache entry as get_idea_details
+        return await server.cached_get("get_idea_details", f"{AIHEHUO_API_BASE}/ideas/{idea_id}")
+
+    return server.batch_result(await server.batch_fetch(params.idea_ids, fetch_one))
+
+async def fetch_new_users(server: Any, params: FetchNewUsersParams, call: ToolCall) -> Any:
+    headers = api_headers()
+    url = f"{AIHEHUO_API_BASE}/users/new_users"
+    fanout = asyncio.Semaphore(NEW_USERS_MAX_FANOUT)
+    projection = Projection.from_params("user", params)
+    # Last page that can contain users; lowered once a short page is seen
+    last_page = params.max_pages
+
+    async def fetch_page(page: int) -> Tuple[int, Optional[List[Any]], Optional[str]]:
+        async with fanout:
+            if page > last_page:
+                return page, [], None
+            try:
+                payload = {
+                    "paginate": {
+                        "page": page,
+                        "per": params.per
+                    }
+                }
+                if params.since:
+                    payload["since"] = params.since
+
+                resp = await api_request("GET", url, json=payload, headers=headers, timeout=15)
+                resp.raise_for_status()
+                resp.encoding = 'utf-8'
+                data = decode_json(resp)
+
+                # Extract users from response.data
+                if "data" in data and isinstance(data["data"], list):
+                    server.id_map.learn_from(data["data"])
+                    # Project each page as it arrives so only the requested fields are kept
+                    return page, projection.apply(data["data"]), None
+                return page, None, None
+            except Exception as e:
+                return page, None, str(e)
+
+    # Fetch pages concurrently; pages after a short page are cancelled
+    tasks = {page: asyncio.create_task(fetch_page(page)) for page in range(1, params.max_pages + 1)}
+    pages: Dict[int, List[Any]] = {}
+    errors = []
+    pending = set(tasks.values())
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.cancelled():
+                    # A page past a short page, cancelled below
+                    continue
+                page, users, error = task.result()
+                if error is not None:
+                    # Log error but continue with other pages
+                    print(f"Error fetching page {page}: {error}", file=sys.stderr)
+                    errors.append({"page": page, "error": error})
+                    continue
+                if users is None:
+                    continue
+                pages[page] = users
+                # If we get less than a full page, we've reached the end
+                if len(users) < params.per and page < last_page:
+                    last_page = page
+                    for later_page, later in tasks.items():
+                        if later_page > page:
+                            later.cancel()
+    finally:
+        # The tool call itself was cancelled (CancelledError propagates out of asyncio.wait): stop fetching pages
+        for task in pending:
+            task.cancel()
+
+    all_users = []
+    for page in sorted(p for p in pages if p <= last_page):
+        all_users.extend(pages[page])
+
+    # Create result with concatenated users
+    result = {
+        "total_users": len(all_users),
+        "pages_fetched": len([p for p in pages if p <= last_page]),
+        "users": all_users
+    }
+    if errors:
+        result["errors"] = errors
+    return result
+
+async def get_users_details_batch(server: Any, params: GetUsersDetailsBatchParams, call: ToolCall) -> Any:
+    async def fetch_one(user_id: str) -> Any:
+        # Same URL and cache entry as get_user_details
+        return await server.cached_get("get_user_details", f"{AIHEHUO_API_BASE}/users/{user_id}")
+
+    return server.batch_result(await server.batch_fetch(params.user_ids, fetch_one))
+
+async def upload_file(server: Any, params: UploadFileParams, call: ToolCall) -> Any:
+    # Verify file exists
+    if not os.path.exists(params.file_path):
+        return file_not_found(params.file_path)
+
+    # Determine MIME type based on file extension
+    mime_type, _ = mimetypes.guess_type(params.file_path)
+    if mime_type is None:
+        mime_type = 'application/octet-stream'
+
+    # Multipart upload to /micro/upload, chunked for large files, skipped for content uploaded before (see uploads.py)
+    body = await send_file(server, "upload", params.file_path, mime_type, call.progress_token)
+    return json.loads(body)
+
+@asynccontextmanager
+async def preflight_html(target: str, source: Dict[str, str]) -> AsyncIterator[Tuple[Optional[Dict[str, Any]], Dict[str, str]]]:
+    """发布前在本地检查 HTML（见 preflight.py），产出 (错误结果, 要上传的内容)
+    
+    内容为 MultipartBody 的 path= 或 text=：未启用检查或压缩时为原内容；文件压缩到临时文件，退出时删除。
+    """
+    if not HTML_PREFLIGHT:
+        yield None, source
+        return
+    checked = await asyncio.to_thread(check_html, target, **source)
+    try:
+        yield checked.error(), checked.source(source)
+    finally:
+        checked.discard()
+
+async def render_wechat_article(server: Any, params: RenderWechatArticleParams, call: ToolCall) -> Any:
+    article = params.model_dump()
+    html = await asyncio.to_thread(render_article, article)
+    data = html.encode("utf-8")
+    # Same content, same default path: re-rendering an unchanged article does not pile up files
+    file_path = params.output_path or f"/tmp/wechat_article_{hashlib.sha1(data).hexdigest()[:12]}.html"
+
+    def write() -> None:
+        with open(file_path, "wb") as f:
+            f.write(data)
+
+    await asyncio.to_thread(write)
+    result = {
+        "file_path": file_path,
+        "bytes": len(data),
+        "founders": len(params.founders),
+        "partners": len(params.partners),
+    }
+    if params.include_html:
+        result["html"] = html
+    return result
+
+async def submit_wechat_article_draft(server: Any, params: SubmitWechatArticleDraftParams, call: ToolCall) -> Any:
+    url = f"{AIHEHUO_API_BASE}/articles/draft_wechat_article"
+
+    # Verify file exists
+    if params.body_file and not os.path.exists(params.body_file):
+        return file_not_found(params.body_file, "HTML file")
+    # Links, leftover template placeholders and oversized drafts fail here instead of after the upload
+    source = {"path": params.body_file} if params.body_file else {"text": params.body}
+    async with preflight_html("wechat_article", source) as (error, source):
+        if error is not None:
+            return error
+
+        data = {
+            'title': params.title,
+            'digest': params.digest
+        }
+        # Use different request methods based on whether file or body is provided
+        if "path" in source:
+            # Upload file using multipart/form-data (no nested schema), streamed from disk
+            try:
+                body = MultipartBody(data, 'body_file', 'article.html', 'text/html', **source)
+                resp = await api_request("POST", url, headers={**api_headers(json_body=False), **body.headers},
+                                         content=body, timeout=30)
+            except Exception as file_error:
+                return file_upload_error(file_error)
+        elif len(source["text"]) >= INLINE_BODY_MULTIPART_THRESHOLD:
+            # Large inline HTML is sent as body_file too instead of being escaped into a JSON payload
+            body = MultipartBody(data, 'body_file', 'article.html', 'text/html', **source)
+            resp = await api_request("POST", url, headers={**api_headers(json_body=False), **body.headers},
+                                     content=body, timeout=30)
+        else:
+            # Use JSON request with body (no nested schema)
+            payload = {
+                "title": params.title,
+                "digest": params.digest,
+                "body": source["text"]
+            }
+            resp = await api_request("POST", url, json=payload, headers=api_headers(), timeout=30)
+
+    resp.raise_for_status()
+    # Ensure response is decoded as UTF-8
+    resp.encoding = 'utf-8'
+    return decode_json(resp)
+
+async def upload_ai_report(method: str, url: str, html_file_path: str, data: Dict[str, Any]) -> Any:
+    """以 multipart/form-data 提交 AI 报告（ai_report[...] 字段 + HTML 文件）"""
+    try:
+        # Verify file exists
+        if not os.path.exists(html_file_path):
+            return file_not_found(html_file_path, "HTML file")
+
+        async with preflight_html("ai_report", {"path": html_file_path}) as (error, source):
+            if error is not None:
+                return error
+            # Streamed from disk in blocks (see multipart.py), from the minified copy when minifying
+            body = MultipartBody(data, 'ai_report[html_file]', 'report.html', 'text/html', **source)
+            resp = await api_request(method, url, headers={**api_headers(json_body=False), **body.headers},
+                                     content=body, timeout=30)
+    except Exception as file_error:
+        return file_upload_error(file_error)
+
+    resp.raise_for_status()
+    # Ensure response is decoded as UTF-8
+    resp.encoding = 'utf-8'
+    return decode_json(resp)
+
+async def create_ai_report(server: Any, params: CreateAIReportParams, call: ToolCall) -> Any:
+    # Rails expects array fields as multiple 'field[]' entries; list values are sent as one form field per item
+    return await upload_ai_report("POST", f"{AIHEHUO_API_BASE}/ai_reports", params.html_file_path, {
+        'ai_report[title]': params.title,
+        'ai_report[abstract]': params.abstract,
+        'ai_report[mentioned_user_ids][]': list(params.mentioned_user_ids),
+        'ai_report[mentioned_idea_ids][]': list(params.mentioned_idea_ids)
+    })
+
+async def update_ai_report(server: Any, params: UpdateAIReportParams, call: ToolCall) -> Any:
+    return await upload_ai_report("PUT", f"{AIHEHUO_API_BASE}/ai_reports/{params.report_id}", params.html_file_path, {
+        'ai_report[title]': params.title,
+        'ai_report[abstract]': params.abstract,
+        '_method': 'put'  # Rails method override for multipart
+    })
+
+async def convert_users(server: Any, path: str, by: str, values: List[Any]) -> Any:
+    """convert_* 工具：已知的对应关系在本地解析，只把未知的值发给后端
+    
+    无论缓存中已有多少，都返回 {"results", "resolved_locally", "fetched"}：results 按请求顺序排列，
+    每项为 {by, 另一字段, found}；后端返回无法识别的结构时另附 backend_response。
+    """
+    field, other = ("numbers", "user_id") if by == "number" else ("ids", "number")
+    unique = list(dict.fromkeys(values))
+
+    def lookup() -> Dict[str, Any]:
+        # Always read back from the map, so a value has the same type whether it was cached or just fetched
+        if by == "number":
+            return {str(number): user_id for number, user_id in server.id_map.ids_for_numbers(unique).items()}
+        return dict(server.id_map.numbers_for_ids(unique))
+
+    known = lookup()
+    resolved_locally = len(known)
+    misses = [value for value in unique if str(value) not in known]
+    result: Dict[str, Any] = {}
+    if misses:
+        # Read-only lookup, safe to retry
+        resp = await api_request("POST", f"{AIHEHUO_API_BASE}{path}", json={field: misses}, headers=api_headers(),
+                                 timeout=15, idempotent=True)
+        resp.raise_for_status()
+        # Ensure response is decoded as UTF-8
+        resp.encoding = 'utf-8'
+        api_response = decode_json(resp)
+        if conversion_items(api_response) is None:
+            # Not the documented results array: nothing is learned, the backend answer is passed along
+            result["backend_response"] = api_response
+        else:
+            fetched = extract_conversion(api_response, misses, by)
+            pairs = fetched.items() if by == "user_id" else ((user_id, number) for number, user_id in fetched.items())
+            server.id_map.add_pairs(pairs)
+            known = lookup()
+
+    return {
+        "results": [{by: value, other: known.get(str(value)), "found": str(value) in known} for value in values],
+        "resolved_locally": resolved_locally,
+        "fetched": len(known) - resolved_locally,
+        **result,
+    }
+
+async def convert_numbers_to_ids(server: Any, params: ConvertNumbersToIdsParams, call: ToolCall) -> Any:
+    return await convert_users(server, "/users/convert_numbers_to_ids", "number", params.numbers)
+
+async def convert_ids_to_numbers(server: Any, params: ConvertIdsToNumbersParams, call: ToolCall) -> Any:
+    return await convert_users(server, "/users/convert_ids_to_numbers", "user_id", params.ids)
+
+async def get_bot_impressions_batch(server: Any, params: GetBotImpressionsBatchParams, call: ToolCall) -> Any:
+    async def fetch_one(user_id: int) -> Any:
+        # Same URL and cache entry as get_bot_impressions
+        return await server.cached_get(
+            "get_bot_impressions",
+            f"{AIHEHUO_API_BASE}{BOT_IMPRESSIONS_PATH}",
+            params={"user_id": user_id},
+            as_text=True
+        )
+
+    return server.batch_result(await server.batch_fetch(params.user_ids, fetch_one))
+
+# @api {post} /bps 上传商业计划书 PDF
+# @apiName CreateBp
+# @apiGroup Bp
+# @apiVersion 1.0.0
+# @apiDescription 上传商业计划书 PDF 文件并自动转换为图片（最多前15页）
+# @apiHeader {String} Authorization Bearer token（JWT 认证必填）
+# @apiParam (multipart/form-data) {File} file 商业计划书 PDF 文件（必填）
+# @apiParamExample {curl} 请求示例:
+#   curl -X POST https://new-api.aihehuo.com/micro/bps \
+#     -H "Authorization: Bearer YOUR_JWT_TOKEN" \
+#     -F "file=@/path/to/business-plan.pdf"
+# @apiSuccess {Number} id BP记录ID
+# @apiSuccess {String} name 文件名
+# @apiSuccess {String} url PDF文件URL
+# @apiSuccess {Number} user_id 用户ID
+# @apiSuccess {String} excerpt_url PDF摘要URL（前15页）
+# @apiSuccess {String} job_id 图片转换任务ID（异步处理中）
+# @apiSuccess {Number} pages PDF总页数
+# @apiSuccessExample {json} 成功响应:
+#   HTTP/1.1 201 Created
+#   {
+#     "id": 123,
+#     "name": "business-plan.pdf",
+#     "url": "https://oss-qd.aihehuo.com/1234567890_business-plan.pdf",
+#     "user_id": 456,
+#     "excerpt_url": "https://oss-qd.aihehuo.com/1234567890_business-plan_2.pdf",
+#     "job_id": "abc123xyz",
+#     "pages": 25
+#   }
+# @apiError (Error 400) UploadFailed 文件上传失败
+# @apiError (Error 400) InvalidFileType 文件类型必须是 PDF
+# @apiError (Error 401) Unauthorized 未授权（缺少或无效的 JWT token）
+# @apiErrorExample {json} 错误响应:
+#   HTTP/1.1 400 Bad Request
+#   {
+#     "error": "文件类型必须是 PDF",
+#     "code": 0
+#   }
+# @apiNote
+#   - 上传后会自动创建前15页的PDF摘要
+#   - 摘要会异步转换为图片，可通过 job_id 或稍后查询 excerpt_images 字段获取结果
+#   - 图片转换任务会在后台延迟1分钟后开始轮询
+#   - PDF文本内容会自动解析并保存到 parsed_text 字段（后台异步处理）
+async def upload_business_plan(server: Any, params: UploadBusinessPlanParams, call: ToolCall) -> Any:
+    # Verify file exists
+    if not os.path.exists(params.file_path):
+        return file_not_found(params.file_path, "PDF file")
+
+    # Verify file is PDF
+    if not params.file_path.lower().endswith('.pdf'):
+        return {
+            "error": "Invalid file type",
+            "message": "文件类型必须是 PDF"
+        }
+
+    # Multipart upload to /micro/bps, chunked for large files, skipped for content uploaded before (see uploads.py)
+    return await send_file(server, "bps", params.file_path, 'application/pdf', call.progress_token)
+
+
+# === 工具注册表 ===
+def report_users_body(params: Any) -> Dict[str, Any]:
+    return {"user_ids": params.user_ids}
+
+def current_user_profile_key(params: Any) -> List[str]:
+    return [cache_key(f"{AIHEHUO_API_BASE}/users/{CURRENT_USER_ID}")]
+
+def notify_body(params: NotifyMentionedUsersParams) -> Dict[str, Any]:
+    payload = {
+        "intro_text": params.intro_text,
+        "force": params.force
+    }
+    # Add optional user_id if provided
+    if params.user_id is not None:
+        payload["user_id"] = params.user_id
+    return payload
+
+def bot_impressions_body(params: UpdateBotImpressionsParams) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {"user_id": params.user_id}
+    # Add optional fields if provided
+    if params.summary is not None:
+        payload["summary"] = params.summary
+    if params.tags is not None:
+        payload["tags"] = params.tags
+    return payload
+
+TOOLS = ToolRegistry([
+    ToolSpec(
+        name="server_info",
+        description="获取 MCP 服务信息（健康检查）",
+        params_model=ServerInfoParams,
+        handler=server_info
+    ),
+    ToolSpec(
+        name="server_metrics",
+        description="获取服务运行指标：各工具的调用次数、错误/超时/重试次数、后端状态码，以及分阶段耗时（validate 参数校验、network 等待后端、decode 解析 JSON、serialize 编码结果、total 总耗时）和结果大小的分位数；同时按后端端点汇总延迟和响应大小。耗时单位为毫秒",
+        params_model=ServerMetricsParams,
+        handler=server_metrics
+    ),
+    ToolSpec(
+        name="search_members",
+        description="搜索爱合伙平台上的创业者/会员。使用向量语义搜索，建议使用语义连贯的长句描述，避免简单关键词罗列",
+        params_model=SearchMembersParams,
+        handler=search_members,
+        validate=check_query_length,
+        on_error=search_error
+    ),
+    ToolSpec(
+        name="multi_search_members",
+        description="一次并发执行多个语义搜索查询（如为同一创业者分别寻找技术合伙人、增长负责人、投资人），按倒数排名融合或分数归一化合并、按id去重，返回带有每个查询来源与排名的单一排序列表",
+        params_model=MultiSearchMembersParams,
+        handler=multi_search_members,
+        validate=check_queries_length,
+        error_fields=[("queries", [])],
+        error_message="Failed to run multi search"
+    ),
+    ToolSpec(
+        name="search_ideas",
+        description="搜索爱合伙平台上的创业想法/项目。使用向量语义搜索，建议使用语义连贯的长句描述，避免简单关键词罗列",
+        params_model=SearchIdeasParams,
+        handler=search_ideas,
+        on_error=search_error
+    ),
+    ToolSpec(
+        name="get_group_info",
+        description="获取群组基本情况和群内所有成员数据（一次性获取所有用户）。数据会自动保存为Markdown文件到/tmp目录，返回文件路径。使用read_file工具读取文件内容。diff=true时额外返回与上次获取相比的群友变化",
+        params_model=GetGroupInfoParams,
+        handler=get_group_info,
+        error_fields=[("group_id", "unknown")],
+        error_message="Failed to fetch group information"
+    ),
+    ToolSpec(
+        name="update_bio",
+        description="更新用户简介",
+        params_model=UpdateBioParams,
+        method="PUT",
+        path="/users/update_bio",
+        body=lambda params: {"bio": params.bio},
+        invalidates=current_user_profile_key,
+        error_fields=[("bio", "")],
+        error_message="Failed to update user bio"
+    ),
+    ToolSpec(
+        name="update_goal",
+        description="更新用户目标",
+        params_model=UpdateGoalParams,
+        method="PUT",
+        path="/users/update_goal",
+        body=lambda params: {"goal": params.goal},
+        invalidates=current_user_profile_key,
+        error_fields=[("goal", "")],
+        error_message="Failed to update user goal"
+    ),
+    ToolSpec(
+        name="get_current_user_ideas",
+        description="获取当前用户的创业想法/项目",
+        params_model=GetCurrentUserIdeasParams,
+        path="/ideas/my_ideas",
+        body=lambda params: {"paginate": params.paginate},
+        requires_current_user=True,
+        on_error=current_user_error("Failed to fetch current user ideas")
+    ),
+    ToolSpec(
+        name="get_idea_details",
+        description="获取指定想法/项目的详细信息",
+        params_model=GetIdeaDetailsParams,
+        path="/ideas/{idea_id}",
+        cache_policy="get_idea_details",
+        error_fields=[("idea_id", "unknown")],
+        error_message="Failed to fetch idea details"
+    ),
+    ToolSpec(
+        name="get_ideas_details_batch",
+        description="批量获取多个想法/项目的详细信息（并发请求，自动去重，单个失败不影响其他结果）",
+        params_model=GetIdeasDetailsBatchParams,
+        handler=get_ideas_details_batch,
+        validate=check_batch_size("idea_ids"),
+        error_fields=[("idea_ids", [])],
+        error_message="Failed to fetch ideas details batch"
+    ),
+    ToolSpec(
+        name="get_current_user_profile",
+        description="获取当前用户完整资料信息",
+        params_model=GetCurrentUserParams,
+        path="/users/{current_user_id}",
+        cache_policy="get_current_user_profile",
+        requires_current_user=True,
+        on_error=current_user_error("Failed to fetch current user profile")
+    ),
+    ToolSpec(
+        name="fetch_new_users",
+        description="获取新用户列表，并发获取多页数据并合并（默认3页，每页50个用户）。撰写新增用户推荐文章时，用 render_wechat_article 生成正文HTML",
+        params_model=FetchNewUsersParams,
+        handler=fetch_new_users,
+        on_error=lambda arguments, exc: {
+            "error": str(exc),
+            "message": "Failed to fetch new users",
+            "total_users": 0,
+            "users": []
+        }
+    ),
+    ToolSpec(
+        name="get_user_details",
+        description="获取指定用户的详细信息",
+        params_model=GetUserDetailsParams,
+        path="/users/{user_id}",
+        cache_policy="get_user_details",
+        shape=shape_user_details,
+        error_fields=[("user_id", "unknown")],
+        error_message="Failed to fetch user details"
+    ),
+    ToolSpec(
+        name="get_users_details_batch",
+        description="批量获取多个用户的详细信息（并发请求，自动去重，单个失败不影响其他结果）",
+        params_model=GetUsersDetailsBatchParams,
+        handler=get_users_details_batch,
+        validate=check_batch_size("user_ids"),
+        error_fields=[("user_ids", [])],
+        error_message="Failed to fetch users details batch"
+    ),
+    ToolSpec(
+        name="get_wechat_data",
+        description="获取指定用户的微信相关数据，包括微信备注名、加入的微信群组列表、群组昵称等",
+        params_model=GetWechatDataParams,
+        path="/users/get_wechat_data",
+        query=lambda params: {"user_id": params.user_id},
+        cache_policy="get_wechat_data",
+        error_fields=[("user_id", "unknown")],
+        error_message="Failed to fetch wechat data"
+    ),
+    ToolSpec(
+        name="upload_file",
+        description="上传文件到云存储，支持图片、视频、文档等多种文件类型。返回上传后的文件URL",
+        params_model=UploadFileParams,
+        handler=upload_file,
+        error_fields=[("file_path", "unknown")],
+        error_message="Failed to upload file"
+    ),
+    ToolSpec(
+        name="render_wechat_article",
+        description="按爱合伙创业者推荐文章模板在本地生成微信文章正文HTML：只需提供标题、数据概览、创始人卡片、合伙人卡片和数据观察等结构化内容，样式由模板统一生成，内容会自动转义，空的可选部分整块省略。返回HTML文件路径，将其作为 body_file 传给 submit_wechat_article_draft 提交草稿",
+        params_model=RenderWechatArticleParams,
+        handler=render_wechat_article,
+        error_fields=[("title", "")],
+        error_message="Failed to render WeChat article"
+    ),
+    ToolSpec(
+        name="submit_wechat_article_draft",
+        description="提交微信文章草稿。注意：文章正文不能包含超链接（<a>标签）。支持直接提供HTML内容或提供HTML文件路径。"
+                    f"提交前会在本地检查超链接、未替换的模板【占位符】和正文大小（上限{WECHAT_ARTICLE_MAX_BYTES}字节），有问题时直接返回问题列表",
+        params_model=SubmitWechatArticleDraftParams,
+        handler=submit_wechat_article_draft,
+        validate=check_article_body,
+        error_fields=[("title", "")],
+        error_message="Failed to submit WeChat article draft"
+    ),
+    ToolSpec(
+        name="create_ai_report",
+        description="创建AI生成的报告并在官网展示。与微信文章不同，报告可以包含超链接，并可以关联提及的用户和项目。必须提供HTML文件路径",
+        params_model=CreateAIReportParams,
+        handler=create_ai_report,
+        error_fields=[("title", "")],
+        error_message="Failed to create AI report"
+    ),
+    ToolSpec(
+        name="update_ai_report",
+        description="更新已存在的AI报告。可以更新报告的标题、摘要、正文。必须提供HTML文件路径",
+        params_model=UpdateAIReportParams,
+        handler=update_ai_report,
+        error_fields=[("report_id", ""), ("title", "")],
+        error_message="Failed to update AI report"
+    ),
+    ToolSpec(
+        name="get_ai_report",
+        description="获取指定AI报告的详细信息。返回报告的基本信息，包括标题、摘要、关联的用户和项目ID、已确认用户ID",
+        params_model=GetAIReportParams,
+        path="/ai_reports/{report_id}",
+        timeout=30,
+        shape=shape_ai_report,
+        error_fields=[("report_id", "")],
+        error_message="Failed to get AI report"
+    ),
+    ToolSpec(
+        name="notify_mentioned_users",
+        description="通知AI报告中提及的用户。向报告中关联的用户发送通知消息。可以通知所有提及的用户，也可以只通知指定的单个用户",
+        params_model=NotifyMentionedUsersParams,
+        method="POST",
+        path="/micro/ai_reports/{report_id}/notify_mentioned_users",
+        body=notify_body,
+        timeout=30,
+        error_fields=[("report_id", ""), ("intro_text", "")],
+        error_message="Failed to notify mentioned users"
+    ),
+    ToolSpec(
+        name="submit_confirmed_users",
+        description="提交已确认阅读报告的用户ID。这些用户将永远不会再收到该报告的通知，即使使用force=true也不会通知",
+        params_model=SubmitConfirmedUsersParams,
+        method="POST",
+        path="/micro/ai_reports/{report_id}/submit_confirmed_users",
+        body=report_users_body,
+        timeout=30,
+        error_fields=[("report_id", ""), ("user_ids", [])],
+        error_message="Failed to submit confirmed users"
+    ),
+    ToolSpec(
+        name="add_mentioned_users",
+        description="向AI报告的mentioned_user_ids列表中添加用户ID",
+        params_model=AddMentionedUsersParams,
+        method="POST",
+        path="/micro/ai_reports/{report_id}/add_mentioned_users",
+        body=report_users_body,
+        timeout=30,
+        error_fields=[("report_id", ""), ("user_ids", [])],
+        error_message="Failed to add mentioned users"
+    ),
+    ToolSpec(
+        name="remove_mentioned_users",
+        description="从AI报告的mentioned_user_ids列表中移除用户ID",
+        params_model=RemoveMentionedUsersParams,
+        method="POST",
+        path="/micro/ai_reports/{report_id}/remove_mentioned_users",
+        body=report_users_body,
+        timeout=30,
+        error_fields=[("report_id", ""), ("user_ids", [])],
+        error_message="Failed to remove mentioned users"
+    ),
+    ToolSpec(
+        name="submit_rejected_users",
+        description="提交已拒绝阅读报告的用户ID。这些用户将永远不会再收到该报告的通知，即使使用force=true也不会通知",
+        params_model=SubmitRejectedUsersParams,
+        method="POST",
+        path="/micro/ai_reports/{report_id}/submit_rejected_users",
+        body=report_users_body,
+        timeout=30,
+        error_fields=[("report_id", ""), ("user_ids", [])],
+        error_message="Failed to submit rejected users"
+    ),
+    ToolSpec(
+        name="convert_numbers_to_ids",
+        description="将用户编号数组转换为用户ID数组。根据用户编号查找对应的用户ID，按请求顺序返回 results 数组（number、user_id、found，未找到时 user_id 为 null），以及本地解析数 resolved_locally 和后端查询数 fetched；已知的对应关系在本地解析",
+        params_model=ConvertNumbersToIdsParams,
+        handler=convert_numbers_to_ids,
+        error_fields=[("numbers", [])],
+        error_message="Failed to convert numbers to IDs"
+    ),
+    ToolSpec(
+        name="convert_ids_to_numbers",
+        description="将用户ID数组转换为用户编号数组。根据用户ID查找对应的用户编号，按请求顺序返回 results 数组（user_id、number、found，未找到时 number 为 null），以及本地解析数 resolved_locally 和后端查询数 fetched；已知的对应关系在本地解析",
+        params_model=ConvertIdsToNumbersParams,
+        handler=convert_ids_to_numbers,
+        error_fields=[("ids", [])],
+        error_message="Failed to convert IDs to numbers"
+    ),
+    ToolSpec(
+        name="get_latest_24h_ideas",
+        description="获取过去24小时内最新发布的创业项目/想法。返回LLM优化的纯文本格式，便于AI分析和处理。自动过滤已删除和待审核的项目",
+        params_model=GetLatest24hIdeasParams,
+        path="/ideas/latest_24h",
+        query=lambda params: {
+            "paginate[page]": params.paginate.get("page", 1),
+            "paginate[per]": params.paginate.get("per", 10)
+        },
+        on_error=lambda arguments, exc: {
+            "error": str(exc),
+            "message": "Failed to fetch latest 24h ideas",
+            "paginate": arguments.get("paginate", {})
+        }
+    ),
+    ToolSpec(
+        name="get_bot_impressions",
+        description="获取指定用户的 Bot Impression 信息",
+        params_model=GetBotImpressionsParams,
+        path=BOT_IMPRESSIONS_PATH,
+        query=lambda params: {"user_id": params.user_id},
+        response="text",
+        cache_policy="get_bot_impressions",
+        error_fields=[("user_id", "unknown")],
+        error_message="Failed to fetch bot impressions"
+    ),
+    ToolSpec(
+        name="get_bot_impressions_batch",
+        description="批量获取多个用户的 Bot Impression 信息（并发请求，自动去重，单个失败不影响其他结果）",
+        params_model=GetBotImpressionsBatchParams,
+        handler=get_bot_impressions_batch,
+        validate=check_batch_size("user_ids"),
+        error_fields=[("user_ids", [])],
+        error_message="Failed to fetch bot impressions batch"
+    ),
+    ToolSpec(
+        name="update_bot_impressions",
+        description="更新指定用户的 Bot Impression 信息",
+        params_model=UpdateBotImpressionsParams,
+        method="POST",
+        path="/micro/bot_impressions/update_by_user",
+        body=bot_impressions_body,
+        response="text",
+        validate=check_bot_impressions_update,
+        invalidates=lambda params: [cache_key(f"{AIHEHUO_API_BASE}{BOT_IMPRESSIONS_PATH}", {"user_id": params.user_id})],
+        error_fields=[("user_id", "unknown"), ("summary", None), ("tags", None)],
+        error_message="Failed to update bot impressions"
+    ),
+    ToolSpec(
+        name="upload_business_plan",
+        description="上传商业计划书 PDF 文件并自动转换为图片（最多前15页）",
+        params_model=UploadBusinessPlanParams,
+        handler=upload_business_plan,
+        response="text",
+        error_fields=[("file_path", "unknown")],
+        error_message="Failed to upload business plan"
+    ),
+])
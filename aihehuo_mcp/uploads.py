@@ -0,0 +1,270 @@
+# uploads.py
+"""
+File uploads for upload_file and upload_business_plan.
+
+Files at or above AIHEHUO_CHUNKED_UPLOAD_THRESHOLD are sent in chunks when
+AIHEHUO_CHUNKED_UPLOADS=1. Chunks are read from disk one at a time and
+checksummed, and an interrupted upload of the same file resumes with the
+parts the backend has not acknowledged. The chunk protocol lives under
+{AIHEHUO_API_BASE}/micro/uploads:
+
+    POST /micro/uploads                 {"target", "filename", "content_type", "size", "chunk_size"}
+                                        -> {"upload_id", "chunk_size", "parallel", "parts": []}
+    GET  /micro/uploads/{id}            -> the same shape, parts = acknowledged parts
+    PUT  /micro/uploads/{id}/parts/{n}  raw bytes + X-Content-SHA256 -> {"part", "size", "sha256"}
+    POST /micro/uploads/{id}/complete   {"parts": [{"part", "sha256"}]}
+                                        -> the body the one-shot endpoint would have returned
+
+Parts are numbered from 1; part n covers bytes [(n - 1) * chunk_size, n * chunk_size).
+Parts go up in parallel only when the session says "parallel": true. A
+backend that answers the first POST with 404/405/501 does not speak the
+protocol and the file is sent as one multipart request instead.
+local_upload_server.py at the repository root implements the protocol.
+
+With AIHEHUO_UPLOAD_DEDUP (on by default) every upload is indexed by the
+SHA-256 of its content, per target and account, and uploading the same
+content again returns the recorded response without sending the file.
+"""
+import asyncio
+import hashlib
+import json
+import os
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from .config import (
+    AIHEHUO_API_BASE,
+    AIHEHUO_API_KEY,
+    CHUNKED_UPLOAD_THRESHOLD,
+    CHUNKED_UPLOADS,
+    UPLOAD_CHUNK_SIZE,
+    UPLOAD_CONCURRENCY,
+    UPLOAD_DEDUP,
+    UPLOAD_DEDUP_TTL,
+    UPLOAD_DEDUP_VERIFY,
+    UPLOAD_PART_TIMEOUT,
+)
+from .http_client import api_headers, api_request, decode_json, get_client
+from .multipart import MultipartBody
+
+if TYPE_CHECKING:
+    import httpx
+
+UPLOADS_PATH = "/micro/uploads"
+UNSUPPORTED_STATUSES = frozenset({404, 405, 501})
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# target -> (one-shot endpoint, timeout in seconds)
+UPLOAD_TARGETS = {
+    "upload": ("/micro/upload", 60),
+    "bps": ("/micro/bps", 300),
+}
+
+# Set once the backend has answered that it has no chunk protocol
+_chunking_unsupported = False
+
+
+class ChunkedUploadUnsupported(Exception):
+    """后端不支持分块上传协议"""
+
+
+class UploadIntegrityError(Exception):
+    """后端确认的分块校验和与本地不一致"""
+
+
+def file_fingerprint(file_path: str) -> str:
+    """文件路径、大小和修改时间：文件被修改后指纹随之改变，不会续传旧会话或沿用旧哈希"""
+    stat = os.stat(file_path)
+    return f"{os.path.abspath(file_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def upload_scope(target: str) -> str:
+    """去重范围：同一内容在不同后端或账号下各自上传（上传结果如 BP id 属于上传它的账号）"""
+    account = hashlib.sha256(AIHEHUO_API_KEY.encode("utf-8")).hexdigest()[:16]
+    return f"{target}:{AIHEHUO_API_BASE}:{account}"
+
+
+def read_chunk(file_path: str, offset: int, length: int) -> bytes:
+    with open(file_path, "rb") as f:
+        f.seek(offset)
+        return f.read(length)
+
+
+async def _create_session(target: str, file_path: str, content_type: str, size: int) -> Dict[str, Any]:
+    resp = await api_request("POST", f"{AIHEHUO_API_BASE}{UPLOADS_PATH}", headers=api_headers(), timeout=30, json={
+        "target": target,
+        "filename": os.path.basename(file_path),
+        "content_type": content_type,
+        "size": size,
+        "chunk_size": UPLOAD_CHUNK_SIZE,
+    })
+    if resp.status_code in UNSUPPORTED_STATUSES:
+        raise ChunkedUploadUnsupported(f"{UPLOADS_PATH} answered {resp.status_code}")
+    resp.raise_for_status()
+    return decode_json(resp)
+
+
+async def _session_status(upload_id: str) -> Optional[Dict[str, Any]]:
+    """查询会话已确认的分块，后端已不认识该会话时返回 None"""
+    resp = await api_request("GET", f"{AIHEHUO_API_BASE}{UPLOADS_PATH}/{upload_id}", headers=api_headers(), timeout=30)
+    if resp.status_code == 404:
+        return None
+    resp.raise_for_status()
+    return decode_json(resp)
+
+
+async def chunked_upload(server: Any, target: str, file_path: str, content_type: str,
+                         progress_token: Any = None) -> "httpx.Response":
+    """分块上传文件，返回 complete 请求的响应；后端不支持时抛出 ChunkedUploadUnsupported"""
+    size = os.path.getsize(file_path)
+    fingerprint = f"{target}:{file_fingerprint(file_path)}"
+    session = None
+    upload_id = server.upload_sessions.get(fingerprint)
+    if upload_id is not None:
+        session = await _session_status(upload_id)
+        if session is None:
+            server.upload_sessions.forget(fingerprint)
+    if session is None:
+        session = await _create_session(target, file_path, content_type, size)
+        server.upload_sessions.put(fingerprint, session["upload_id"])
+
+    upload_id = session["upload_id"]
+    chunk_size = int(session.get("chunk_size") or UPLOAD_CHUNK_SIZE)
+    part_count = max(1, -(-size // chunk_size))
+    acknowledged = {int(part["part"]): part.get("sha256") for part in session.get("parts") or []}
+    checksums: Dict[int, str] = {}
+    # Sequential unless the backend accepts parts out of order
+    slots = asyncio.Semaphore(UPLOAD_CONCURRENCY if session.get("parallel") else 1)
+    sent = 0
+
+    async def upload_part(number: int) -> None:
+        nonlocal sent
+        offset = (number - 1) * chunk_size
+        length = min(chunk_size, size - offset)
+        async with slots:
+            # Only the chunks being sent are held in memory
+            data = await asyncio.to_thread(read_chunk, file_path, offset, length)
+            digest = hashlib.sha256(data).hexdigest()
+            if acknowledged.get(number) != digest:
+                headers = {**api_headers(json_body=False), "Content-Type": "application/octet-stream",
+                           "X-Content-SHA256": digest}
+                resp = await api_request("PUT", f"{AIHEHUO_API_BASE}{UPLOADS_PATH}/{upload_id}/parts/{number}",
+                                         content=data, headers=headers, timeout=UPLOAD_PART_TIMEOUT,
+                                         idempotent=True)
+                resp.raise_for_status()
+                confirmed = decode_json(resp).get("sha256")
+                if confirmed is not None and confirmed != digest:
+                    raise UploadIntegrityError(f"part {number}: backend stored {confirmed}, sent {digest}")
+        checksums[number] = digest
+        sent += length
+        server.send_progress(progress_token, sent, size, f"已上传 {sent}/{size} 字节")
+
+    tasks = [asyncio.ensure_future(upload_part(number)) for number in range(1, part_count + 1)]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    resp = await api_request("POST", f"{AIHEHUO_API_BASE}{UPLOADS_PATH}/{upload_id}/complete",
+                             headers=api_headers(), timeout=UPLOAD_PART_TIMEOUT, json={
+                                 "parts": [{"part": number, "sha256": checksums[number]}
+                                           for number in range(1, part_count + 1)]
+                             })
+    resp.raise_for_status()
+    server.upload_sessions.forget(fingerprint)
+    return resp
+
+
+async def content_digest(server: Any, file_path: str) -> str:
+    """文件内容的 SHA-256，未修改的文件直接取上次的计算结果"""
+    fingerprint = file_fingerprint(file_path)
+    digest = server.upload_index.digest_for(fingerprint)
+    if digest is None:
+        digest = await asyncio.to_thread(file_sha256, file_path)
+        server.upload_index.remember_digest(fingerprint, digest)
+    return digest
+
+
+def _recorded_url(body: str) -> Optional[str]:
+    """记录的响应体中的文件 url（顶层或 data 下），没有时返回 None"""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None
+    if isinstance(data, dict) and isinstance(data.get("data"), dict) and "url" not in data:
+        data = data["data"]
+    url = data.get("url") if isinstance(data, dict) else None
+    return url if isinstance(url, str) and url.startswith(("http://", "https://")) else None
+
+
+async def _still_available(url: str) -> bool:
+    # The url is on the storage/CDN host, not the backend: plain pooled client, without the backend's
+    # rate limits, breakers and retries; any failure just means the file is uploaded again
+    try:
+        resp = await get_client().head(url, timeout=10)
+    except Exception:
+        return False
+    return resp.status_code < 400
+
+
+async def previous_upload(server: Any, target: str, digest: str) -> Optional[str]:
+    """相同内容已上传过时返回记录的响应体（启用校验时 url 已不可访问的记录会被删除）"""
+    scope = upload_scope(target)
+    body = server.upload_index.lookup(scope, digest, UPLOAD_DEDUP_TTL)
+    if body is None:
+        return None
+    if UPLOAD_DEDUP_VERIFY:
+        url = _recorded_url(body)
+        if url is not None and not await _still_available(url):
+            server.upload_index.forget(scope, digest)
+            return None
+    return body
+
+
+async def _send(server: Any, target: str, file_path: str, content_type: str,
+                progress_token: Any) -> "httpx.Response":
+    global _chunking_unsupported
+    if CHUNKED_UPLOADS and not _chunking_unsupported and os.path.getsize(file_path) >= CHUNKED_UPLOAD_THRESHOLD:
+        try:
+            return await chunked_upload(server, target, file_path, content_type, progress_token)
+        except ChunkedUploadUnsupported:
+            _chunking_unsupported = True
+
+    path, timeout = UPLOAD_TARGETS[target]
+    body = MultipartBody({}, "file", os.path.basename(file_path), content_type, path=file_path)
+    headers = {**api_headers(json_body=False), **body.headers}
+    return await api_request("POST", f"{AIHEHUO_API_BASE}{path}", headers=headers, content=body, timeout=timeout)
+
+
+async def send_file(server: Any, target: str, file_path: str, content_type: str,
+                    progress_token: Any = None) -> str:
+    """上传文件到 target 对应的端点，返回响应体文本
+
+    大文件在启用时分块续传，否则一次性 multipart 上传（见 multipart.py，按块流式读取）；
+    启用去重时相同内容不再上传，直接返回上次的响应体。
+    """
+    digest = None
+    if UPLOAD_DEDUP:
+        digest = await content_digest(server, file_path)
+        body = await previous_upload(server, target, digest)
+        if body is not None:
+            size = os.path.getsize(file_path)
+            server.send_progress(progress_token, size, size, "相同内容已上传过，使用上次的上传结果")
+            return body
+
+    resp = await _send(server, target, file_path, content_type, progress_token)
+    resp.raise_for_status()
+    # Ensure response is decoded as UTF-8
+    resp.encoding = 'utf-8'
+    if digest is not None:
+        server.upload_index.record(upload_scope(target), digest, os.path.getsize(file_path), resp.text)
+    return resp.text
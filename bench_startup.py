@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the aihehuo-mcp server.
+
+Spawns the server repeatedly and measures the time from process start to the
+initialize response and to the tools/list response, then checks that
+importing the server does not pull in modules that are only needed once a
+tool runs. Exits with status 1 when a budget is exceeded, so it can guard
+against cold-start regressions. The default budgets leave room for slow CI
+machines; pass tighter ones (or 0 to disable a budget):
+
+    python bench_startup.py --runs 10 --max-initialize-ms 250
+
+The server runs with AIHEHUO_CACHE_DIR pointed at a temporary directory,
+so the benchmark leaves the real cache untouched.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Modules that must stay out of the import path of initialize
+DEFERRED_MODULES = ["pydantic", "httpx", "aihehuo_mcp.tools", "aihehuo_mcp.models", "aihehuo_mcp.templates"]
+
+# Default budgets (median ms); about twice what a warm run takes on a laptop
+DEFAULT_MAX_INITIALIZE_MS = 500
+DEFAULT_MAX_TOOLS_LIST_MS = 1500
+
+
+def read_response(process: subprocess.Popen, request_id: int) -> dict:
+    while True:
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError(f"server exited before answering request {request_id}: {process.stderr.read()}")
+        message = json.loads(line)
+        if message.get("id") == request_id:
+            return message
+
+
+def measure_once(env: dict) -> tuple:
+    """启动一次服务，返回 (initialize 耗时, tools/list 耗时)，单位毫秒"""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "aihehuo_mcp.server"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        env=env,
+    )
+    try:
+        process.stdin.write(json.dumps({"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}}) + "\n")
+        process.stdin.flush()
+        read_response(process, 1)
+        initialize_ms = (time.perf_counter() - start) * 1000
+
+        process.stdin.write(json.dumps({"jsonrpc": "2.0", "id": 2, "method": "tools/list", "params": {}}) + "\n")
+        process.stdin.flush()
+        tools = read_response(process, 2)["result"]["tools"]
+        tools_list_ms = (time.perf_counter() - start) * 1000
+        if not tools:
+            raise RuntimeError("tools/list returned no tools")
+    finally:
+        process.stdin.close()
+        process.wait(timeout=10)
+    return initialize_ms, tools_list_ms
+
+
+def eager_imports(env: dict) -> list:
+    """返回导入 aihehuo_mcp.server 时被一并加载的延迟模块"""
+    code = (
+        "import json, sys; import aihehuo_mcp.server; "
+        f"print(json.dumps([m for m in {DEFERRED_MODULES!r} if m in sys.modules]))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    return json.loads(output.stdout)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-initialize-ms", type=float, default=DEFAULT_MAX_INITIALIZE_MS,
+                        help="fail when the median time to the initialize response exceeds this "
+                             f"(default {DEFAULT_MAX_INITIALIZE_MS}, 0 disables)")
+    parser.add_argument("--max-tools-list-ms", type=float, default=DEFAULT_MAX_TOOLS_LIST_MS,
+                        help="fail when the median time to the tools/list response exceeds this "
+                             f"(default {DEFAULT_MAX_TOOLS_LIST_MS}, 0 disables)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="aihehuo-mcp-bench-") as cache_dir:
+        # The benchmark never reaches the backend; the key only has to be present
+        env = dict(os.environ, AIHEHUO_API_KEY=os.environ.get("AIHEHUO_API_KEY", "bench"), AIHEHUO_CACHE_DIR=cache_dir)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(__file__)), env.get("PYTHONPATH")]))
+        return run(args, env)
+
+
+def run(args: argparse.Namespace, env: dict) -> int:
+    measure_once(env)  # warm the bytecode and OS file caches
+    samples = [measure_once(env) for _ in range(args.runs)]
+    initialize = statistics.median(s[0] for s in samples)
+    tools_list = statistics.median(s[1] for s in samples)
+    print(f"initialize: median {initialize:.1f} ms, min {min(s[0] for s in samples):.1f} ms")
+    print(f"tools/list: median {tools_list:.1f} ms, min {min(s[1] for s in samples):.1f} ms")
+
+    failures = []
+    eager = eager_imports(env)
+    if eager:
+        failures.append(f"importing the server loads deferred modules: {', '.join(eager)}")
+    if args.max_initialize_ms and initialize > args.max_initialize_ms:
+        failures.append(f"initialize median {initialize:.1f} ms > {args.max_initialize_ms} ms")
+    if args.max_tools_list_ms and tools_list > args.max_tools_list_ms:
+        failures.append(f"tools/list median {tools_list:.1f} ms > {args.max_tools_list_ms} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
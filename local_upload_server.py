@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the backend upload endpoints, for testing uploads.
+
+Implements the chunked upload protocol described in aihehuo_mcp/uploads.py
+plus the one-shot multipart endpoints /micro/upload and /micro/bps, and
+serves stored files under /files/ (for AIHEHUO_UPLOAD_DEDUP_VERIFY). Point
+the server at it and enable chunking:
+
+    python local_upload_server.py --port 8780 --fail-after 3 --fail-count 5
+    AIHEHUO_API_BASE=http://127.0.0.1:8780 AIHEHUO_CHUNKED_UPLOADS=1 \\
+        AIHEHUO_CHUNKED_UPLOAD_THRESHOLD=0 python -m aihehuo_mcp.server
+
+--fail-after / --fail-count make part uploads fail with 503 after a number
+of successful parts, to exercise retries and resuming; --sequential makes
+sessions refuse out-of-order parts; --no-chunking answers 404 like a backend
+without the protocol.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SESSION_PATH = re.compile(r"^/micro/uploads/([0-9a-f]+)$")
+PART_PATH = re.compile(r"^/micro/uploads/([0-9a-f]+)/parts/(\d+)$")
+COMPLETE_PATH = re.compile(r"^/micro/uploads/([0-9a-f]+)/complete$")
+
+
+class UploadStore:
+    """会话保存在内存中，分块写入 directory/<upload_id>/ 目录"""
+
+    def __init__(self, directory: str, chunk_size: int, parallel: bool):
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.parallel = parallel
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.part_requests = 0
+
+    def create(self, request: dict) -> dict:
+        upload_id = uuid.uuid4().hex
+        chunk_size = self.chunk_size or int(request.get("chunk_size") or 5 * 1024 * 1024)
+        session = {
+            "upload_id": upload_id,
+            "target": request.get("target", "upload"),
+            "filename": request.get("filename", "file"),
+            "size": int(request["size"]),
+            "chunk_size": chunk_size,
+            "parallel": self.parallel,
+            "parts": {},
+        }
+        os.makedirs(os.path.join(self.directory, upload_id))
+        with self.lock:
+            self.sessions[upload_id] = session
+        return self.describe(session)
+
+    @staticmethod
+    def describe(session: dict) -> dict:
+        return {
+            "upload_id": session["upload_id"],
+            "chunk_size": session["chunk_size"],
+            "parallel": session["parallel"],
+            "parts": [{"part": n, **part} for n, part in sorted(session["parts"].items())],
+        }
+
+    def part_path(self, upload_id: str, number: int) -> str:
+        return os.path.join(self.directory, upload_id, f"part-{number:06d}")
+
+    def assemble(self, session: dict, parts: list) -> str:
+        path = os.path.join(self.directory, f"{session['upload_id']}-{os.path.basename(session['filename'])}")
+        with open(path, "wb") as out:
+            for part in parts:
+                with open(self.part_path(session["upload_id"], part["part"]), "rb") as f:
+                    out.write(f.read())
+        return path
+
+
+class Handler(BaseHTTPRequestHandler):
+    store: UploadStore
+    args: argparse.Namespace
+
+    def log_message(self, fmt, *args):
+        if not self.args.quiet:
+            super().log_message(fmt, *args)
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _send(self, status: int, payload) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stored_file(self, target: str, path: str, size: int) -> dict:
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        return {"url": f"http://{self.headers.get('Host')}/files/{os.path.basename(path)}",
+                "target": target, "size": size, "sha256": digest}
+
+    def _stored_path(self):
+        name = os.path.basename(self.path[len("/files/"):]) if self.path.startswith("/files/") else ""
+        path = os.path.join(self.store.directory, name)
+        return path if name and os.path.isfile(path) else None
+
+    def do_HEAD(self):
+        path = self._stored_path()
+        self.send_response(200 if path else 404)
+        self.send_header("Content-Length", str(os.path.getsize(path) if path else 0))
+        self.end_headers()
+
+    def do_GET(self):
+        path = self._stored_path()
+        if path is not None:
+            with open(path, "rb") as f:
+                data = f.read()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        match = SESSION_PATH.match(self.path)
+        session = self.store.sessions.get(match.group(1)) if match else None
+        if session is None:
+            return self._send(404, {"error": "not found"})
+        self._send(200, self.store.describe(session))
+
+    def do_PUT(self):
+        match = PART_PATH.match(self.path)
+        session = self.store.sessions.get(match.group(1)) if match else None
+        data = self._body()
+        if session is None:
+            return self._send(404, {"error": "unknown upload"})
+        number = int(match.group(2))
+        with self.store.lock:
+            self.store.part_requests += 1
+            attempt = self.store.part_requests
+        if self.args.fail_after is not None and self.args.fail_after < attempt <= self.args.fail_after + self.args.fail_count:
+            return self._send(503, {"error": "injected failure"})
+        if not session["parallel"] and number != len(session["parts"]) + 1 and number not in session["parts"]:
+            return self._send(409, {"error": f"expected part {len(session['parts']) + 1}"})
+        digest = hashlib.sha256(data).hexdigest()
+        claimed = self.headers.get("X-Content-SHA256")
+        if claimed and claimed != digest:
+            return self._send(400, {"error": "checksum mismatch", "sha256": digest})
+        with open(self.store.part_path(session["upload_id"], number), "wb") as f:
+            f.write(data)
+        session["parts"][number] = {"size": len(data), "sha256": digest}
+        self._send(200, {"part": number, "size": len(data), "sha256": digest})
+
+    def do_POST(self):
+        body = self._body()
+        if self.path == "/micro/uploads":
+            if self.args.no_chunking:
+                return self._send(404, {"error": "not found"})
+            return self._send(201, self.store.create(json.loads(body)))
+        match = COMPLETE_PATH.match(self.path)
+        if match:
+            session = self.store.sessions.get(match.group(1))
+            if session is None:
+                return self._send(404, {"error": "unknown upload"})
+            parts = json.loads(body)["parts"]
+            for part in parts:
+                stored = session["parts"].get(part["part"])
+                if stored is None or stored["sha256"] != part["sha256"]:
+                    return self._send(400, {"error": f"part {part['part']} missing or different"})
+            path = self.store.assemble(session, parts)
+            if os.path.getsize(path) != session["size"]:
+                return self._send(400, {"error": "size mismatch", "size": os.path.getsize(path)})
+            del self.store.sessions[session["upload_id"]]
+            return self._send(200, self._stored_file(session["target"], path, session["size"]))
+        if self.path in ("/micro/upload", "/micro/bps"):
+            # One-shot multipart upload
+            message = BytesParser(policy=HTTP).parsebytes(
+                b"Content-Type: " + self.headers.get("Content-Type", "").encode("latin-1") + b"\r\n\r\n" + body
+            )
+            for part in message.iter_parts():
+                if part.get_param("name", header="content-disposition") == "file":
+                    filename = os.path.basename(part.get_filename() or "file")
+                    path = os.path.join(self.store.directory, f"{uuid.uuid4().hex}-{filename}")
+                    data = part.get_payload(decode=True)
+                    with open(path, "wb") as f:
+                        f.write(data)
+                    target = "bps" if self.path == "/micro/bps" else "upload"
+                    return self._send(200, self._stored_file(target, path, len(data)))
+            return self._send(400, {"error": "missing file field"})
+        self._send(404, {"error": "not found"})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8780)
+    parser.add_argument("--dir", default=None, help="where parts and assembled files are written (default: a temp dir)")
+    parser.add_argument("--chunk-size", type=int, default=0, help="override the chunk size the client asks for")
+    parser.add_argument("--sequential", action="store_true", help="sessions only accept parts in order")
+    parser.add_argument("--no-chunking", action="store_true", help="answer 404 to the chunk protocol")
+    parser.add_argument("--fail-after", type=int, default=None, help="fail part uploads after this many requests")
+    parser.add_argument("--fail-count", type=int, default=1, help="how many part requests fail")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    directory = args.dir or tempfile.mkdtemp(prefix="aihehuo-uploads-")
+    os.makedirs(directory, exist_ok=True)
+    Handler.store = UploadStore(directory, args.chunk_size, parallel=not args.sequential)
+    Handler.args = args
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    print(f"Upload stand-in on http://127.0.0.1:{args.port}, files in {directory}", flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
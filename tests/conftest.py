@@ -0,0 +1,10 @@
+# conftest.py
+"""
+Shared setup for the regression tests: every persistent store goes to a
+temporary AIHEHUO_CACHE_DIR, so the suite never touches ~/.cache.
+"""
+import os
+import tempfile
+
+# Read by aihehuo_mcp.config at import time, so it has to be set before any test module imports the package
+os.environ["AIHEHUO_CACHE_DIR"] = tempfile.mkdtemp(prefix="aihehuo-mcp-tests-")
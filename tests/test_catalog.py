@@ -0,0 +1,60 @@
+# test_catalog.py
+"""
+initialize etags (catalog.py): never computed on the initialize path; the warm-up that
+computes them reports its failures.
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_server(cache_dir: str, *requests: dict) -> list:
+    env = dict(os.environ, AIHEHUO_CACHE_DIR=cache_dir, AIHEHUO_API_KEY="test", PYTHONPATH=ROOT)
+    stdin = "".join(json.dumps({"jsonrpc": "2.0", "id": i, **request}) + "\n" for i, request in enumerate(requests, 1))
+    output = subprocess.run([sys.executable, "-m", "aihehuo_mcp.server"], input=stdin, capture_output=True,
+                            text=True, env=env, timeout=60, check=True)
+    return [json.loads(line) for line in output.stdout.splitlines()]
+
+
+def test_initialize_does_not_import_the_tool_table(tmp_path):
+    code = (
+        "import asyncio, json, sys; from aihehuo_mcp.server import AihehuoMCPServer; "
+        "response = asyncio.run(AihehuoMCPServer().handle_request({'jsonrpc': '2.0', 'id': 1, 'method': 'initialize'})); "
+        "print(json.dumps([response['result'].get('_meta'), 'aihehuo_mcp.tools' in sys.modules]))"
+    )
+    env = dict(os.environ, AIHEHUO_CACHE_DIR=str(tmp_path), PYTHONPATH=ROOT)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    meta, tools_imported = json.loads(output.stdout)
+    # Cold record: no etags, and no import to compute them
+    assert meta is None
+    assert tools_imported is False
+
+
+def test_etags_are_reported_after_a_warm_start(tmp_path):
+    initialize = {"method": "initialize", "params": {}}
+    tools_list = {"method": "tools/list", "params": {}}
+    first = run_server(str(tmp_path), initialize, tools_list)
+    assert "_meta" not in first[0]["result"]
+
+    second = run_server(str(tmp_path), initialize, tools_list)
+    etags = second[0]["result"]["_meta"]["etags"]
+    assert etags["tools/list"] == second[1]["result"]["_meta"]["etag"] == first[1]["result"]["_meta"]["etag"]
+
+
+def test_failed_warm_up_is_reported(capsys):
+    from aihehuo_mcp.server import report_warm_up
+
+    async def fail():
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(None, lambda: 1 / 0)
+        future.add_done_callback(report_warm_up)
+        await asyncio.wait([future])
+        await asyncio.sleep(0)
+
+    asyncio.run(fail())
+
+    assert "Tool table warm-up failed: ZeroDivisionError" in capsys.readouterr().err
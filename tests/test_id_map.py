@@ -0,0 +1,129 @@
+# test_id_map.py
+"""
+User id <-> number map and the convert_* tools built on it.
+"""
+import asyncio
+import sqlite3
+from types import SimpleNamespace
+
+import httpx
+
+from aihehuo_mcp import tools
+from aihehuo_mcp.models import ConvertIdsToNumbersParams, ConvertNumbersToIdsParams
+from aihehuo_mcp.storage import IdNumberMap, extract_conversion
+
+
+def make_server() -> SimpleNamespace:
+    return SimpleNamespace(id_map=IdNumberMap(sqlite3.connect(":memory:")))
+
+
+def fake_backend(monkeypatch, payload):
+    """把 tools.api_request 换成返回 payload 的假后端，返回记录的请求体列表"""
+    sent = []
+
+    async def api_request(method, url, **kwargs):
+        sent.append(kwargs["json"])
+        return httpx.Response(200, json=payload, request=httpx.Request(method, url))
+
+    monkeypatch.setattr(tools, "api_request", api_request)
+    return sent
+
+
+def test_extract_conversion_documented_shape():
+    data = {"results": [
+        {"number": 9200001, "user_id": "abc", "found": True},
+        {"number": 9200002, "user_id": None, "found": False},
+    ]}
+    assert extract_conversion(data, [9200001, 9200002], "number") == {"9200001": "abc"}
+
+
+def test_extract_conversion_never_zips_unknown_items():
+    # Same length as the request but not a recognised item shape
+    data = {"data": [{"foo": 1}, {"bar": 2}]}
+    assert extract_conversion(data, [9200001, 9200002], "number") == {}
+    data = {"data": [{"number": {"nested": 1}, "user_id": "abc"}]}
+    assert extract_conversion(data, [9200001], "number") == {}
+
+
+def test_add_pairs_skips_non_scalar_values():
+    id_map = IdNumberMap(sqlite3.connect(":memory:"))
+    id_map.add_pairs([({"number": 1}, 9200001), ("abc", {"x": 1}), ("abc", True), ("def", 9200002)])
+    assert id_map.ids_for_numbers([9200001, 9200002]) == {9200002: "def"}
+
+
+def test_learn_from_ignores_nested_objects():
+    id_map = IdNumberMap(sqlite3.connect(":memory:"))
+    id_map.learn_from([
+        {"id": "u1", "number": 9200001, "idea": {"id": "i1", "number": 9200009}},
+        {"id": "u2"},
+        "not a record",
+    ])
+    assert id_map.ids_for_numbers([9200001, 9200009]) == {9200001: "u1"}
+
+
+def test_convert_numbers_hit_miss_and_not_found(monkeypatch):
+    server = make_server()
+    server.id_map.add_pairs([("cached", 9200001)])
+    sent = fake_backend(monkeypatch, {"success": True, "results": [
+        {"number": 9200002, "user_id": "fetched", "found": True},
+        {"number": 9999999, "user_id": None, "found": False},
+    ]})
+
+    params = ConvertNumbersToIdsParams(numbers=[9200001, 9200002, 9999999])
+    result = asyncio.run(tools.convert_numbers_to_ids(server, params, None))
+
+    # Only the misses go to the backend
+    assert sent == [{"numbers": [9200002, 9999999]}]
+    assert result == {"results": [
+        {"number": 9200001, "user_id": "cached", "found": True},
+        {"number": 9200002, "user_id": "fetched", "found": True},
+        {"number": 9999999, "user_id": None, "found": False},
+    ], "resolved_locally": 1, "fetched": 1}
+    # Found pairs are remembered, not-found ones are not
+    assert server.id_map.ids_for_numbers([9200002, 9999999]) == {9200002: "fetched"}
+
+
+def test_convert_ids_fully_local(monkeypatch):
+    server = make_server()
+    server.id_map.add_pairs([("1", 9200001), ("2", 9200002)])
+    sent = fake_backend(monkeypatch, {})
+
+    result = asyncio.run(tools.convert_ids_to_numbers(server, ConvertIdsToNumbersParams(ids=[2, 1]), None))
+
+    assert sent == []
+    assert result == {"results": [
+        {"user_id": 2, "number": 9200002, "found": True},
+        {"user_id": 1, "number": 9200001, "found": True},
+    ], "resolved_locally": 2, "fetched": 0}
+
+
+def test_convert_passes_unknown_shape_through(monkeypatch):
+    server = make_server()
+    fake_backend(monkeypatch, {"error": "unexpected"})
+
+    result = asyncio.run(tools.convert_numbers_to_ids(server, ConvertNumbersToIdsParams(numbers=[9200001]), None))
+
+    assert result == {"results": [{"number": 9200001, "user_id": None, "found": False}],
+                      "resolved_locally": 0, "fetched": 0, "backend_response": {"error": "unexpected"}}
+    assert server.id_map.ids_for_numbers([9200001]) == {}
+
+
+def test_convert_cold_and_warm_calls_are_equal(monkeypatch):
+    server = make_server()
+    sent = fake_backend(monkeypatch, {"success": True, "data": [
+        {"number": 9200001, "user_id": 101, "found": True},
+        {"number": 9200002, "user_id": 102, "found": True},
+    ]})
+    params = ConvertNumbersToIdsParams(numbers=[9200001, 9200002])
+
+    cold = asyncio.run(tools.convert_numbers_to_ids(server, params, None))
+    warm = asyncio.run(tools.convert_numbers_to_ids(server, params, None))
+
+    assert len(sent) == 1
+    assert cold["results"] == warm["results"] == [
+        {"number": 9200001, "user_id": 101, "found": True},
+        {"number": 9200002, "user_id": 102, "found": True},
+    ]
+    assert (cold["resolved_locally"], cold["fetched"]) == (0, 2)
+    assert (warm["resolved_locally"], warm["fetched"]) == (2, 0)
+    assert cold.keys() == warm.keys()
@@ -0,0 +1,34 @@
+# test_multi_search.py
+"""
+multi_search_members fusion across queries.
+"""
+import asyncio
+from types import SimpleNamespace
+
+from aihehuo_mcp import tools
+from aihehuo_mcp.models import MultiSearchMembersParams
+
+
+def test_unexpected_response_does_not_drop_other_queries():
+    responses = {
+        "寻找技术合伙人一起创业": {"total": 2, "hits": [{"id": "1", "score": 0.9}, {"id": "2", "score": 0.8}]},
+        "寻找增长负责人一起创业": ["not", "a", "dict"],
+        "寻找天使投资人一起创业": RuntimeError("backend down"),
+    }
+
+    async def cached_search(path, query, filters, paginate, excluded_ids=None):
+        response = responses[query]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    server = SimpleNamespace(cached_search=cached_search)
+    params = MultiSearchMembersParams(queries=list(responses))
+    result = asyncio.run(tools.multi_search_members(server, params, None))
+
+    assert [hit["id"] for hit in result["hits"]] == ["1", "2"]
+    assert result["queries"] == [
+        {"query": "寻找技术合伙人一起创业", "total": 2, "returned": 2},
+        {"query": "寻找增长负责人一起创业", "error": "unexpected response", "returned": 0},
+        {"query": "寻找天使投资人一起创业", "error": "backend down"},
+    ]
@@ -0,0 +1,69 @@
+# test_multipart.py
+"""
+MultipartBody must put the same bytes on the wire as httpx's own encoder.
+"""
+import asyncio
+import io
+
+import httpx
+
+from aihehuo_mcp import multipart
+from aihehuo_mcp.multipart import MultipartBody
+
+FIELDS = {
+    "title": '引号 " 和 \\ 反斜杠',
+    "count": 3,
+    "draft": True,
+    "published": False,
+    "note": None,
+    "tags[]": ["a", "b"],
+}
+# Several blocks long, with multi-byte characters straddling the block edges
+CONTENT = ("<p>合伙人 report ✓</p>\n" * (3 * multipart.BLOCK_SIZE // 20)).encode("utf-8")
+
+
+def body_bytes(body: MultipartBody) -> bytes:
+    async def collect():
+        return b"".join([block async for block in body])
+
+    return asyncio.run(collect())
+
+
+def httpx_request(body: MultipartBody, filename: str) -> httpx.Request:
+    return httpx.Request(
+        "POST", "https://api.example.com/micro/upload",
+        headers={"Content-Type": body.headers["Content-Type"]},
+        data=FIELDS,
+        files={"file": (filename, io.BytesIO(CONTENT), "text/html")},
+    )
+
+
+def test_path_source_matches_httpx(tmp_path):
+    path = tmp_path / "report.html"
+    path.write_bytes(CONTENT)
+    body = MultipartBody(FIELDS, "file", "报告 \"v2\".html", "text/html", path=str(path))
+
+    expected = httpx_request(body, "报告 \"v2\".html")
+
+    assert body_bytes(body) == expected.read()
+    assert body.headers["Content-Length"] == expected.headers["Content-Length"]
+
+
+def test_text_source_matches_httpx():
+    body = MultipartBody(FIELDS, "file", "report.html", "text/html", text=CONTENT.decode("utf-8"))
+
+    expected = httpx_request(body, "report.html")
+
+    assert body_bytes(body) == expected.read()
+    assert body.headers["Content-Length"] == expected.headers["Content-Length"]
+
+
+def test_body_can_be_sent_again(tmp_path):
+    path = tmp_path / "report.html"
+    path.write_bytes(CONTENT)
+    body = MultipartBody({}, "file", "report.html", "text/html", path=str(path))
+
+    first = body_bytes(body)
+
+    assert body_bytes(body) == first
+    assert len(first) == int(body.headers["Content-Length"])
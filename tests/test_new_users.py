@@ -0,0 +1,62 @@
+# test_new_users.py
+"""
+fetch_new_users page fan-out: short-page cutoff and cancellation.
+"""
+import asyncio
+import sqlite3
+from types import SimpleNamespace
+
+import httpx
+
+from aihehuo_mcp import tools
+from aihehuo_mcp.models import FetchNewUsersParams
+from aihehuo_mcp.storage import IdNumberMap
+
+
+def fake_pages(monkeypatch, last_page: int, per: int = 50):
+    """第 last_page 页不满一页；页码越大响应越慢"""
+    requested = []
+
+    async def api_request(method, url, **kwargs):
+        page = kwargs["json"]["paginate"]["page"]
+        requested.append(page)
+        await asyncio.sleep(0.02 * page)
+        count = per if page < last_page else (per // 5 if page == last_page else 0)
+        users = [{"id": f"u{page}-{i}", "number": page * 1000 + i} for i in range(count)]
+        return httpx.Response(200, json={"data": users}, request=httpx.Request(method, url))
+
+    monkeypatch.setattr(tools, "api_request", api_request)
+    return requested
+
+
+def make_server() -> SimpleNamespace:
+    return SimpleNamespace(id_map=IdNumberMap(sqlite3.connect(":memory:")))
+
+
+def test_stops_at_short_page(monkeypatch):
+    fake_pages(monkeypatch, last_page=3)
+    result = asyncio.run(tools.fetch_new_users(make_server(), FetchNewUsersParams(max_pages=6), None))
+    assert result["total_users"] == 110
+    assert result["pages_fetched"] == 3
+
+
+def test_cancelling_the_call_stops_page_fetches(monkeypatch):
+    fake_pages(monkeypatch, last_page=6)
+
+    async def run():
+        call = asyncio.create_task(tools.fetch_new_users(make_server(), FetchNewUsersParams(max_pages=6), None))
+        await asyncio.sleep(0.03)
+        call.cancel()
+        try:
+            await call
+        except asyncio.CancelledError:
+            cancelled = True
+        else:
+            cancelled = False
+        await asyncio.sleep(0)
+        others = [task for task in asyncio.all_tasks() if task is not asyncio.current_task() and not task.done()]
+        return cancelled, others
+
+    cancelled, others = asyncio.run(run())
+    assert cancelled
+    assert others == []
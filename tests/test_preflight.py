@@ -0,0 +1,57 @@
+# test_preflight.py
+"""
+HTML preflight checks, minifier and file decoding.
+"""
+import os
+
+from aihehuo_mcp import preflight
+from aihehuo_mcp.preflight import check_html, minify_html
+
+
+def test_minify_collapses_whitespace_and_styles():
+    html = '<div style="color: red ;  margin : 0">\n  <p>a   b</p>\n  <!-- note -->\n</div>'
+    assert minify_html(html) == '<div style="color:red;margin:0"><p>a b</p></div>'
+
+
+def test_minify_keeps_spaces_around_br():
+    assert minify_html("<p>a <br> b</p>") == "<p>a <br> b</p>"
+
+
+def test_minify_keeps_verbatim_and_nbsp():
+    html = "<pre>  a\n   b </pre><p>x  y</p>"
+    assert minify_html(html) == "<pre>  a\n   b </pre><p>x  y</p>"
+
+
+def test_wechat_article_problems():
+    result = check_html("wechat_article", text='<p>【用户姓名】</p><a href="x">link</a><p>【正常】</p>')
+    assert result.counts == {"placeholder": 1, "forbidden_tag": 1}
+    assert result.error()["error"] == "HTML preflight failed"
+
+
+def test_file_is_minified_to_a_temporary_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(preflight, "HTML_MINIFY", True)
+    path = tmp_path / "report.html"
+    path.write_text("<div>\n  <p>报告   内容</p>\n</div>\n" * 5000, encoding="utf-8")
+
+    result = check_html("ai_report", path=str(path))
+
+    assert result.html is None and result.error() is None
+    source = result.source({"path": str(path)})
+    assert source["path"] != str(path)
+    with open(source["path"], encoding="utf-8") as f:
+        assert f.read() == minify_html(path.read_text(encoding="utf-8"))
+    assert result.size == os.path.getsize(source["path"])
+    result.discard()
+    assert not os.path.exists(source["path"])
+
+
+def test_file_that_is_not_utf8_is_reported_not_rewritten(tmp_path, monkeypatch):
+    monkeypatch.setattr(preflight, "HTML_MINIFY", True)
+    path = tmp_path / "gbk.html"
+    path.write_bytes("<p>好</p>".encode("utf-8") + "<p>中文</p>".encode("gbk"))
+
+    result = check_html("ai_report", path=str(path))
+
+    assert result.problems == [{"problem": "encoding", "byte": 13}]
+    # Nothing to upload, so no minified copy is left behind
+    assert result.path is None
@@ -0,0 +1,62 @@
+# test_resilience.py
+"""
+Circuit breakers (resilience.py): only a backend that is down opens one.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from aihehuo_mcp import http_client, resilience
+from aihehuo_mcp.resilience import BackendUnavailable
+
+FAILURES = 3
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """假后端：statuses 中按路径给出状态码，返回收到请求的路径列表"""
+    statuses = {}
+    seen = []
+
+    def handler(request):
+        seen.append(request.url.path)
+        return httpx.Response(statuses.get(request.url.path, 200), json={})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(http_client, "get_client", lambda: client)
+    monkeypatch.setattr(resilience, "BREAKER_FAILURES", FAILURES)
+    monkeypatch.setattr(resilience, "_breakers", {})
+    return statuses, seen
+
+
+async def get(path: str) -> int:
+    # Not retried, so every call is exactly one request
+    resp = await http_client.api_request("GET", f"https://api.example.com{path}", idempotent=False)
+    return resp.status_code
+
+
+def test_broken_record_does_not_open_the_breaker(backend):
+    statuses, seen = backend
+    statuses["/users/1"] = 500
+
+    async def run():
+        return [await get("/users/1") for _ in range(FAILURES + 2)] + [await get("/users/2")]
+
+    assert asyncio.run(run()) == [500] * (FAILURES + 2) + [200]
+    assert seen[-1] == "/users/2"
+
+
+def test_unavailable_backend_opens_the_breaker(backend):
+    statuses, seen = backend
+    statuses["/users/1"] = 503
+
+    async def run():
+        codes = [await get("/users/1") for _ in range(FAILURES)]
+        with pytest.raises(BackendUnavailable):
+            await get("/users/2")
+        return codes
+
+    assert asyncio.run(run()) == [503] * FAILURES
+    # Failed fast: the request for the other record never reached the backend
+    assert seen == ["/users/1"] * FAILURES
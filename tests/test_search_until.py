@@ -0,0 +1,81 @@
+# test_search_until.py
+"""
+Auto-paging semantic search (AihehuoMCPServer.search_until).
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from aihehuo_mcp import server as server_module
+from aihehuo_mcp.config import SEARCH_WINDOW
+from aihehuo_mcp.server import AihehuoMCPServer
+
+
+def fake_search(monkeypatch, total: int, fail_pages=()):
+    """按 total 条排名结果分页返回；fail_pages 中的页立即返回 500"""
+    requested = []
+
+    async def api_request(method, url, **kwargs):
+        page = kwargs["json"]["paginate"]["page"]
+        per = kwargs["json"]["paginate"]["per"]
+        requested.append(page)
+        request = httpx.Request(method, url)
+        if page in fail_pages:
+            # Fails straight away, before the pages ahead of it have been merged
+            return httpx.Response(500, json={"error": "boom"}, request=request)
+        await asyncio.sleep(0.005 * page)
+        start = (page - 1) * per
+        hits = [{"id": str(i), "score": 1 - i / 1000} for i in range(start, min(start + per, total))]
+        return httpx.Response(200, json={"total": total, "hits": hits}, request=request)
+
+    monkeypatch.setattr(server_module, "api_request", api_request)
+    return requested
+
+
+def search(max_results: int, **kwargs):
+    return asyncio.run(AihehuoMCPServer().search_until("/users/search", "q", {}, max_results, **kwargs))
+
+
+def test_collects_pages_in_rank_order(monkeypatch):
+    fake_search(monkeypatch, total=SEARCH_WINDOW * 3)
+    result = search(SEARCH_WINDOW * 2 + 5)
+    assert [hit["id"] for hit in result["hits"]] == [str(i) for i in range(SEARCH_WINDOW * 2 + 5)]
+    assert result["stopped_by"] == "max_results"
+    assert "truncated" not in result
+
+
+def test_stops_at_min_score(monkeypatch):
+    fake_search(monkeypatch, total=SEARCH_WINDOW * 3)
+    result = search(SEARCH_WINDOW * 3, min_score=1 - 10 / 1000)
+    assert result["returned"] == 11
+    assert result["stopped_by"] == "min_score"
+
+
+def test_later_page_failure_returns_partial_results(monkeypatch):
+    fake_search(monkeypatch, total=SEARCH_WINDOW * 5, fail_pages={2})
+    result = search(SEARCH_WINDOW * 4)
+    assert result["returned"] == SEARCH_WINDOW
+    assert result["stopped_by"] == "error"
+    assert result["truncated"] is True
+    assert "page 2" in result["error"]
+
+
+def test_first_page_failure_raises(monkeypatch):
+    fake_search(monkeypatch, total=SEARCH_WINDOW * 5, fail_pages={1})
+    with pytest.raises(httpx.HTTPStatusError):
+        search(SEARCH_WINDOW * 4)
+
+
+def test_no_prefetch_is_left_running(monkeypatch):
+    # Pages 2 and 3 are prefetched: page 2 fails, page 3 is still in flight; page 1 alone satisfies the search
+    fake_search(monkeypatch, total=SEARCH_WINDOW * 5, fail_pages={2})
+
+    async def run():
+        result = await AihehuoMCPServer().search_until("/users/search", "q", {}, 5)
+        others = [task for task in asyncio.all_tasks() if task is not asyncio.current_task() and not task.done()]
+        return result, others
+
+    result, others = asyncio.run(run())
+    assert result["returned"] == 5
+    assert others == []
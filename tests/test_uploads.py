@@ -0,0 +1,202 @@
+# test_uploads.py
+"""
+Chunked/resumable uploads, the one-shot fallback, and upload dedup
+(previous_upload) with its optional availability check.
+"""
+import asyncio
+import hashlib
+import json
+import sqlite3
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from aihehuo_mcp import uploads
+from aihehuo_mcp.storage import UploadIndex, UploadSessions
+
+CHUNK_SIZE = 1000
+CONTENT = bytes(range(256)) * 15  # 3840 bytes -> 4 parts
+
+
+def make_server() -> SimpleNamespace:
+    conn = sqlite3.connect(":memory:")
+    return SimpleNamespace(upload_index=UploadIndex(conn), upload_sessions=UploadSessions(conn),
+                           send_progress=lambda *args: None)
+
+
+class FakeBackend:
+    """/micro/uploads 分块协议和一次性上传端点的内存实现，记录收到的请求"""
+
+    def __init__(self, chunking: bool = True, fail_part: int = None):
+        self.chunking = chunking
+        self.fail_part = fail_part
+        self.sessions = {}
+        self.created = 0
+        self.requests = []
+        self.uploaded = []
+
+    def put_parts(self):
+        return [int(url.rsplit("/", 1)[1]) for method, url in self.requests if "/parts/" in url]
+
+    async def api_request(self, method, url, idempotent=None, **kwargs):
+        path = url[len(uploads.AIHEHUO_API_BASE):]
+        self.requests.append((method, path))
+        request = httpx.Request(method, url)
+        if path == uploads.UPLOADS_PATH:
+            if not self.chunking:
+                return httpx.Response(404, request=request)
+            self.created += 1
+            upload_id = f"u{self.created}"
+            self.sessions[upload_id] = {}
+            return httpx.Response(200, json=self.describe(upload_id), request=request)
+        if path.startswith(uploads.UPLOADS_PATH + "/"):
+            upload_id, _, rest = path[len(uploads.UPLOADS_PATH) + 1:].partition("/")
+            if upload_id not in self.sessions:
+                return httpx.Response(404, request=request)
+            if method == "GET":
+                return httpx.Response(200, json=self.describe(upload_id), request=request)
+            if rest == "complete":
+                parts = self.sessions.pop(upload_id)
+                self.uploaded.append(b"".join(parts[number] for number in sorted(parts)))
+                return httpx.Response(200, json={"url": f"https://cdn.example.com/{upload_id}"}, request=request)
+            number = int(rest.rsplit("/", 1)[1])
+            if number == self.fail_part:
+                self.fail_part = None
+                return httpx.Response(500, request=request)
+            data = kwargs["content"]
+            assert kwargs["headers"]["X-Content-SHA256"] == hashlib.sha256(data).hexdigest()
+            self.sessions[upload_id][number] = data
+            return httpx.Response(200, json={"part": number, "size": len(data),
+                                             "sha256": hashlib.sha256(data).hexdigest()}, request=request)
+        # One-shot multipart endpoint
+        body = b"".join([block async for block in kwargs["content"]])
+        self.uploaded.append(body)
+        return httpx.Response(200, json={"url": "https://cdn.example.com/oneshot"}, request=request)
+
+    def describe(self, upload_id):
+        parts = self.sessions[upload_id]
+        return {"upload_id": upload_id, "chunk_size": CHUNK_SIZE, "parallel": False,
+                "parts": [{"part": number, "sha256": hashlib.sha256(data).hexdigest()}
+                          for number, data in sorted(parts.items())]}
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    fake = FakeBackend()
+    monkeypatch.setattr(uploads, "api_request", fake.api_request)
+    monkeypatch.setattr(uploads, "CHUNKED_UPLOADS", True)
+    monkeypatch.setattr(uploads, "CHUNKED_UPLOAD_THRESHOLD", 0)
+    monkeypatch.setattr(uploads, "UPLOAD_DEDUP", True)
+    monkeypatch.setattr(uploads, "UPLOAD_DEDUP_VERIFY", False)
+    monkeypatch.setattr(uploads, "_chunking_unsupported", False)
+    return fake
+
+
+@pytest.fixture
+def report(tmp_path):
+    path = tmp_path / "report.pdf"
+    path.write_bytes(CONTENT)
+    return str(path)
+
+
+def send(server, file_path) -> dict:
+    return json.loads(asyncio.run(uploads.send_file(server, "bps", file_path, "application/pdf")))
+
+
+def test_chunked_upload_sends_every_part(backend, report):
+    server = make_server()
+
+    assert send(server, report) == {"url": "https://cdn.example.com/u1"}
+    assert backend.put_parts() == [1, 2, 3, 4]
+    assert backend.uploaded == [CONTENT]
+    assert server.upload_sessions.get(f"bps:{uploads.file_fingerprint(report)}") is None
+
+
+def test_interrupted_upload_resumes_missing_parts(backend, report):
+    server = make_server()
+    backend.fail_part = 3
+
+    with pytest.raises(httpx.HTTPStatusError):
+        send(server, report)
+    acknowledged = set(backend.sessions["u1"])
+    assert {1, 2} <= acknowledged and 3 not in acknowledged
+    backend.requests.clear()
+
+    assert send(server, report) == {"url": "https://cdn.example.com/u1"}
+    assert ("GET", f"{uploads.UPLOADS_PATH}/u1") in backend.requests
+    assert sorted(backend.put_parts()) == sorted({1, 2, 3, 4} - acknowledged)
+    assert backend.uploaded == [CONTENT]
+
+
+def test_backend_without_chunking_falls_back_to_one_shot(backend, report):
+    server = make_server()
+    backend.chunking = False
+
+    assert send(server, report) == {"url": "https://cdn.example.com/oneshot"}
+    assert uploads._chunking_unsupported is True
+    assert [path for method, path in backend.requests] == [uploads.UPLOADS_PATH, "/micro/bps"]
+    assert CONTENT in backend.uploaded[0]
+
+
+def test_same_content_is_uploaded_once(backend, report, tmp_path):
+    server = make_server()
+    send(server, report)
+    backend.requests.clear()
+    copy = tmp_path / "copy.pdf"
+    copy.write_bytes(CONTENT)
+
+    assert send(server, str(copy)) == {"url": "https://cdn.example.com/u1"}
+    assert backend.requests == []
+
+
+def test_changed_content_is_uploaded_again(backend, report, tmp_path):
+    server = make_server()
+    send(server, report)
+    other = tmp_path / "other.pdf"
+    other.write_bytes(CONTENT[::-1])
+
+    assert send(server, str(other)) == {"url": "https://cdn.example.com/u2"}
+    assert backend.uploaded == [CONTENT, CONTENT[::-1]]
+
+
+def record(server: SimpleNamespace, url: str) -> None:
+    body = json.dumps({"url": url})
+    server.upload_index.record(uploads.upload_scope("upload"), "d" * 64, 3, body)
+
+
+def cdn_client(monkeypatch, handler):
+    """把 HEAD 检查用的连接池换成 MockTransport，并确认不经过后端的 api_request"""
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(uploads, "get_client", lambda: client)
+
+    async def api_request(*args, **kwargs):
+        raise AssertionError("the availability check must not go through api_request")
+
+    monkeypatch.setattr(uploads, "api_request", api_request)
+    monkeypatch.setattr(uploads, "UPLOAD_DEDUP_VERIFY", True)
+
+
+def test_verified_hit_uses_plain_client(monkeypatch):
+    server = make_server()
+    record(server, "https://cdn.example.com/a.png")
+    seen = []
+    cdn_client(monkeypatch, lambda request: seen.append((request.method, str(request.url))) or httpx.Response(200))
+
+    body = asyncio.run(uploads.previous_upload(server, "upload", "d" * 64))
+
+    assert json.loads(body) == {"url": "https://cdn.example.com/a.png"}
+    assert seen == [("HEAD", "https://cdn.example.com/a.png")]
+
+
+def test_unreachable_url_is_forgotten(monkeypatch):
+    server = make_server()
+    record(server, "https://cdn.example.com/gone.png")
+
+    def handler(request):
+        raise httpx.ConnectError("no route", request=request)
+
+    cdn_client(monkeypatch, handler)
+
+    assert asyncio.run(uploads.previous_upload(server, "upload", "d" * 64)) is None
+    assert server.upload_index.lookup(uploads.upload_scope("upload"), "d" * 64) is None